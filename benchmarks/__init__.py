@@ -0,0 +1 @@
+"""End-to-end benchmarks run against a local fake Instagram server"""
@@ -0,0 +1,120 @@
+"""
+Compare two benchmark result files
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+
+Exits with status 1 if any metric regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Metric name -> True if higher is better
+METRICS = {
+    "items_per_s": True,
+    "mb_per_s": True,
+    "wall_s": False,
+    "ttfi_s": False,
+    "item_latency_p50_s": False,
+    "item_latency_p99_s": False,
+    "peak_rss_mb": False,
+    "requests": False,
+    "modules_imported": False,
+}
+
+
+def compare(
+    before: Dict[str, Any],
+    after: Dict[str, Any],
+    threshold: float
+) -> Tuple[List[List[str]], List[str]]:
+    """
+    Compare scenario metrics of two result documents
+
+    Args:
+        before: Baseline results document
+        after: New results document
+        threshold: Allowed relative regression in percent
+
+    Returns:
+        (table rows, descriptions of regressions beyond threshold)
+    """
+    rows: List[List[str]] = []
+    regressions: List[str] = []
+
+    for scenario, new in after["results"].items():
+        old = before["results"].get(scenario)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old_value, new_value = old.get(metric), new.get(metric)
+            if old_value is None and new_value is None:
+                continue
+            change = relative_change(old_value, new_value)
+            mark = ""
+            if change is not None:
+                worse = -change if higher_is_better else change
+                if worse > threshold:
+                    mark = "REGRESSION"
+                    regressions.append(f"{scenario}.{metric} {change:+.1f}%")
+                elif worse < -threshold:
+                    mark = "improved"
+            rows.append([
+                scenario,
+                metric,
+                fmt(old_value),
+                fmt(new_value),
+                "" if change is None else f"{change:+.1f}%",
+                mark,
+            ])
+
+    return rows, regressions
+
+
+def relative_change(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    """Change from old to new in percent (None if not comparable)"""
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def fmt(value: Optional[float]) -> str:
+    """Format a metric value for the table"""
+    if value is None:
+        return "-"
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.4g}"
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compare two IGsaver benchmark result files")
+    parser.add_argument('before', type=Path, help='Baseline results')
+    parser.add_argument('after', type=Path, help='New results')
+    parser.add_argument('-t', '--threshold', type=float, default=10.0,
+                        help='Relative change in percent reported as regression (default: 10)')
+    parsed = parser.parse_args(args)
+
+    before = json.loads(parsed.before.read_text())
+    after = json.loads(parsed.after.read_text())
+    rows, regressions = compare(before, after, parsed.threshold)
+
+    print(f"{before['meta'].get('commit') or parsed.before.name} -> "
+          f"{after['meta'].get('commit') or parsed.after.name}")
+    header = ["scenario", "metric", "before", "after", "change", ""]
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {parsed.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Local in-memory stand-in for an S3-compatible object store"""
+
+import argparse
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class FakeS3:
+    """
+    Threaded HTTP server implementing the S3 calls used by S3Storage
+
+    Objects live in memory, keyed by bucket and key, with path-style URLs.
+    Signatures are not verified, only required to be present. Requests are
+    counted per operation.
+    """
+
+    def __init__(self, port: int = 0) -> None:
+        """
+        Initialize server (not started yet)
+
+        Args:
+            port: TCP port to listen on (0 picks a free one)
+        """
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeS3":
+        """Serve requests on a background thread"""
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeS3":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def keys(self, bucket: str) -> List[str]:
+        """Sorted object keys of a bucket"""
+        with self._lock:
+            return sorted(self.objects.get(bucket, {}))
+
+    def request_counts(self) -> Dict[str, int]:
+        """Snapshot of requests served per operation"""
+        with self._lock:
+            return dict(self.counts)
+
+    def _count(self, operation: str) -> None:
+        with self._lock:
+            self.counts[operation] += 1
+            self.counts['total'] += 1
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _target(self):
+                parts = urlsplit(self.path)
+                bucket, _, key = unquote(parts.path).lstrip('/').partition('/')
+                query = {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+                return bucket, key, query
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def _authorized(self) -> bool:
+                if not self.headers.get('Authorization', '').startswith('AWS4-HMAC-SHA256 Credential='):
+                    self._send(403, b'<Error><Code>AccessDenied</Code></Error>')
+                    return False
+                return True
+
+            def do_PUT(self) -> None:
+                bucket, key, query = self._target()
+                body = self._body()
+                if not self._authorized():
+                    return
+                if 'uploadId' in query:
+                    server._count('upload_part')
+                    with server._lock:
+                        parts = server.uploads.get(query['uploadId'])
+                        if parts is None:
+                            self._send(404, b'<Error><Code>NoSuchUpload</Code></Error>')
+                            return
+                        parts[int(query['partNumber'])] = body
+                    self._send(200, headers={'ETag': f'"{uuid.uuid4().hex}"'})
+                    return
+                server._count('put')
+                with server._lock:
+                    server.objects.setdefault(bucket, {})[key] = body
+                self._send(200, headers={'ETag': f'"{uuid.uuid4().hex}"'})
+
+            def do_POST(self) -> None:
+                bucket, key, query = self._target()
+                body = self._body()
+                if not self._authorized():
+                    return
+                if 'uploads' in query:
+                    server._count('create_upload')
+                    upload_id = uuid.uuid4().hex
+                    with server._lock:
+                        server.uploads[upload_id] = {}
+                    self._send(200, f'<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>'
+                                    f'</InitiateMultipartUploadResult>'.encode())
+                    return
+                server._count('complete_upload')
+                numbers = [int(n) for n in re.findall(rb'<PartNumber>(\d+)</PartNumber>', body)]
+                with server._lock:
+                    parts = server.uploads.pop(query.get('uploadId', ''), None)
+                    if parts is None or any(n not in parts for n in numbers):
+                        self._send(404, b'<Error><Code>NoSuchUpload</Code></Error>')
+                        return
+                    server.objects.setdefault(bucket, {})[key] = b''.join(parts[n] for n in numbers)
+                self._send(200, b'<CompleteMultipartUploadResult></CompleteMultipartUploadResult>')
+
+            def do_DELETE(self) -> None:
+                _, _, query = self._target()
+                if not self._authorized():
+                    return
+                server._count('abort_upload')
+                with server._lock:
+                    server.uploads.pop(query.get('uploadId', ''), None)
+                self._send(204)
+
+            def do_HEAD(self) -> None:
+                bucket, key, _ = self._target()
+                if not self._authorized():
+                    return
+                server._count('head')
+                with server._lock:
+                    body = server.objects.get(bucket, {}).get(key)
+                if body is None:
+                    self._send(404, head=True)
+                else:
+                    self._send(200, headers={'Content-Length': str(len(body))}, head=True)
+
+            def do_GET(self) -> None:
+                bucket, key, query = self._target()
+                if not self._authorized():
+                    return
+                if not key and query.get('list-type') == '2':
+                    server._count('list')
+                    prefix = query.get('prefix', '')
+                    limit = int(query.get('max-keys', 1000))
+                    keys = [k for k in server.keys(bucket) if k.startswith(prefix)][:limit]
+                    contents = ''.join(f'<Contents><Key>{k}</Key></Contents>' for k in keys)
+                    self._send(200, f'<ListBucketResult>{contents}</ListBucketResult>'.encode())
+                    return
+                server._count('get')
+                with server._lock:
+                    body = server.objects.get(bucket, {}).get(key)
+                if body is None:
+                    self._send(404, b'<Error><Code>NoSuchKey</Code></Error>')
+                else:
+                    self._send(200, body)
+
+            def _send(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None,
+                      head: bool = False) -> None:
+                self.send_response(status)
+                headers = headers or {}
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if 'Content-Length' not in headers:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+        return Handler
+
+
+def main() -> None:
+    """Run the fake object store in the foreground"""
+    parser = argparse.ArgumentParser(description="Serve an in-memory S3-compatible object store")
+    parser.add_argument('--port', type=int, default=9000)
+    args = parser.parse_args()
+
+    server = FakeS3(args.port).start()
+    print(f"Serving S3 on {server.url} (any bucket and credentials, Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
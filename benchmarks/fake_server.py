@@ -0,0 +1,264 @@
+"""Local stand-in for Instagram serving synthetic profiles, highlights and media"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+BASE_USERID = 1000
+BASE_TIMESTAMP = 1600000000
+
+
+@dataclass
+class ServerConfig:
+    """Shape and timing of the synthetic data set"""
+    profiles: int = 1
+    highlights: int = 10
+    items_per_highlight: int = 10
+    stories: int = 10
+    media_size: int = 256 * 1024
+    video_ratio: float = 0.3
+    api_latency: float = 0.05
+    media_latency: float = 0.02
+
+    def username(self, index: int) -> str:
+        """Username of the synthetic profile with given index"""
+        return f"bench{index}"
+
+
+class FakeInstagram:
+    """
+    Threaded HTTP server implementing the API expected by HttpTransport
+
+    Every response is delayed by the configured latency, media bodies
+    honour Range requests, and requests are counted per endpoint.
+    """
+
+    def __init__(self, config: Optional[ServerConfig] = None, port: int = 0) -> None:
+        """
+        Initialize server (not started yet)
+
+        Args:
+            config: Data set description
+            port: TCP port to listen on (0 picks a free one)
+        """
+        self.config = config or ServerConfig()
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeInstagram":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeInstagram":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def request_counts(self) -> Dict[str, int]:
+        """Snapshot of requests served per endpoint"""
+        with self._lock:
+            return dict(self.counts)
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.counts[endpoint] += 1
+            self.counts['total'] += 1
+
+    def _node(self, media_id: int) -> Dict[str, Any]:
+        """GraphQL story item node for a synthetic media id"""
+        every = round(1 / self.config.video_ratio) if self.config.video_ratio > 0 else 0
+        is_video = bool(every) and media_id % every == 0
+        return {
+            "id": str(media_id),
+            "taken_at_timestamp": BASE_TIMESTAMP + media_id,
+            "is_video": is_video,
+            "display_url": f"/media/{media_id}.jpg",
+            "video_url": f"/media/{media_id}.mp4" if is_video else None,
+        }
+
+    def _highlights(self, userid: int) -> List[Dict[str, Any]]:
+        first = (userid - BASE_USERID) * self.config.highlights
+        return [self._highlight(first + k, f"Highlight {k}") for k in range(self.config.highlights)]
+
+    def _highlight(self, highlight_id: int, title: str) -> Dict[str, Any]:
+        """Highlight listing node with the change markers Instagram reports"""
+        last_item = (highlight_id + 1) * self.config.items_per_highlight - 1
+        return {
+            "id": highlight_id,
+            "title": title,
+            "latest_reel_media": BASE_TIMESTAMP + last_item,
+            "media_count": self.config.items_per_highlight,
+            "cover_media": {"id": str(highlight_id * self.config.items_per_highlight)},
+        }
+
+    def _highlight_items(self, highlight_id: int) -> List[Dict[str, Any]]:
+        first = highlight_id * self.config.items_per_highlight
+        return [self._node(first + i) for i in range(self.config.items_per_highlight)]
+
+    def _story_items(self, userid: int) -> List[Dict[str, Any]]:
+        # Story ids live above every highlight item id
+        first = 10 ** 9 + (userid - BASE_USERID) * self.config.stories
+        return [self._node(first + i) for i in range(self.config.stories)]
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                config = server.config
+                path = self.path.split('?')[0]
+
+                match = re.fullmatch(r'/media/(\d+)\.(jpg|mp4)', path)
+                if match:
+                    # Closed ranges are size probes, counted apart from transfers
+                    probe = re.fullmatch(r'bytes=\d+-\d+', self.headers.get('Range', ''))
+                    server._count('media_probe' if probe else 'media')
+                    time.sleep(config.media_latency)
+                    self._send_media(int(match.group(1)), match.group(2))
+                    return
+
+                time.sleep(config.api_latency)
+                match = re.fullmatch(r'/api/profiles/([^/]+)', path)
+                if match:
+                    server._count('profile')
+                    names = [config.username(i) for i in range(config.profiles)]
+                    if match.group(1) not in names:
+                        self._send_json({"error": "not found"}, 404)
+                        return
+                    index = names.index(match.group(1))
+                    self._send_json({"username": match.group(1), "userid": BASE_USERID + index})
+                    return
+
+                match = re.fullmatch(r'/api/profiles/(\d+)/(highlights|stories)', path)
+                if match:
+                    userid = int(match.group(1))
+                    if match.group(2) == 'highlights':
+                        server._count('highlights')
+                        self._send_json({"highlights": server._highlights(userid)})
+                    else:
+                        server._count('stories')
+                        self._send_json({"items": server._story_items(userid)})
+                    return
+
+                if path == '/api/stories':
+                    server._count('stories')
+                    query = parse_qs(urlsplit(self.path).query)
+                    userids = [int(u) for u in query.get('userids', [''])[0].split(',') if u]
+                    self._send_json({"reels": {
+                        str(userid): server._story_items(userid)
+                        for userid in userids
+                        if BASE_USERID <= userid < BASE_USERID + config.profiles
+                    }})
+                    return
+
+                if path == '/api/highlight_items':
+                    server._count('highlight_items')
+                    query = parse_qs(urlsplit(self.path).query)
+                    ids = [int(i) for i in query.get('ids', [''])[0].split(',') if i]
+                    self._send_json({"reels": {
+                        str(highlight_id): server._highlight_items(highlight_id) for highlight_id in ids
+                    }})
+                    return
+
+                match = re.fullmatch(r'/api/highlights/(\d+)/items', path)
+                if match:
+                    server._count('highlight_items')
+                    self._send_json({"items": server._highlight_items(int(match.group(1)))})
+                    return
+
+                server._count('other')
+                self._send_json({"error": "unknown endpoint"}, 404)
+
+            def _send_json(self, data: Any, status: int = 200) -> None:
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_media(self, media_id: int, extension: str) -> None:
+                size = server.config.media_size
+                start = 0
+                end = size - 1
+                match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if match and int(match.group(1)) < size:
+                    start = int(match.group(1))
+                    end = min(end, int(match.group(2))) if match.group(2) else end
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                else:
+                    self.send_response(200)
+
+                # Content differs per media id so deduplication does not collapse it
+                body = (media_id.to_bytes(8, 'big') * (size // 8 + 1))[start:end + 1]
+                self.send_header('Content-Type', 'video/mp4' if extension == 'mp4' else 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main() -> None:
+    """Run the fake server in the foreground"""
+    parser = argparse.ArgumentParser(description="Serve a synthetic Instagram data set for HttpTransport")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--profiles', type=int, default=1)
+    parser.add_argument('--highlights', type=int, default=10)
+    parser.add_argument('--items', type=int, default=10, help='Items per highlight')
+    parser.add_argument('--stories', type=int, default=10)
+    parser.add_argument('--media-kb', type=int, default=256)
+    parser.add_argument('--api-latency-ms', type=float, default=50)
+    parser.add_argument('--media-latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    config = ServerConfig(
+        profiles=args.profiles,
+        highlights=args.highlights,
+        items_per_highlight=args.items,
+        stories=args.stories,
+        media_size=args.media_kb * 1024,
+        api_latency=args.api_latency_ms / 1000,
+        media_latency=args.media_latency_ms / 1000,
+    )
+    server = FakeInstagram(config, args.port).start()
+    print(f"Serving {config.profiles} profiles on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
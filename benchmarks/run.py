@@ -0,0 +1,299 @@
+"""
+Run end-to-end benchmarks against the local fake server
+
+Each scenario runs in a fresh process (so peak RSS is per scenario) with
+the asyncio engine and HttpTransport pointed at benchmarks.fake_server:
+
+    python -m benchmarks.run -o before.json
+    python -m benchmarks.run -o after.json
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_server import FakeInstagram, ServerConfig
+from src.app import IGSaver
+from src.progress import ProgressTracker
+from src.transport import HttpTransport, MediaResponse, Transport
+
+SCENARIOS = ("highlights", "stories", "incremental")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class TimedTransport(Transport):
+    """HttpTransport recording the duration of every media transfer"""
+
+    def __init__(self, inner: Transport) -> None:
+        self.inner = inner
+        self.media_latencies: List[float] = []
+
+    async def get_profile(self, username):
+        return await self.inner.get_profile(username)
+
+    async def list_highlights(self, profile):
+        return await self.inner.list_highlights(profile)
+
+    async def list_highlight_items(self, highlight):
+        return await self.inner.list_highlight_items(highlight)
+
+    async def list_highlight_items_many(self, highlights):
+        return await self.inner.list_highlight_items_many(highlights)
+
+    async def list_story_items(self, profile):
+        return await self.inner.list_story_items(profile)
+
+    async def list_stories(self, profiles):
+        return await self.inner.list_stories(profiles)
+
+    async def open_media(self, url, offset=0):
+        started = time.perf_counter()
+        response = await self.inner.open_media(url, offset)
+
+        async def chunks():
+            async for chunk in response.chunks:
+                yield chunk
+            self.media_latencies.append(time.perf_counter() - started)
+
+        return MediaResponse(response.content_type, chunks(), response.start, response.total_length)
+
+    async def close(self):
+        await self.inner.close()
+
+
+class ItemClock(ProgressTracker):
+    """Progress tracker recording when each item finishes"""
+
+    def __init__(self) -> None:
+        super().__init__(disable=True)
+        self.finished: List[float] = []
+
+    def update(self, n: int = 1) -> None:
+        self.finished.extend([time.perf_counter()] * n)
+        super().update(n)
+
+
+def run_backup(
+    scenario: str,
+    base_url: str,
+    output_dir: str,
+    usernames: List[str],
+    workers: int
+) -> Dict[str, Any]:
+    """
+    Back up the synthetic profiles once and measure it (runs in a worker process)
+
+    Args:
+        scenario: "highlights", "stories" or "incremental" (highlights again)
+        base_url: Fake server URL
+        output_dir: Backups directory
+        usernames: Profiles to back up
+        workers: advanced.concurrent_downloads
+
+    Returns:
+        Metrics of the run
+    """
+    config_file = Path(output_dir).with_suffix('.yaml')
+    config_file.write_text(
+        "advanced:\n"
+        "  delay_between_items: 0\n"
+        "  max_retries: 0\n"
+        f"  concurrent_downloads: {workers}\n"
+        f"  profile_parallelism: {len(usernames)}\n"
+    )
+
+    transport = TimedTransport(HttpTransport(base_url))
+    clock = ItemClock()
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = IGSaver(
+            output_dir=Path(output_dir),
+            show_progress=False,
+            config_file=config_file,
+            transport=transport
+        )
+        app.progress = app.engine.progress = clock
+
+        started = time.perf_counter()
+        try:
+            stats, _ = app.run_batch(usernames, download_stories=scenario == "stories")
+        finally:
+            app.close()
+        wall = time.perf_counter() - started
+
+    processed = stats.items_downloaded + stats.items_skipped
+    return {
+        "wall_s": wall,
+        "items_downloaded": stats.items_downloaded,
+        "items_skipped": stats.items_skipped,
+        "items_failed": stats.items_failed,
+        "items_per_s": processed / wall if wall > 0 else 0.0,
+        "bytes_downloaded": stats.bytes_downloaded,
+        "mb_per_s": stats.bytes_downloaded / wall / (1024 * 1024) if wall > 0 else 0.0,
+        "ttfi_s": clock.finished[0] - started if clock.finished else None,
+        "item_latency_p50_s": percentile(transport.media_latencies, 50),
+        "item_latency_p99_s": percentile(transport.media_latencies, 99),
+        "peak_rss_mb": peak_rss_mb(),
+        "client_requests": stats.requests_made,
+    }
+
+
+def run_isolated(*args: Any) -> Dict[str, Any]:
+    """Run run_backup in a fresh interpreter"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_backup, *args).result()
+
+
+def median_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine repeated runs into the median of every metric"""
+    result: Dict[str, Any] = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        if not values:
+            result[key] = None
+        elif isinstance(values[0], dict):
+            result[key] = values[0]
+        else:
+            result[key] = statistics.median(values)
+    return result
+
+
+def run_suite(
+    config: ServerConfig,
+    scenarios: List[str],
+    workers: int,
+    repeat: int = 1
+) -> Dict[str, Any]:
+    """
+    Run benchmark scenarios against a fresh fake server
+
+    Args:
+        config: Synthetic data set
+        scenarios: Scenario names to run
+        workers: advanced.concurrent_downloads
+        repeat: Runs per scenario (median is reported)
+
+    Returns:
+        Results document
+    """
+    usernames = [config.username(i) for i in range(config.profiles)]
+    results: Dict[str, Any] = {}
+
+    with FakeInstagram(config) as server, tempfile.TemporaryDirectory(prefix="igsaver-bench-") as tmp:
+        for scenario in scenarios:
+            runs = []
+            for attempt in range(repeat):
+                output_dir = str(Path(tmp) / f"{scenario}-{attempt}")
+                if scenario == "incremental":
+                    # Populate the tree first; only the re-run is measured
+                    run_isolated("highlights", server.url, output_dir, usernames, workers)
+
+                before = server.request_counts()
+                run = run_isolated(scenario, server.url, output_dir, usernames, workers)
+                after = server.request_counts()
+                run["server_requests"] = {
+                    endpoint: count - before.get(endpoint, 0)
+                    for endpoint, count in after.items()
+                    if count - before.get(endpoint, 0)
+                }
+                run["requests"] = run["server_requests"].get("total", 0)
+                runs.append(run)
+                print(f"  {scenario} #{attempt + 1}: {run['items_per_s']:.1f} items/s, "
+                      f"{run['requests']} requests", file=sys.stderr)
+
+            results[scenario] = median_of(runs)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workers": workers,
+            "repeat": repeat,
+            "server": asdict(config),
+        },
+        "results": results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit of the working tree, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark IGsaver against a local fake Instagram server")
+    parser.add_argument('-o', '--output', type=Path, default=Path("bench-results.json"),
+                        help='Results file (default: bench-results.json)')
+    parser.add_argument('-s', '--scenario', action='append', choices=SCENARIOS,
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('-j', '--workers', type=int, default=4, help='Concurrent downloads (default: 4)')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='Runs per scenario, median reported')
+    parser.add_argument('--profiles', type=int, default=1)
+    parser.add_argument('--highlights', type=int, default=10)
+    parser.add_argument('--items', type=int, default=10, help='Items per highlight')
+    parser.add_argument('--stories', type=int, default=10)
+    parser.add_argument('--media-kb', type=int, default=256)
+    parser.add_argument('--api-latency-ms', type=float, default=50)
+    parser.add_argument('--media-latency-ms', type=float, default=20)
+    parsed = parser.parse_args(args)
+
+    config = ServerConfig(
+        profiles=parsed.profiles,
+        highlights=parsed.highlights,
+        items_per_highlight=parsed.items,
+        stories=parsed.stories,
+        media_size=parsed.media_kb * 1024,
+        api_latency=parsed.api_latency_ms / 1000,
+        media_latency=parsed.media_latency_ms / 1000,
+    )
+    scenarios = parsed.scenario or list(SCENARIOS)
+
+    print(f"Running {', '.join(scenarios)} ({parsed.workers} workers)", file=sys.stderr)
+    document = run_suite(config, scenarios, parsed.workers, max(1, parsed.repeat))
+    parsed.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"Results written to {parsed.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Measure cold-start time of the command-line interface
+
+Every sample starts a fresh interpreter, as a wrapper invoking igsaver
+would:
+
+    python -m benchmarks.startup -o startup.json
+    python -m benchmarks.compare startup-before.json startup.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.run import git_commit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Scenario name -> interpreter arguments
+SCENARIOS = {
+    "version": ["igsaver.py", "--version"],
+    "help": ["igsaver.py", "--help"],
+    "import_app": ["-c", "import src.app"],
+}
+
+
+def run_once(args: List[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    """Run the interpreter once from the repository root"""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def count_imports(args: List[str]) -> int:
+    """Number of modules imported by one run (from -X importtime)"""
+    stderr = run_once(args, importtime=True).stderr
+    return sum(1 for line in stderr.splitlines() if line.startswith("import time:") and "|" in line) - 1
+
+
+def measure(args: List[str], repeat: int) -> Dict[str, Any]:
+    """
+    Time repeated cold starts of one scenario
+
+    Args:
+        args: Interpreter arguments
+        repeat: Number of timed runs
+
+    Returns:
+        Metrics of the scenario
+    """
+    run_once(args)  # Warm the page cache and __pycache__
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_once(args)
+        samples.append(time.perf_counter() - started)
+
+    return {
+        "wall_s": statistics.median(samples),
+        "wall_min_s": min(samples),
+        "modules_imported": count_imports(args),
+    }
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark IGsaver command-line start-up")
+    parser.add_argument('-o', '--output', type=Path, default=Path("startup-results.json"),
+                        help='Results file (default: startup-results.json)')
+    parser.add_argument('-s', '--scenario', action='append', choices=list(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=20, help='Runs per scenario, median reported')
+    parsed = parser.parse_args(args)
+
+    results = {}
+    for scenario in parsed.scenario or list(SCENARIOS):
+        results[scenario] = measure(SCENARIOS[scenario], max(1, parsed.repeat))
+        print(f"  {scenario}: {results[scenario]['wall_s'] * 1000:.0f} ms, "
+              f"{results[scenario]['modules_imported']} modules", file=sys.stderr)
+
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": parsed.repeat,
+        },
+        "results": results,
+    }
+    parsed.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"Results written to {parsed.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,9 @@
 """Main application class"""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
 import instaloader
 
 from .config import Config
@@ -10,10 +11,22 @@ from .auth import Authenticator
 from .downloader import HighlightsDownloader
 from .stories_downloader import StoriesDownloader
 from .logger import Logger
+from .ui import UI
 from .exceptions import IGSaverException
 from .progress import ProgressTracker
 from .summary import BackupStats
 from .config_loader import ConfigLoader
+from .manifest import DownloadManifest
+from .async_engine import AsyncEngine
+from .transport import Transport, InstaloaderTransport
+from .rate_limiter import RateLimiter
+from .dedupe import BlobStore
+from .tracing import tracer
+from .metadata_cache import MetadataCache
+from .session_pool import PooledSession, SessionPool
+from .listing import HighlightListing
+from .watcher import StoryWatcher, WatchState
+from .storage import StorageBackend, open_storage
 from .constants import (
     DOWNLOAD_VIDEOS,
     DOWNLOAD_VIDEO_THUMBNAILS,
@@ -21,6 +34,9 @@ from .constants import (
     DOWNLOAD_COMMENTS,
     SAVE_METADATA,
     COMPRESS_JSON,
+    MANIFEST_FILENAME,
+    MANIFEST_PUBLISH_EVERY,
+    STORIES_BATCH_SIZE,
 )
 
 
@@ -33,7 +49,10 @@ class IGSaver:
         output_dir: Optional[Path] = None,
         skip_existing: bool = True,
         show_progress: bool = True,
-        config_file: Optional[Path] = None
+        config_file: Optional[Path] = None,
+        rebuild_manifest: bool = False,
+        transport: Optional[Transport] = None,
+        refresh_cache: bool = False
     ) -> None:
         """
         Initialize application
@@ -43,6 +62,11 @@ class IGSaver:
             output_dir: Custom output directory
             skip_existing: Enable incremental backup
             show_progress: Show progress bars
+            config_file: Optional path to config.yaml
+            rebuild_manifest: Re-import the download manifest from the backups tree
+            transport: Optional transport for the asyncio engine (replaces Instagram,
+                no authentication is performed)
+            refresh_cache: Ignore cached profile lookups and highlight listings
         """
         self.config = config or Config()
         
@@ -52,31 +76,42 @@ class IGSaver:
         # Override output directory if specified
         if output_dir:
             self.config._backup_dir = output_dir
-            output_dir.mkdir(parents=True, exist_ok=True)
         
+        self.skip_existing = skip_existing
         self.logger = Logger.get_logger()
         self.loader = self._create_loader()
-        self.authenticator = Authenticator(self.config, self.loader)
+        self.authenticator = Authenticator(
+            self.config,
+            self.loader,
+            verify_ttl=self.config_loader.sessions.verify_ttl_hours * 3600
+        )
         
         # Create progress tracker
         self.progress = ProgressTracker(disable=not show_progress)
         
-        # Create downloaders with progress and skip_existing
-        self.highlights_downloader = HighlightsDownloader(
-            self.config, 
-            self.loader,
-            progress=self.progress,
-            skip_existing=skip_existing
-        )
+        # Storage, manifest and caches of the backup root, opened by _open_backup()
+        self.rebuild_manifest = rebuild_manifest
+        self.refresh_cache = refresh_cache
+        self.storage: Optional[StorageBackend] = None
+        self.manifest: Optional[DownloadManifest] = None
+        self.blob_store: Optional[BlobStore] = None
+        self.metadata_cache: Optional[MetadataCache] = None
         
-        self.stories_downloader = StoriesDownloader(
-            self.config,
-            self.loader,
-            progress=self.progress,
-            skip_existing=skip_existing
+        # One limiter paces and retries requests of all downloaders
+        advanced = self.config_loader.advanced
+        self.rate_limiter = RateLimiter.from_delay(
+            advanced.delay_between_items,
+            burst=advanced.concurrent_downloads
         )
         
+        # Asyncio engine, used when configured or when a transport is injected
+        self.transport = transport
+        self.engine: Optional[AsyncEngine] = None
+        
         self.authenticated_username: Optional[str] = None
+        
+        # Additional logged-in accounts, loaded after authentication if enabled
+        self.session_pool: Optional[SessionPool] = None
     
     def _create_loader(self) -> instaloader.Instaloader:
         """
@@ -95,6 +130,152 @@ class IGSaver:
             dirname_pattern='{target}'
         )
     
+    def _create_downloader(
+        self,
+        downloader_class: type,
+        session: Optional[PooledSession] = None
+    ) -> Union[HighlightsDownloader, StoriesDownloader]:
+        """
+        Create a downloader sharing loader, manifest, caches and rate limiter
+        
+        Args:
+            downloader_class: HighlightsDownloader or StoriesDownloader
+            session: Pooled session to use instead of the primary login
+            
+        Returns:
+            Downloader instance
+        """
+        advanced = self.config_loader.advanced
+        return downloader_class(
+            self.config,
+            session.loader if session is not None else self.loader,
+            progress=self.progress,
+            skip_existing=self.skip_existing,
+            max_workers=advanced.concurrent_downloads,
+            manifest=self.manifest,
+            rate_limiter=session.rate_limiter if session is not None else self.rate_limiter,
+            max_retries=advanced.max_retries,
+            blob_store=self.blob_store,
+            cache=self.metadata_cache,
+            config_loader=self.config_loader,
+            storage=self.storage
+        )
+    
+    def _open_backup(self) -> None:
+        """
+        Set up the backup root for downloading (once, on first use)
+        
+        Nothing is created on disk before: the backup directory, the
+        download manifest and the metadata cache are opened here, and the
+        asyncio engine sharing them is created.
+        """
+        if self.manifest is not None:
+            return
+        
+        self.config.ensure_directories()
+        
+        # Storage backend (None: loose files in the backup root)
+        self.storage = open_storage(self.config.backup_dir, self.config_loader)
+        
+        # Open download manifest used for incremental skip checks
+        self.manifest = self._open_manifest(self.rebuild_manifest)
+        
+        # Content-addressed store shared by all downloaders, if enabled
+        if self.config_loader.output.dedupe and self.storage is not None:
+            self.logger.warning("output.dedupe needs loose files in local storage, ignored")
+        elif self.config_loader.output.dedupe:
+            self.blob_store = BlobStore(self.config.backup_dir)
+        
+        # Cached profile lookups and highlight listings
+        cache_config = self.config_loader.cache
+        if cache_config.enabled:
+            self.metadata_cache = MetadataCache(
+                self.config.backup_dir,
+                profile_ttl=cache_config.profile_ttl_hours * 3600,
+                highlights_ttl=cache_config.highlights_ttl_hours * 3600,
+                refresh=self.refresh_cache
+            )
+        
+        self._create_engine()
+    
+    def _create_engine(self) -> None:
+        """Create the asyncio engine if configured or a transport is injected"""
+        if self.transport is None and self.config_loader.advanced.engine != "async":
+            return
+        advanced = self.config_loader.advanced
+        self.engine = AsyncEngine(
+            self.config,
+            self.transport or InstaloaderTransport(self.loader),
+            progress=self.progress,
+            skip_existing=self.skip_existing,
+            max_workers=advanced.concurrent_downloads,
+            manifest=self.manifest,
+            rate_limiter=self.rate_limiter,
+            max_retries=advanced.max_retries,
+            blob_store=self.blob_store,
+            cache=self.metadata_cache,
+            config_loader=self.config_loader,
+            storage=self.storage
+        )
+        if self.session_pool is not None and self.transport is None:
+            self.engine.session_pool = self.session_pool
+    
+    def _open_manifest(self, rebuild: bool = False) -> DownloadManifest:
+        """
+        Open download manifest in the backup root
+        
+        A new manifest (or one being rebuilt) is filled once from the
+        existing backups tree so earlier downloads are still skipped.
+        
+        With a remote storage backend the manifest lives in the bucket: the
+        copy found there replaces the local one, a snapshot is uploaded back
+        every MANIFEST_PUBLISH_EVERY records and close() uploads the final one.
+        
+        Args:
+            rebuild: If True, discard entries and import the tree again
+            
+        Returns:
+            Download manifest
+        """
+        directory_exists = None
+        publish = None
+        if self.storage is not None:
+            directory_exists = self.storage.exists
+        if self.storage is not None and not self.storage.local:
+            path = self.config.backup_dir / MANIFEST_FILENAME
+            publish = lambda snapshot: self.storage.publish_file(snapshot, path)
+            self.config.backup_dir.mkdir(parents=True, exist_ok=True)
+            for stale in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+                stale.unlink(missing_ok=True)
+            if self.storage.fetch_file(path, path):
+                self.logger.info("Download manifest fetched from remote storage")
+        
+        manifest = DownloadManifest(self.config.backup_dir, directory_exists, publish, MANIFEST_PUBLISH_EVERY)
+        
+        if rebuild:
+            manifest.clear()
+        
+        if manifest.created or rebuild:
+            imported = manifest.import_tree()
+            if self.storage is not None:
+                imported += manifest.import_items(self.storage.stored_items())
+            if imported:
+                self.logger.info(f"Download manifest built from existing backups ({imported} items)")
+        
+        return manifest
+    
+    def close(self) -> None:
+        """Release resources held by the application"""
+        self.progress.close()
+        if self.manifest is not None:
+            self.manifest.close()
+        if self.storage is not None:
+            self.storage.close()
+            if not self.storage.local:
+                self.storage.publish_file(self.manifest.path, self.manifest.path)
+        if self.metadata_cache is not None:
+            self.metadata_cache.close()
+    
     def authenticate(self) -> None:
         """
         Authenticate user
@@ -107,6 +288,71 @@ class IGSaver:
         except IGSaverException as e:
             self.logger.error(f"Authentication failed: {e}")
             raise
+        
+        # Requests rejected because the session expired renew it and repeat
+        self.rate_limiter.session_refresher = self.authenticator.refresh_session
+        
+        if self.config_loader.sessions.pool:
+            self.session_pool = self._create_session_pool()
+            if self.engine is not None and self.transport is None:
+                self.engine.session_pool = self.session_pool
+    
+    def _create_session_pool(self) -> SessionPool:
+        """
+        Load the saved sessions of additional accounts into a pool
+        
+        The authenticated account comes first and keeps the shared rate
+        limiter; every other account gets its own limiter and thereby its
+        own request budget.
+        
+        Returns:
+            Session pool (containing at least the authenticated account)
+        """
+        sessions_config = self.config_loader.sessions
+        advanced = self.config_loader.advanced
+        sessions = [PooledSession(self.authenticated_username, self.loader, self.rate_limiter)]
+        
+        accounts = sessions_config.accounts or self.authenticator.saved_sessions()
+        for username in accounts:
+            if username == self.authenticated_username:
+                continue
+            loader = self._create_loader()
+            authenticator = Authenticator(self.config, loader)
+            if not authenticator.load_saved_session(username):
+                self.logger.warning(f"No usable saved session for {username}, not pooled")
+                continue
+            rate_limiter = RateLimiter.from_delay(advanced.delay_between_items, burst=advanced.concurrent_downloads)
+            # No password prompt for pooled accounts; unrenewable ones leave the pool
+            rate_limiter.session_refresher = (
+                lambda authenticator=authenticator: authenticator.refresh_session(interactive=False)
+            )
+            sessions.append(PooledSession(username, loader, rate_limiter))
+        
+        pool = SessionPool(sessions, quarantine=sessions_config.quarantine_minutes * 60)
+        self.logger.info(f"Session pool: {', '.join(pool.usernames)}")
+        if len(pool) > 1:
+            UI.print_info(f"Spreading requests over {len(pool)} accounts: {', '.join(pool.usernames)}")
+        return pool
+    
+    def _download_profile(self, downloader_class: type, username: str) -> BackupStats:
+        """
+        Back up one profile, on a pooled session if a pool is loaded
+        
+        Args:
+            downloader_class: HighlightsDownloader or StoriesDownloader
+            username: Instagram username
+            
+        Returns:
+            Backup statistics
+            
+        Raises:
+            IGSaverException: If download fails (on every session tried)
+        """
+        if self.session_pool is None:
+            return self._create_downloader(downloader_class).download(username)
+        return self.session_pool.run(
+            lambda session: self._create_downloader(downloader_class, session).download(username)
+        )
     
     def download_highlights(self, username: Optional[str] = None) -> BackupStats:
         """
@@ -126,8 +372,20 @@ class IGSaver:
         if not target_username:
             raise IGSaverException("No username specified for download")
         
+        self._open_backup()
+        
+        requests_before = self._request_counters()
+        phases_before = tracer.totals()
+        self.progress.throughput.reset()
+        
         try:
-            stats = self.highlights_downloader.download(target_username)
+            if self.engine is not None:
+                stats = self.engine.download_highlights(target_username)
+            else:
+                stats = self._download_profile(HighlightsDownloader, target_username)
+            self._record_requests(stats, requests_before)
+            stats.add_phases(tracer.totals_since(phases_before))
+            stats.peak_bytes_per_second = self.progress.throughput.peak
             self.progress.close()
             return stats
         except IGSaverException as e:
@@ -153,8 +411,20 @@ class IGSaver:
         if not target_username:
             raise IGSaverException("No username specified for download")
         
+        self._open_backup()
+        
+        requests_before = self._request_counters()
+        phases_before = tracer.totals()
+        self.progress.throughput.reset()
+        
         try:
-            stats = self.stories_downloader.download(target_username)
+            if self.engine is not None:
+                stats = self.engine.download_stories(target_username)
+            else:
+                stats = self._download_profile(StoriesDownloader, target_username)
+            self._record_requests(stats, requests_before)
+            stats.add_phases(tracer.totals_since(phases_before))
+            stats.peak_bytes_per_second = self.progress.throughput.peak
             self.progress.close()
             return stats
         except IGSaverException as e:
@@ -162,6 +432,116 @@ class IGSaver:
             self.progress.close()
             raise
     
+    def list_highlights(self, username: Optional[str] = None) -> Tuple[List[HighlightListing], int]:
+        """
+        Describe highlights of a user without downloading media
+        
+        Args:
+            username: Optional username to list (defaults to authenticated user)
+            
+        Returns:
+            Listing per highlight and the number of requests issued
+            
+        Raises:
+            IGSaverException: If profile or highlights cannot be listed
+        """
+        if self.transport is None:
+            self.authenticate()
+        
+        target_username = username or self.authenticated_username
+        if not target_username:
+            raise IGSaverException("No username specified for listing")
+        
+        # Real sizes and cached listings come from an existing backup only
+        if (self.config.backup_dir / MANIFEST_FILENAME).exists():
+            self._open_backup()
+        elif self.engine is None:
+            self._create_engine()
+        
+        requests_before = self._request_counters()
+        if self.engine is not None:
+            listings = self.engine.list_highlights(target_username)
+        elif self.session_pool is not None:
+            listings = self.session_pool.run(
+                lambda session: self._create_downloader(HighlightsDownloader, session).list_highlights(target_username)
+            )
+        else:
+            listings = self._create_downloader(HighlightsDownloader).list_highlights(target_username)
+        return listings, self._request_counters()[0] - requests_before[0]
+    
+    def watch(self, targets: List[str], once: bool = False) -> BackupStats:
+        """
+        Capture new stories of several profiles until interrupted
+        
+        Args:
+            targets: Usernames to watch
+            once: If True, check every profile once and return
+            
+        Returns:
+            Statistics of all captured stories
+            
+        Raises:
+            IGSaverException: If authentication fails or no targets are given
+        """
+        usernames = list(dict.fromkeys(target.strip().lstrip('@') for target in targets if target.strip()))
+        if not usernames:
+            raise IGSaverException("No profiles to watch")
+        
+        self.authenticate()
+        
+        # Long-running: progress bars would pile up in the log
+        self.progress.disable = True
+        
+        self._open_backup()
+        
+        checker = self._create_downloader(StoriesDownloader)
+        watch_config = self.config_loader.watch
+        state = WatchState(self.config.backup_dir)
+        watcher = StoryWatcher(
+            state,
+            resolve_userid=checker.resolve_userid,
+            reels_tray=checker.reels_tray,
+            latest_reels=checker.latest_reels,
+            capture=lambda username: self._download_profile(StoriesDownloader, username),
+            requests_made=lambda: self._request_counters()[0],
+            min_interval=watch_config.min_interval_minutes * 60,
+            max_interval=watch_config.max_interval_hours * 3600,
+            max_requests_per_hour=watch_config.max_requests_per_hour
+        )
+        
+        UI.print_info(f"Watching stories of {len(usernames)} profiles (Ctrl+C to stop)")
+        try:
+            return watcher.run(usernames, once)
+        finally:
+            state.close()
+    
+    def _request_counters(self) -> Tuple[int, int, int]:
+        """
+        Get current request counters of the rate limiters
+        
+        Returns:
+            (requests, throttled, retried), summed over pooled sessions
+        """
+        limiters = self.session_pool.rate_limiters if self.session_pool is not None else [self.rate_limiter]
+        return (
+            sum(limiter.request_count for limiter in limiters),
+            sum(limiter.throttle_count for limiter in limiters),
+            sum(limiter.retry_count for limiter in limiters),
+        )
+    
+    def _record_requests(self, stats: BackupStats, before: Tuple[int, int, int]) -> None:
+        """
+        Add requests issued since before to statistics
+        
+        Args:
+            stats: Backup statistics to update
+            before: Counters taken before the download started
+        """
+        after = self._request_counters()
+        stats.requests_made += after[0] - before[0]
+        stats.requests_throttled += after[1] - before[1]
+        stats.requests_retried += after[2] - before[2]
+    
     def run(self, target_username: Optional[str] = None, download_stories: bool = False) -> BackupStats:
         """
         Run complete backup process
@@ -176,9 +556,136 @@ class IGSaver:
         Raises:
             IGSaverException: If process fails
         """
-        self.authenticate()
+        if self.transport is None:
+            self.authenticate()
         
         if download_stories:
             return self.download_stories(target_username)
         else:
             return self.download_highlights(target_username)
+    
+    def run_batch(
+        self,
+        targets: List[str],
+        download_stories: bool = False,
+        parallelism: Optional[int] = None
+    ) -> Tuple[BackupStats, Dict[str, BackupStats]]:
+        """
+        Back up several profiles with a single authentication
+        
+        All profiles share the Instaloader session, manifest and rate
+        limiter; with a session pool, profiles are spread over the pooled
+        accounts. A profile that fails does not stop the others. Active
+        stories are fetched for up to STORIES_BATCH_SIZE profiles per request.
+        
+        Args:
+            targets: Usernames to back up
+            download_stories: If True, download active stories instead of highlights
+            parallelism: Number of profiles backed up at once (defaults to
+                advanced.profile_parallelism per pooled account)
+            
+        Returns:
+            Aggregated statistics and statistics per username
+            
+        Raises:
+            IGSaverException: If authentication fails or no targets are given
+        """
+        usernames = list(dict.fromkeys(target.strip().lstrip('@') for target in targets if target.strip()))
+        if not usernames:
+            raise IGSaverException("No profiles to back up")
+        
+        if self.transport is None:
+            self.authenticate()
+        
+        accounts = len(self.session_pool) if self.session_pool is not None else 1
+        parallelism = max(1, parallelism or self.config_loader.advanced.profile_parallelism * accounts)
+        
+        # Concurrent progress bars would overwrite each other
+        if parallelism > 1:
+            self.progress.disable = True
+        
+        self._open_backup()
+        
+        started = BackupStats()
+        requests_before = self._request_counters()
+        phases_before = tracer.totals()
+        self.progress.throughput.reset()
+        self.logger.info(f"Batch backup of {len(usernames)} profiles, {parallelism} at a time")
+        
+        if self.engine is not None:
+            per_profile = self.engine.download_many(usernames, download_stories, parallelism)
+        elif download_stories:
+            per_profile = self._backup_stories_batched(usernames, parallelism)
+        else:
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="igsaver-profile") as executor:
+                results = executor.map(lambda username: self._backup_profile(username, download_stories), usernames)
+                per_profile = dict(zip(usernames, results))
+        
+        self.progress.close()
+        
+        total = BackupStats.combine(per_profile.values())
+        total.start_time = started.start_time
+        self._record_requests(total, requests_before)
+        total.add_phases(tracer.totals_since(phases_before))
+        total.peak_bytes_per_second = self.progress.throughput.peak
+        total.finish()
+        return total, per_profile
+    
+    def _backup_stories_batched(self, usernames: List[str], parallelism: int) -> Dict[str, BackupStats]:
+        """
+        Back up active stories of a batch with one stories request per chunk
+        
+        Usernames are split into chunks of STORIES_BATCH_SIZE; each chunk is
+        fetched in a single request, on a pooled session if a pool is loaded.
+        
+        Args:
+            usernames: Instagram usernames
+            parallelism: Number of chunks backed up at once
+            
+        Returns:
+            Backup statistics per username (errors recorded instead of raised)
+        """
+        chunks = [usernames[i:i + STORIES_BATCH_SIZE] for i in range(0, len(usernames), STORIES_BATCH_SIZE)]
+        
+        def backup(chunk: List[str]) -> Dict[str, BackupStats]:
+            try:
+                if self.session_pool is None:
+                    return self._create_downloader(StoriesDownloader).download_many(chunk)
+                return self.session_pool.run(
+                    lambda session: self._create_downloader(StoriesDownloader, session).download_many(chunk)
+                )
+            except IGSaverException as e:
+                self.logger.error(f"Stories backup of {len(chunk)} profiles failed: {e}")
+                failed = {}
+                for username in chunk:
+                    failed[username] = BackupStats()
+                    failed[username].add_error(f"{username}: {e}")
+                    failed[username].finish()
+                return failed
+        
+        per_profile: Dict[str, BackupStats] = {}
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="igsaver-profile") as executor:
+            for result in executor.map(backup, chunks):
+                per_profile.update(result)
+        return per_profile
+    
+    def _backup_profile(self, username: str, download_stories: bool) -> BackupStats:
+        """
+        Back up one profile of a batch with its own downloader
+        
+        Args:
+            username: Instagram username
+            download_stories: If True, download active stories instead of highlights
+            
+        Returns:
+            Backup statistics (errors recorded instead of raised)
+        """
+        downloader_class = StoriesDownloader if download_stories else HighlightsDownloader
+        try:
+            return self._download_profile(downloader_class, username)
+        except IGSaverException as e:
+            self.logger.error(f"Backup of {username} failed: {e}")
+            stats = BackupStats()
+            stats.add_error(f"{username}: {e}")
+            stats.finish()
+            return stats
@@ -0,0 +1,572 @@
+"""Append-only tar archives (optionally compressed) with a SQLite member index"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+import tarfile
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .constants import ARCHIVE_INDEX_SUFFIX, ARCHIVE_SPOOL_BYTES, MEDIA_EXTENSIONS
+from .exceptions import ConfigurationError, DownloadError
+from .media_file import CHUNK_SIZE, write_atomic
+from .storage import MediaWriter, StorageBackend
+
+ARCHIVE_MODES = ("none", "profile", "highlight")
+ARCHIVE_EXTENSIONS = {"none": ".tar", "zstd": ".tar.zst", "gzip": ".tar.gz"}
+
+
+def _zstd():
+    """Import the optional zstandard module"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ConfigurationError("zstd archives need the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def compression_of(path: Path) -> str:
+    """
+    Get the compression of an archive from its file name
+
+    Args:
+        path: Archive path
+
+    Returns:
+        "zstd", "gzip" or "none"
+
+    Raises:
+        ConfigurationError: If the name has no archive extension
+    """
+    for compression, extension in ARCHIVE_EXTENSIONS.items():
+        if path.name.endswith(extension):
+            return compression
+    raise ConfigurationError(f"Not an archive: {path} (expected {', '.join(ARCHIVE_EXTENSIONS.values())})")
+
+
+def archive_root(path: Path) -> Path:
+    """
+    Get the directory an archive stands in for (its path without extension)
+
+    Args:
+        path: Archive path
+
+    Returns:
+        Directory path in the loose layout
+    """
+    return path.with_name(path.name[:-len(ARCHIVE_EXTENSIONS[compression_of(path)])])
+
+
+class _MemberSink:
+    """
+    Archive file as seen by the compressor of one member
+
+    Once detached (the member failed and was cut off), writes are dropped,
+    so a compressor finalized later cannot append a stray frame end.
+    """
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.file: Optional[BinaryIO] = file
+
+    def write(self, data: bytes) -> int:
+        if self.file is not None:
+            self.file.write(data)
+        return len(data)
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+
+    def detach(self) -> None:
+        self.file = None
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """Index entry of a file stored in an archive"""
+    name: str
+    offset: int
+    length: int
+    size: int
+    mtime: float
+
+
+class TarArchive:
+    """
+    Tar file that members are only ever appended to
+
+    Every member (header, data and padding) is written as one block, and
+    as one independent zstd or gzip frame when compressed, streamed from
+    its source without holding the whole block in memory; the result is
+    still a valid .tar/.tar.zst/.tar.gz for standard tools, since
+    decompressors concatenate frames. No end-of-archive marker is written,
+    so a later run keeps appending without rewriting anything.
+
+    The index next to the archive ("<archive>.idx") maps member names to
+    the offset and length of their block, so single members are read
+    without scanning. A member is indexed only after its block is written;
+    a block left behind by an interrupted run is cut off on open.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS members (
+            name   TEXT PRIMARY KEY,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            size   INTEGER NOT NULL,
+            mtime  REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: Path, create: bool = True, fsync: str = "none") -> None:
+        """
+        Open (or create) an archive and its index
+
+        Args:
+            path: Archive path; the extension selects the compression
+            create: If False, a missing archive or index is an error
+            fsync: "file" flushes the archive after every member,
+                "highlight" once on close, "none" never
+
+        Raises:
+            ConfigurationError: If the archive or its index does not exist
+                (create=False) or zstd support is missing
+        """
+        self.path = path
+        self.index_path = Path(str(path) + ARCHIVE_INDEX_SUFFIX)
+        self.compression = compression_of(path)
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        if not create and not (path.exists() and self.index_path.exists()):
+            raise ConfigurationError(f"Archive or index not found: {path}")
+        if self.compression == "zstd":
+            _zstd()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(self.SCHEMA)
+        self._file = open(path, 'ab' if create else 'rb')
+        if create:
+            self._repair()
+
+    def _repair(self) -> None:
+        """Cut off a block written after the last indexed member"""
+        end = self._conn.execute("SELECT COALESCE(MAX(offset + length), 0) FROM members").fetchone()[0]
+        size = self.path.stat().st_size
+        if size > end:
+            self.logger.warning(f"Dropping {size - end} unindexed bytes at the end of {self.path}")
+            self._file.truncate(end)
+        elif size < end:
+            self.logger.warning(f"{self.path} is shorter than its index, dropping missing members")
+            with self._conn:
+                self._conn.execute("DELETE FROM members WHERE offset + length > ?", (size,))
+
+    def append(self, name: str, data: bytes, mtime: float) -> None:
+        """
+        Add a file as the last member
+
+        A name stored before is shadowed: the index (and tar extraction)
+        keep the newest copy.
+
+        Args:
+            name: Member name (relative, "/" separated)
+            data: File content
+            mtime: Modification time (Unix time)
+        """
+        self.append_file(name, io.BytesIO(data), len(data), mtime)
+
+    def append_file(self, name: str, source: BinaryIO, size: int, mtime: float) -> None:
+        """
+        Add the content of a file object as the last member
+
+        The content is copied in chunks, through the compressor when
+        compressed, so a large member never sits in memory as a whole.
+
+        Args:
+            name: Member name (relative, "/" separated)
+            source: File object positioned at the start of the content
+            size: Number of bytes to copy from source
+            mtime: Modification time (Unix time)
+
+        Raises:
+            DownloadError: If source holds fewer than size bytes
+        """
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+        padding = tarfile.NUL * (-size % tarfile.BLOCKSIZE)
+
+        with self._lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            sink = _MemberSink(self._file)
+            try:
+                writer = self._compressor(sink, len(header) + size + len(padding))
+                writer.write(header)
+                remaining = size
+                while remaining:
+                    chunk = source.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise DownloadError(f"{name}: {size - remaining} of {size} bytes to archive")
+                    writer.write(chunk)
+                    remaining -= len(chunk)
+                writer.write(padding)
+                if writer is not sink:
+                    writer.close()
+                self._file.flush()
+            except BaseException:
+                # Members must follow each other without gaps
+                sink.detach()
+                self._file.flush()
+                self._file.truncate(offset)
+                raise
+            length = self._file.tell() - offset
+            if self.fsync == "file":
+                os.fsync(self._file.fileno())
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?)",
+                    (name, offset, length, size, mtime)
+                )
+
+    def read(self, member: ArchiveMember) -> bytes:
+        """
+        Read the content of a member
+
+        Args:
+            member: Index entry
+
+        Returns:
+            File content
+        """
+        with self._lock:
+            self._file.flush()
+            with open(self.path, 'rb') as f:
+                f.seek(member.offset)
+                stored = f.read(member.length)
+
+        with tarfile.open(fileobj=io.BytesIO(self._decompress(stored)), mode='r:') as tar:
+            info = tar.next()
+            if info is None:
+                raise DownloadError(f"Damaged member {member.name} in {self.path}")
+            return tar.extractfile(info).read()
+
+    def get(self, name: str) -> Optional[ArchiveMember]:
+        """Get the index entry of a member (None if not stored)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, offset, length, size, mtime FROM members WHERE name = ?", (name,)
+            ).fetchone()
+        return None if row is None else ArchiveMember(*row)
+
+    def members(self, prefix: str = "") -> List[ArchiveMember]:
+        """
+        List members, sorted by name
+
+        Args:
+            prefix: Only members whose name starts with this
+
+        Returns:
+            Index entries
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, offset, length, size, mtime FROM members "
+                "WHERE substr(name, 1, ?) = ? ORDER BY name",
+                (len(prefix), prefix)
+            ).fetchall()
+        return [ArchiveMember(*row) for row in rows]
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Check if any member name starts with prefix"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM members WHERE substr(name, 1, ?) = ? LIMIT 1", (len(prefix), prefix)
+            ).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        """Flush and close archive and index"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                if self.fsync != "none" and self._file.mode != 'rb':
+                    os.fsync(self._file.fileno())
+                self._file.close()
+            self._conn.close()
+
+    def _compressor(self, sink: _MemberSink, size: int):
+        """
+        Get a writer turning a member block into an independent frame
+
+        Args:
+            sink: Archive file the frame goes to
+            size: Length of the uncompressed block (recorded in the zstd frame)
+
+        Returns:
+            Writer to close after the block (sink itself when uncompressed)
+        """
+        if self.compression == "zstd":
+            return _zstd().ZstdCompressor().stream_writer(sink, size=size, closefd=False)
+        if self.compression == "gzip":
+            return gzip.GzipFile(filename='', mode='wb', fileobj=sink, mtime=0)
+        return sink
+
+    def _decompress(self, stored: bytes) -> bytes:
+        """Decompress the frame of a member block"""
+        if self.compression == "zstd":
+            return _zstd().ZstdDecompressor().decompress(stored)
+        if self.compression == "gzip":
+            return gzip.decompress(stored)
+        return stored
+
+
+class ArchiveMediaWriter(MediaWriter):
+    """
+    Media body collected until complete, then appended to its archive
+
+    Members of an archive are written one after the other, so bodies are
+    spooled (in memory, on disk past ARCHIVE_SPOOL_BYTES) while several
+    transfers run at once, then copied into the archive in chunks.
+    """
+
+    def __init__(self, storage: "ArchiveStorage", path: Path) -> None:
+        """
+        Initialize writer
+
+        Args:
+            storage: Backend the media is stored by
+            path: Path of the media file in the local layout
+        """
+        self.storage = storage
+        self.path = path
+        self.size = 0
+        self._spool = tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_BYTES)
+
+    def write(self, chunk: bytes) -> None:
+        self._spool.write(chunk)
+        self.size += len(chunk)
+
+    def finish(self, total: Optional[int], mtime: datetime) -> Tuple[Path, int]:
+        try:
+            if total is not None and self.size != total:
+                raise DownloadError(f"Incomplete download: {self.size} of {total} bytes")
+            self._spool.seek(0)
+            self.storage.append_file(self.path, self._spool, self.size, mtime.timestamp())
+        finally:
+            self._spool.close()
+        return self.path, self.size
+
+    def abort(self) -> None:
+        self._spool.close()
+
+
+class ArchiveStorage(StorageBackend):
+    """
+    Files appended to tar archives instead of written as loose files
+
+    mode "profile" keeps one archive per profile next to where its
+    directory would be ("<user>.tar.zst" holding "highlights/<title>/..."
+    and "stories/..."); mode "highlight" one archive per highlight
+    ("<user>/highlights/<title>.tar.zst") plus one for stories.
+    """
+
+    def __init__(self, backup_dir: Path, mode: str = "profile", compression: str = "zstd", fsync: str = "highlight") -> None:
+        """
+        Initialize backend
+
+        Args:
+            backup_dir: Backup root
+            mode: "profile" or "highlight"
+            compression: "zstd", "gzip" or "none"
+            fsync: fsync policy applied to the archives
+
+        Raises:
+            ConfigurationError: If mode or compression is unknown
+        """
+        if mode not in ARCHIVE_MODES[1:]:
+            raise ConfigurationError(f"Unknown archive mode '{mode}', expected one of {', '.join(ARCHIVE_MODES)}")
+        if compression not in ARCHIVE_EXTENSIONS:
+            raise ConfigurationError(
+                f"Unknown archive compression '{compression}', expected one of {', '.join(ARCHIVE_EXTENSIONS)}"
+            )
+        if compression == "zstd":
+            _zstd()
+
+        self.backup_dir = backup_dir
+        self.mode = mode
+        self.extension = ARCHIVE_EXTENSIONS[compression]
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+        self._archives: Dict[Path, TarArchive] = {}
+        self._lock = threading.Lock()
+
+    def locate(self, path: Path) -> Tuple[Path, str]:
+        """
+        Get archive and member name of a file in the local layout
+
+        Args:
+            path: File path under the backup root
+
+        Returns:
+            (archive path, member name)
+        """
+        parts = path.relative_to(self.backup_dir).parts
+        if self.mode == "profile":
+            return self.backup_dir / (parts[0] + self.extension), '/'.join(parts[1:])
+        return Path(str(path.parent) + self.extension), path.name
+
+    def open_media(self, filename: str, extension: str, start: int, url: str) -> MediaWriter:
+        if start:
+            raise DownloadError(f"Server resumed at byte {start}, expected 0")
+        return ArchiveMediaWriter(self, Path(filename + extension))
+
+    def write_file(self, path: Path, data: bytes) -> Path:
+        self.append(path, data, datetime.now().timestamp())
+        return path
+
+    def append(self, path: Path, data: bytes, mtime: float) -> None:
+        """
+        Store a file of the local layout in its archive
+
+        Args:
+            path: File path under the backup root
+            data: File content
+            mtime: Modification time (Unix time)
+        """
+        archive_path, name = self.locate(path)
+        self._archive(archive_path, create=True).append(name, data, mtime)
+
+    def append_file(self, path: Path, source: BinaryIO, size: int, mtime: float) -> None:
+        """
+        Store the content of a file object in its archive, in chunks
+
+        Args:
+            path: File path under the backup root
+            source: File object positioned at the start of the content
+            size: Number of bytes to copy from source
+            mtime: Modification time (Unix time)
+        """
+        archive_path, name = self.locate(path)
+        self._archive(archive_path, create=True).append_file(name, source, size, mtime)
+
+    def exists(self, path: Path) -> bool:
+        archive_path, name = self.locate(path)
+        archive = self._archive(archive_path, create=False)
+        if archive is not None and archive.get(name) is not None:
+            return True
+
+        # Directory: members below it in the profile archive, its own archive per highlight
+        if self.mode == "profile":
+            archive_path, prefix = self.locate(path / "_")
+            archive = self._archive(archive_path, create=False)
+            return archive is not None and archive.has_prefix(prefix[:-1])
+        archive = self._archive(Path(str(path) + self.extension), create=False)
+        return archive is not None and archive.has_prefix("")
+
+    def stored_items(self) -> Iterator[Tuple[str, Path, int, bool]]:
+        """
+        Find downloaded items in the archives under the backup root
+
+        Items are identified through their JSON sidecar member, like
+        DownloadManifest.import_tree does for loose files.
+
+        Yields:
+            (media_id, media_file, size, is_video) per item
+        """
+        for archive_path in sorted(self.backup_dir.rglob(f"*{self.extension}")):
+            if not Path(str(archive_path) + ARCHIVE_INDEX_SUFFIX).exists():
+                continue
+            archive = self._archive(archive_path, create=True)
+            root = archive_root(archive_path)
+            members = {member.name: member for member in archive.members()}
+            for name, member in members.items():
+                if not name.endswith(".json"):
+                    continue
+                stem = name[:-len(".json")]
+                media = next((members[stem + ext] for ext in MEDIA_EXTENSIONS if stem + ext in members), None)
+                if media is None:
+                    continue
+                try:
+                    node = json.loads(archive.read(member))["node"]
+                    yield str(node["id"]), root / media.name, media.size, bool(node.get("is_video"))
+                except (ValueError, KeyError, TypeError) as e:
+                    self.logger.debug(f"Ignoring sidecar {name} in {archive_path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            archives, self._archives = self._archives, {}
+        for archive in archives.values():
+            archive.close()
+
+    def _archive(self, path: Path, create: bool) -> Optional[TarArchive]:
+        """
+        Get an open archive
+
+        Args:
+            path: Archive path
+            create: If False, return None instead of creating a missing archive
+
+        Returns:
+            TarArchive, or None
+        """
+        with self._lock:
+            archive = self._archives.get(path)
+            if archive is None:
+                if not create and not path.exists():
+                    return None
+                archive = TarArchive(path, fsync=self.fsync)
+                self._archives[path] = archive
+            return archive
+
+
+def extract(archive: TarArchive, target_dir: Path, names: Optional[List[str]] = None) -> int:
+    """
+    Restore members of an archive as loose files
+
+    Args:
+        archive: Archive to read
+        target_dir: Directory the member names are resolved against
+        names: Members or directory prefixes to extract (None: all)
+
+    Returns:
+        Number of extracted files
+
+    Raises:
+        ConfigurationError: If a requested name matches no member, or a
+            member name points outside target_dir
+    """
+    if names:
+        members: Dict[str, ArchiveMember] = {}
+        for name in names:
+            found = archive.get(name)
+            matches = [found] if found is not None else archive.members(name.rstrip('/') + '/')
+            if not matches:
+                raise ConfigurationError(f"Not in {archive.path.name}: {name}")
+            members.update((member.name, member) for member in matches)
+        selected = list(members.values())
+    else:
+        selected = archive.members()
+
+    root = target_dir.resolve()
+    for member in selected:
+        path = (root / member.name).resolve()
+        if root not in path.parents:
+            raise ConfigurationError(f"Refusing to extract {member.name} outside {target_dir}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, archive.read(member))
+        os.utime(path, (datetime.now().timestamp(), member.mtime))
+    return len(selected)
@@ -0,0 +1,961 @@
+"""Asyncio download engine running metadata and media transfers on one event loop"""
+
+import asyncio
+import copy
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .config import Config
+from .config_loader import ConfigLoader
+from .constants import STORIES_BATCH_SIZE
+from .dedupe import BlobStore
+from .downloader import HighlightProgress
+from .exceptions import DownloadError, IGSaverException, ProfileError
+from .listing import HighlightListing, SizeEstimator
+from .manifest import DownloadManifest
+from .media_file import FileSyncer, TargetNames, media_extension
+from .progress import ProgressTracker
+from .rate_limiter import RateLimiter
+from .summary import BackupStats
+from .tracing import tracer
+from .metadata_cache import MetadataCache
+from .session_pool import PooledSession, SessionPool
+from .size_filter import SizeFilter
+from .storage import LocalStorage, StorageBackend
+from .transport import HighlightInfo, InstaloaderTransport, MediaInfo, ProfileInfo, Transport
+from .ui import UI
+
+
+class HighlightItemBatcher:
+    """
+    Coalesce item listings of highlights into batched transport calls
+
+    Listings asked for during the same event loop iteration are sent
+    together, batch_size highlights per call; each caller gets the items
+    of its own highlight.
+    """
+
+    def __init__(
+        self,
+        list_many: Callable[[List[HighlightInfo]], Awaitable[Dict[int, List[MediaInfo]]]],
+        batch_size: int
+    ) -> None:
+        """
+        Initialize batcher
+
+        Args:
+            list_many: Coroutine function listing items of several highlights
+            batch_size: Highlights per call
+        """
+        self.list_many = list_many
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Tuple[HighlightInfo, asyncio.Future]] = []
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def items(self, highlight: HighlightInfo) -> List[MediaInfo]:
+        """
+        List the items of one highlight as part of a batch
+
+        Args:
+            highlight: Highlight listing entry
+
+        Returns:
+            Items of the highlight
+
+        Raises:
+            DownloadError: If the highlight is missing from the response
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((highlight, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif not self._scheduled:
+            # Callers of this iteration join first, the rest is sent once they did
+            self._scheduled = True
+            loop.call_soon(self._flush_scheduled)
+        return await future
+
+    def _flush_scheduled(self) -> None:
+        """Send what is pending at the end of a loop iteration"""
+        self._scheduled = False
+        self._flush()
+
+    def _flush(self) -> None:
+        """Send pending listings, batch_size at a time"""
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            task = asyncio.ensure_future(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: List[Tuple[HighlightInfo, asyncio.Future]]) -> None:
+        """List one batch and resolve its callers"""
+        try:
+            reels = await self.list_many([highlight for highlight, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for highlight, future in batch:
+            if future.done():
+                continue
+            if highlight.highlight_id in reels:
+                future.set_result(reels[highlight.highlight_id])
+            else:
+                future.set_exception(DownloadError(f"No items returned for highlight '{highlight.title}'"))
+
+
+class AsyncEngine:
+    """
+    Back up highlights and stories with coroutines instead of threads
+
+    Produces the same directory layout, "downloaded"/"skipped"/"failed"
+    item results and BackupStats as HighlightsDownloader/StoriesDownloader.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        transport: Transport,
+        progress: Optional[ProgressTracker] = None,
+        skip_existing: bool = True,
+        max_workers: int = 1,
+        manifest: Optional[DownloadManifest] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0,
+        blob_store: Optional[BlobStore] = None,
+        cache: Optional[MetadataCache] = None,
+        session_pool: Optional[SessionPool] = None,
+        config_loader: Optional[ConfigLoader] = None,
+        storage: Optional[StorageBackend] = None
+    ) -> None:
+        """
+        Initialize engine
+
+        Args:
+            config: Application configuration
+            transport: Source of metadata and media
+            progress: Optional progress tracker
+            skip_existing: If True, skip already downloaded files
+            max_workers: Number of media transfers running at once
+            manifest: Optional download manifest used for skip checks
+            rate_limiter: Optional limiter shared by all downloaders
+            max_retries: Retries per request after a failed attempt
+            blob_store: Optional store deduplicating downloaded media
+            cache: Optional cache of profile lookups and highlight listings
+            session_pool: Optional pool of Instagram sessions profiles are
+                spread over (replaces transport and rate_limiter per profile)
+            config_loader: Optional configuration whose date/type/size filters
+                items must pass before their media is requested
+            storage: Optional backend receiving files (default: local filesystem)
+        """
+        self.config = config
+        self.transport = transport
+        self.progress = progress or ProgressTracker()
+        self.skip_existing = skip_existing
+        self.max_workers = max(1, int(max_workers or 1))
+        self.manifest = manifest
+        self.rate_limiter = rate_limiter or RateLimiter(None)
+        self.max_retries = max_retries
+        self.blob_store = blob_store
+        self.cache = cache
+        self.session_pool = session_pool
+        self.config_loader = config_loader
+        self.size_filter = SizeFilter.from_config(config_loader.filters, cache) if config_loader else None
+        self.batch_size = max(1, int(config_loader.advanced.highlight_batch_size)) if config_loader else 1
+        self.syncer = FileSyncer(config_loader.output.fsync) if config_loader else FileSyncer()
+        self.storage = storage or LocalStorage(self.syncer)
+        self.names = TargetNames(manifest.owner if manifest is not None else None)
+        self.logger = logging.getLogger(__name__)
+
+    def download_highlights(self, username: str) -> BackupStats:
+        """
+        Download all highlights for a user (blocking wrapper)
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Backup statistics
+        """
+        return asyncio.run(self._run(self.backup_profile(username)))
+
+    def download_stories(self, username: str) -> BackupStats:
+        """
+        Download active stories for a user (blocking wrapper)
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Backup statistics
+        """
+        return asyncio.run(self._run(self.backup_profile(username, download_stories=True)))
+
+    def list_highlights(self, username: str) -> List[HighlightListing]:
+        """
+        Describe all highlights of a user without downloading media (blocking wrapper)
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Listing per highlight, in profile order
+        """
+        return asyncio.run(self._run(self.list_profile(username)))
+
+    def download_many(
+        self,
+        usernames: List[str],
+        download_stories: bool = False,
+        parallelism: int = 1
+    ) -> Dict[str, BackupStats]:
+        """
+        Back up several profiles on one event loop (blocking wrapper)
+        
+        Args:
+            usernames: Instagram usernames
+            download_stories: If True, download active stories instead of highlights
+            parallelism: Number of profiles backed up at once
+            
+        Returns:
+            Backup statistics per username
+        """
+        return asyncio.run(self._run(self.backup_many(usernames, download_stories, parallelism)))
+
+    async def backup_many(
+        self,
+        usernames: List[str],
+        download_stories: bool = False,
+        parallelism: int = 1
+    ) -> Dict[str, BackupStats]:
+        """
+        Back up several profiles concurrently
+
+        A profile that cannot be backed up is reported in its statistics
+        and does not stop the others. Stories are listed in batches, see
+        backup_stories_many().
+
+        Args:
+            usernames: Instagram usernames
+            download_stories: If True, download active stories instead of highlights
+            parallelism: Number of profiles backed up at once
+
+        Returns:
+            Backup statistics per username
+        """
+        if download_stories:
+            return await self.backup_stories_many(usernames, parallelism)
+
+        semaphore = asyncio.Semaphore(max(1, parallelism))
+
+        async def backup(username: str) -> BackupStats:
+            async with semaphore:
+                try:
+                    return await self.backup_profile(username, download_stories)
+                except IGSaverException as e:
+                    self.logger.error(f"Backup of {username} failed: {e}")
+                    return self._failed(username, e)
+
+        results = await asyncio.gather(*(backup(username) for username in usernames))
+        return dict(zip(usernames, results))
+
+    async def backup_profile(self, username: str, download_stories: bool = False) -> BackupStats:
+        """
+        Back up one profile, on a pooled session if a pool is set
+
+        Args:
+            username: Instagram username
+            download_stories: If True, download active stories instead of highlights
+
+        Returns:
+            Backup statistics
+
+        Raises:
+            IGSaverException: If backup fails (on every session tried)
+        """
+        if self.session_pool is None:
+            if download_stories:
+                return await self.backup_stories(username)
+            return await self.backup_highlights(username)
+
+        return await self.session_pool.run_async(
+            lambda session: self._for_session(session).backup_profile(username, download_stories)
+        )
+
+    async def list_profile(self, username: str) -> List[HighlightListing]:
+        """
+        Describe all highlights of a user, on a pooled session if a pool is set
+
+        Item listings of all highlights are requested concurrently, in
+        batches of highlight_batch_size; media is never fetched.
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Listing per highlight, in profile order
+
+        Raises:
+            ProfileError: If profile cannot be accessed
+            DownloadError: If the highlights cannot be listed
+        """
+        if self.session_pool is not None:
+            return await self.session_pool.run_async(
+                lambda session: self._for_session(session).list_profile(username)
+            )
+
+        try:
+            profile = await self._get_profile(username)
+            highlights = await self._list_highlights(profile)
+        except IGSaverException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Listing error: {e}")
+            raise DownloadError(f"Listing error: {e}")
+
+        estimator = SizeEstimator(self.manifest)
+        batcher = self._item_batcher()
+
+        async def describe(highlight: HighlightInfo) -> HighlightListing:
+            try:
+                items = await batcher.items(highlight)
+            except Exception as e:
+                self.logger.error(f"Cannot access items in highlight '{highlight.title}': {e}")
+                return HighlightListing(highlight.highlight_id, highlight.title, error=str(e))
+            return estimator.summarize(
+                highlight.highlight_id, highlight.title, items,
+                self.config.backup_dir / username / "highlights" / highlight.title
+            )
+
+        return list(await asyncio.gather(*(describe(highlight) for highlight in highlights)))
+
+    def _item_batcher(self) -> HighlightItemBatcher:
+        """
+        Create a batcher listing highlight items through the rate limiter
+
+        Returns:
+            Batcher sending highlight_batch_size highlights per request
+        """
+        async def list_many(highlights: List[HighlightInfo]) -> Dict[int, List[MediaInfo]]:
+            with tracer.span("items", highlights=len(highlights)):
+                return await self.rate_limiter.call_async(
+                    lambda: self.transport.list_highlight_items_many(highlights), self.max_retries
+                )
+
+        return HighlightItemBatcher(list_many, self.batch_size)
+
+    def _for_session(self, session: PooledSession) -> "AsyncEngine":
+        """
+        Copy of this engine talking through a pooled session
+
+        Args:
+            session: Pooled session
+
+        Returns:
+            Engine using the session's loader and rate limiter
+        """
+        engine = copy.copy(self)
+        engine.transport = InstaloaderTransport(session.loader)
+        engine.rate_limiter = session.rate_limiter
+        engine.session_pool = None
+        return engine
+
+    async def _run(self, coro):
+        """Await a backup coroutine and close the transport afterwards"""
+        try:
+            return await coro
+        finally:
+            await self.transport.close()
+
+    async def backup_highlights(self, username: str) -> BackupStats:
+        """
+        Download all highlights for a user
+
+        Item listings of all highlights are requested concurrently, in
+        batches of highlight_batch_size, and media transfers start as soon
+        as the first batch arrives.
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Backup statistics
+
+        Raises:
+            ProfileError: If profile cannot be accessed
+            DownloadError: If download fails
+        """
+        stats = BackupStats()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        try:
+            profile = await self._get_profile(username)
+            UI.print_info(f"Downloading highlights from {profile.username}...")
+            highlights = await self._list_highlights(profile)
+            stats.highlights_found = len(highlights)
+
+            if not highlights:
+                UI.print_warning(f"No highlights found for {username}")
+                stats.finish()
+                return stats
+
+            pbar = self.progress.create_bar(total=0, desc="Downloading items", unit="item")
+            batcher = self._item_batcher()
+            await asyncio.gather(*(
+                self._backup_highlight(username, profile.userid, highlight, stats, semaphore, batcher)
+                for highlight in highlights
+            ))
+            pbar.close()
+
+            stats.finish()
+            return stats
+
+        except IGSaverException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Download error: {e}")
+            raise DownloadError(f"Download error: {e}")
+
+    async def backup_stories(self, username: str) -> BackupStats:
+        """
+        Download all active stories for a user
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Backup statistics
+
+        Raises:
+            ProfileError: If profile cannot be accessed
+            DownloadError: If download fails
+        """
+        try:
+            profile = await self._get_profile(username)
+            UI.print_info(f"Fetching active stories from {username}...")
+            with tracer.span("stories", username=username):
+                items = await self.rate_limiter.call_async(
+                    lambda: self.transport.list_story_items(profile), self.max_retries
+                )
+            return await self._download_stories(username, items, asyncio.Semaphore(self.max_workers))
+
+        except IGSaverException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Download error: {e}")
+            raise DownloadError(f"Download error: {e}")
+
+    async def backup_stories_many(self, usernames: List[str], parallelism: int = 1) -> Dict[str, BackupStats]:
+        """
+        Download active stories of several users with batched story requests
+
+        Usernames are split into chunks of STORIES_BATCH_SIZE; the stories of
+        each chunk are listed in one transport call, on a pooled session if
+        a pool is set. A profile that fails does not stop the others.
+
+        Args:
+            usernames: Instagram usernames
+            parallelism: Number of chunks backed up at once
+
+        Returns:
+            Backup statistics per username
+        """
+        chunks = [usernames[i:i + STORIES_BATCH_SIZE] for i in range(0, len(usernames), STORIES_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(max(1, parallelism))
+
+        async def backup(chunk: List[str]) -> Dict[str, BackupStats]:
+            async with semaphore:
+                try:
+                    if self.session_pool is None:
+                        return await self._backup_story_chunk(chunk)
+                    return await self.session_pool.run_async(
+                        lambda session: self._for_session(session)._backup_story_chunk(chunk)
+                    )
+                except IGSaverException as e:
+                    self.logger.error(f"Stories backup of {len(chunk)} profiles failed: {e}")
+                    return {username: self._failed(username, e) for username in chunk}
+
+        per_profile: Dict[str, BackupStats] = {}
+        for result in await asyncio.gather(*(backup(chunk) for chunk in chunks)):
+            per_profile.update(result)
+        return per_profile
+
+    async def _backup_story_chunk(self, usernames: List[str]) -> Dict[str, BackupStats]:
+        """
+        Download active stories of up to STORIES_BATCH_SIZE users
+
+        Args:
+            usernames: Instagram usernames
+
+        Returns:
+            Backup statistics per username
+
+        Raises:
+            DownloadError: If the stories cannot be listed
+        """
+        per_user: Dict[str, BackupStats] = {}
+        profiles: List[ProfileInfo] = []
+
+        async def resolve(username: str) -> Optional[ProfileInfo]:
+            try:
+                return await self._get_profile(username)
+            except IGSaverException as e:
+                self.logger.error(f"Backup of {username} failed: {e}")
+                per_user[username] = self._failed(username, e)
+                return None
+
+        for username, profile in zip(usernames, await asyncio.gather(*(resolve(u) for u in usernames))):
+            if profile is not None:
+                profiles.append(profile)
+
+        reels: Dict[int, List[MediaInfo]] = {}
+        try:
+            if profiles:
+                with tracer.span("stories", profiles=len(profiles)):
+                    reels = await self.rate_limiter.call_async(
+                        lambda: self.transport.list_stories(profiles), self.max_retries
+                    )
+        except IGSaverException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error getting stories: {e}")
+            raise DownloadError(f"Could not fetch stories: {e}")
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+        names = [username for username in usernames if username not in per_user]
+
+        async def download(username: str, profile: ProfileInfo) -> BackupStats:
+            try:
+                return await self._download_stories(username, reels.get(profile.userid, []), semaphore)
+            except Exception as e:
+                self.logger.error(f"Backup of {username} failed: {e}")
+                return self._failed(username, e)
+
+        results = await asyncio.gather(*(
+            download(username, profile) for username, profile in zip(names, profiles)
+        ))
+        per_user.update(zip(names, results))
+        return {username: per_user[username] for username in usernames}
+
+    async def _download_stories(
+        self,
+        username: str,
+        items: List[MediaInfo],
+        semaphore: asyncio.Semaphore
+    ) -> BackupStats:
+        """
+        Filter and download listed story items of a user
+
+        Args:
+            username: Instagram username
+            items: Active story items
+            semaphore: Bounds concurrent media transfers
+
+        Returns:
+            Backup statistics
+        """
+        stats = BackupStats()
+        story_dir = self.config.backup_dir / username / "stories"
+        self._register(items, story_dir)
+        if self.config_loader is not None:
+            items = list(self.config_loader.filter_items(items, stats.add_filtered))
+            if self.size_filter is not None:
+                items = await self.size_filter.select_async(
+                    items,
+                    lambda item: item.media_id,
+                    lambda item: self._probe(item, story_dir),
+                    stats.add_filtered
+                )
+            if not items and stats.items_filtered > 0:
+                UI.print_info(f"All {stats.items_filtered} active stories filtered out")
+                stats.finish()
+                return stats
+
+        if not items:
+            UI.print_warning(f"No active stories found for {username}")
+            stats.finish()
+            return stats
+
+        await self._store(self.storage.makedirs, story_dir)
+        self.progress.write(f"\n📱 Active Stories")
+
+        pbar = self.progress.create_bar(total=len(items), desc="Downloading stories", unit="item")
+        stats.items_total += len(items)
+        results = await asyncio.gather(*(
+            self._download_item(item, story_dir, semaphore) for item in items
+        ))
+        for result, size in results:
+            self._count(stats, result, size)
+        pbar.close()
+        await asyncio.to_thread(self.syncer.flush, story_dir)
+
+        self.progress.write(f"  ✓ Downloaded {stats.items_downloaded} items")
+        stats.finish()
+        return stats
+
+    async def _get_profile(self, username: str) -> ProfileInfo:
+        """
+        Look up profile through the transport
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Profile metadata
+        """
+        if self.cache is not None:
+            node = self.cache.get_profile(username)
+            if node is not None:
+                self.logger.info(f"Using cached profile: {username}")
+                return ProfileInfo(node['username'], int(node['id']), bool(node.get('is_private')))
+
+        UI.print_info(f"\nFetching profile for {username}...")
+        self.logger.info(f"Fetching profile: {username}")
+        try:
+            with tracer.span("profile", username=username):
+                profile = await self.rate_limiter.call_async(
+                    lambda: self.transport.get_profile(username), self.max_retries
+                )
+        except ProfileError:
+            if self.cache is not None:
+                self.cache.invalidate_profile(username)
+            raise
+
+        if self.cache is not None:
+            self.cache.put_profile(username, {
+                'id': str(profile.userid),
+                'username': profile.username,
+                'is_private': profile.is_private,
+            })
+        return profile
+
+    async def _list_highlights(self, profile: ProfileInfo) -> List[HighlightInfo]:
+        """
+        List highlight reels, from the cache when possible
+
+        Args:
+            profile: Profile metadata
+
+        Returns:
+            Highlight listing entries
+        """
+        if self.cache is not None:
+            nodes = self.cache.get_highlights(profile.userid)
+            if nodes is not None:
+                self.logger.info(f"Using cached highlight listing for {profile.username}")
+                return [HighlightInfo.from_node(node) for node in nodes]
+
+        with tracer.span("highlights", username=profile.username):
+            highlights = await self.rate_limiter.call_async(
+                lambda: self.transport.list_highlights(profile), self.max_retries
+            )
+
+        if self.cache is not None:
+            self.cache.put_highlights(profile.userid, [highlight.to_node() for highlight in highlights])
+        return highlights
+
+    async def _backup_highlight(
+        self,
+        username: str,
+        userid: int,
+        highlight: HighlightInfo,
+        stats: BackupStats,
+        semaphore: asyncio.Semaphore,
+        batcher: HighlightItemBatcher
+    ) -> None:
+        """
+        List and download the items of one highlight
+
+        Highlights unchanged since their last complete backup are skipped
+        without listing their items.
+
+        Args:
+            username: Instagram username
+            userid: Instagram user id of the owner
+            highlight: Highlight listing entry
+            stats: Statistics to update
+            semaphore: Bounds concurrent media transfers
+            batcher: Lists the items together with other highlights
+        """
+        progress = HighlightProgress(title=highlight.title)
+        highlight_dir = self.config.backup_dir / username / "highlights" / highlight.title
+
+        if (
+            self.skip_existing
+            and self.manifest is not None
+            and await self._store(
+                self.manifest.is_highlight_unchanged, highlight.highlight_id, highlight_dir, highlight.state
+            )
+        ):
+            self.logger.info(f"Highlight '{highlight.title}' unchanged since last backup")
+            stats.highlights_skipped += 1
+            stats.highlights_unchanged += 1
+            self.progress.write(f"📁 {highlight.title}  ⊘ Unchanged since last backup")
+            return
+
+        latest = highlight.state.latest_media
+        if (
+            self.config_loader is not None
+            and latest is not None
+            and self.config_loader.is_before_date_window(datetime.utcfromtimestamp(latest))
+        ):
+            self.logger.info(f"Highlight '{highlight.title}' has no items after min_date")
+            stats.highlights_skipped += 1
+            stats.add_filtered(highlight.state.item_count or 0)
+            self.progress.write(f"📁 {highlight.title}  ⊘ No items after min_date")
+            return
+
+        try:
+            items = await batcher.items(highlight)
+        except Exception as e:
+            self.logger.error(f"Cannot access items in highlight '{highlight.title}': {e}")
+            progress.error = str(e)
+            stats.add_error(f"Highlight '{highlight.title}': {str(e)[:50]}")
+            items = []
+
+            # A cached listing may still name a removed highlight
+            if self.cache is not None:
+                self.cache.invalidate_highlights(userid)
+
+        self._register(items, highlight_dir)
+        if self.config_loader is not None:
+            def count_filtered(count: int) -> None:
+                progress.filtered += count
+                stats.add_filtered(count)
+
+            items = list(self.config_loader.filter_items(items, count_filtered))
+            if self.size_filter is not None:
+                items = await self.size_filter.select_async(
+                    items,
+                    lambda item: item.media_id,
+                    lambda item: self._probe(item, highlight_dir),
+                    count_filtered
+                )
+
+        progress.queued = len(items)
+        progress.listed = True
+        stats.items_total += len(items)
+        self.progress.add_total(len(items))
+        await self._store(self.storage.makedirs, highlight_dir)
+
+        results = await asyncio.gather(*(
+            self._download_item(item, highlight_dir, semaphore) for item in items
+        ))
+        for result, size in results:
+            self._count(stats, result, size)
+            if result == "failed":
+                progress.failed += 1
+            else:
+                progress.succeeded += 1
+
+        # Files must be on disk before the highlight is recorded as backed up
+        await asyncio.to_thread(self.syncer.flush, highlight_dir)
+
+        result = progress.result
+        if result == "downloaded":
+            stats.highlights_downloaded += 1
+        elif result == "skipped":
+            stats.highlights_skipped += 1
+        else:
+            stats.highlights_failed += 1
+
+        if result != "failed" and progress.filtered == 0 and self.manifest is not None:
+            self.manifest.record_highlight(highlight.highlight_id, highlight_dir, highlight.state)
+
+        if progress.error is not None:
+            self.progress.write(f"📁 {highlight.title}  ⚠  No accessible items (may be expired)")
+        elif items:
+            filtered = f", {progress.filtered} filtered out" if progress.filtered else ""
+            self.progress.write(
+                f"📁 {highlight.title}  ✓ {progress.succeeded} items, {progress.failed} failed{filtered}"
+            )
+        elif progress.filtered > 0:
+            self.progress.write(f"📁 {highlight.title}  ⊘ {progress.filtered} items filtered out")
+        else:
+            self.progress.write(f"📁 {highlight.title}  ⚠  No items found")
+
+    async def _download_item(
+        self,
+        item: MediaInfo,
+        target_dir: Path,
+        semaphore: asyncio.Semaphore
+    ) -> Tuple[str, int]:
+        """
+        Download a single item
+
+        Args:
+            item: Item metadata
+            target_dir: Target directory
+            semaphore: Bounds concurrent media transfers
+
+        Returns:
+            (status, size): status is "downloaded", "skipped", or "failed",
+            size the number of bytes of the media file written
+        """
+        try:
+            if self.skip_existing and self._already_downloaded(item, target_dir):
+                return "skipped", 0
+
+            async with semaphore:
+                with tracer.span("item", media_id=item.media_id):
+                    filename = self.names.resolve(self._target_name(item, target_dir), item.media_id)
+                    url = item.video_url if item.is_video else item.url
+                    media_file, size = await self.rate_limiter.call_async(
+                        lambda: self._fetch(filename, url, item), self.max_retries
+                    )
+
+                    with tracer.span("write"):
+                        sidecar = {'node': item.node, 'instaloader': {'node_type': 'StoryItem'}}
+                        await self._store(
+                            self.storage.write_file, Path(filename + '.json'), json.dumps(sidecar, indent=4).encode()
+                        )
+                        if self.blob_store is not None:
+                            await asyncio.to_thread(self.blob_store.add, media_file)
+                        if self.manifest is not None:
+                            # May publish a manifest snapshot to remote storage
+                            await self._store(
+                                self.manifest.record,
+                                item.media_id,
+                                media_file,
+                                size,
+                                "video" if item.is_video else "photo"
+                            )
+            return "downloaded", size
+        except Exception as e:
+            self.logger.warning(f"Failed to download item: {e}")
+            return "failed", 0
+        finally:
+            self.progress.update(1)
+
+    async def _probe(self, item: MediaInfo, target_dir: Path) -> Optional[int]:
+        """
+        Get the size of an item's media without transferring it
+
+        Args:
+            item: Item metadata
+            target_dir: Target directory
+
+        Returns:
+            Size in bytes, or None if unknown or the item is skipped anyway
+        """
+        if self.skip_existing and self._already_downloaded(item, target_dir):
+            return None
+        with tracer.span("probe", media_id=item.media_id):
+            return await self.transport.probe_media(item.video_url if item.is_video else item.url)
+
+    def _register(self, items: List[MediaInfo], target_dir: Path) -> None:
+        """
+        Announce the listed items of a directory before any is downloaded
+
+        Items posted in the same second are then named by media id, not by
+        the order their downloads finish in (see TargetNames).
+
+        Args:
+            items: Listed items (filtered ones included)
+            target_dir: Target directory
+        """
+        for item in items:
+            self.names.register(self._target_name(item, target_dir), item.media_id)
+
+    @staticmethod
+    def _target_name(item: MediaInfo, target_dir: Path) -> str:
+        """Date-based target path of an item, without extension"""
+        return str(target_dir / f"{item.date_utc.strftime('%Y-%m-%d_%H-%M-%S')}_UTC")
+
+    async def _fetch(self, filename: str, url: Optional[str], item: MediaInfo) -> Tuple[Path, int]:
+        """
+        Stream a media URL to filename plus the extension of its content
+
+        Locally, resumes from a .part file left by an earlier attempt and
+        renames it into place once the announced length has been received.
+
+        Args:
+            filename: Target path without extension
+            url: Media URL
+            item: Item metadata (for the modification time)
+
+        Returns:
+            (path, size) of the written file
+        """
+        if not url:
+            raise DownloadError(f"No media URL for item {item.media_id}")
+
+        with tracer.span("media"):
+            response = await self.transport.open_media(url, self.storage.resume_offset(filename, url))
+            total = response.total_length
+            self.progress.expect_bytes(None if total is None else total - response.start)
+            extension = media_extension(response.content_type, url)
+            writer = self.storage.open_media(filename, extension, response.start, url)
+            try:
+                async for chunk in response.chunks:
+                    await self._store(writer.write, chunk)
+                    self.progress.add_bytes(len(chunk))
+            except BaseException:
+                writer.abort()
+                raise
+
+        return await self._store(writer.finish, total, item.date_utc.replace(tzinfo=timezone.utc))
+
+    async def _store(self, call: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a call reaching the storage backend
+
+        Local filesystem calls run inline; calls of a remote backend go over
+        the network and run in a worker thread, off the event loop.
+
+        Args:
+            call: Function to call
+            *args: Its arguments
+
+        Returns:
+            Result of the call
+        """
+        if self.storage.local:
+            return call(*args)
+        return await asyncio.to_thread(call, *args)
+
+    def _already_downloaded(self, item: MediaInfo, target_dir: Path) -> bool:
+        """
+        Check if item exists in target directory
+
+        Args:
+            item: Item metadata
+            target_dir: Target directory
+
+        Returns:
+            True if item was already downloaded
+        """
+        if self.manifest is not None:
+            return self.manifest.contains(item.media_id, target_dir)
+
+        date_str = item.date_utc.strftime('%Y-%m-%d_%H-%M-%S_UTC')
+        return (
+            self.storage.exists(target_dir / f"{date_str}.mp4")
+            or self.storage.exists(target_dir / f"{date_str}.jpg")
+        )
+
+    @staticmethod
+    def _failed(username: str, error: Exception) -> BackupStats:
+        """Statistics of a profile whose backup failed"""
+        stats = BackupStats()
+        stats.add_error(f"{username}: {error}")
+        stats.finish()
+        return stats
+
+    @staticmethod
+    def _count(stats: BackupStats, result: str, size: int = 0) -> None:
+        """Add an item result to statistics"""
+        if result == "downloaded":
+            stats.increment_downloaded(size)
+        elif result == "skipped":
+            stats.increment_skipped()
+        else:
+            stats.increment_failed()
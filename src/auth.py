@@ -1,8 +1,11 @@
 """Authentication management"""
 
 import logging
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import instaloader
 
 from .config import Config
@@ -10,6 +13,7 @@ from .ui import UI
 from .exceptions import AuthenticationError, SessionError
 from .constants import (
     SESSION_FILE_PREFIX,
+    SESSION_VERIFIED_SUFFIX,
     MSG_SESSION_LOADED,
     MSG_SESSION_EXPIRED,
     MSG_LOGIN_SUCCESS,
@@ -24,18 +28,33 @@ from .constants import (
 class Authenticator:
     """Handle Instagram authentication and session management"""
     
-    def __init__(self, config: Config, loader: instaloader.Instaloader) -> None:
+    # A refresh within this many seconds serves all workers rejected meanwhile
+    REFRESH_GRACE = 30.0
+    
+    def __init__(
+        self,
+        config: Config,
+        loader: instaloader.Instaloader,
+        verify_ttl: float = 0
+    ) -> None:
         """
         Initialize authenticator
         
         Args:
             config: Application configuration
             loader: Instaloader instance
+            verify_ttl: Seconds a successful session check is trusted
+                (0 checks the session on every run)
         """
         self.config = config
         self.loader = loader
+        self.verify_ttl = verify_ttl
         self.logger = logging.getLogger(__name__)
         self.username: Optional[str] = None
+        self._session_mtime = 0.0
+        # Monotonic clock may start near 0: never refreshed is -inf, not 0
+        self._refreshed_at = float('-inf')
+        self._refresh_lock = threading.Lock()
     
     def authenticate(self) -> str:
         """
@@ -52,6 +71,10 @@ class Authenticator:
         # Try to load existing session
         if self._session_exists(self.username):
             if self._load_session(self.username):
+                if self._recently_verified(self.username):
+                    # Expiry is noticed on the first rejected request instead
+                    self.logger.info(f"Authenticated as {self.username} using saved session (check skipped)")
+                    return self.username
                 if self._verify_session():
                     self.logger.info(f"Authenticated as {self.username} using saved session")
                     return self.username
@@ -62,6 +85,84 @@ class Authenticator:
         self._login_with_password(self.username)
         return self.username
     
+    def saved_sessions(self) -> List[str]:
+        """
+        List accounts with a saved session file
+        
+        Returns:
+            Usernames, sorted
+        """
+        return sorted(
+            path.name[len(SESSION_FILE_PREFIX):]
+            for path in self.config.session_dir.glob(f"{SESSION_FILE_PREFIX}*")
+            if path.is_file() and path.suffix != SESSION_VERIFIED_SUFFIX
+        )
+    
+    def load_saved_session(self, username: str) -> bool:
+        """
+        Load a saved session without interactive fallback
+        
+        Used for additional accounts of the session pool; an expired
+        session is noticed on its first rejected request.
+        
+        Args:
+            username: Username to load session for
+            
+        Returns:
+            True if session loaded successfully
+        """
+        if not self._session_exists(username):
+            return False
+        if not self._load_session(username):
+            return False
+        self.username = username
+        return True
+    
+    def refresh_session(self, interactive: bool = True) -> bool:
+        """
+        Renew the login after Instagram rejected the session
+        
+        Called from worker threads when a request fails with LoginRequired
+        or HTTP 401. Workers rejected at the same time share one refresh;
+        the others wait for it and then repeat their request. A session
+        file renewed meanwhile (e.g. by another run) is reloaded, otherwise
+        the password is asked for if a terminal is attached.
+        
+        Args:
+            interactive: Allow asking for the password
+            
+        Returns:
+            True if the session was renewed
+        """
+        with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at < self.REFRESH_GRACE:
+                return True
+            
+            username = self.username
+            if username is None:
+                return False
+            
+            self._clear_verified(username)
+            UI.print_warning(MSG_SESSION_EXPIRED)
+            
+            session_path = self._get_session_path(username)
+            renewed = False
+            if session_path.exists() and session_path.stat().st_mtime > self._session_mtime:
+                renewed = self._load_session(username) and self._verify_session()
+            elif interactive and sys.stdin.isatty():
+                try:
+                    self._login_with_password(username)
+                    renewed = True
+                except AuthenticationError as e:
+                    self.logger.error(f"Session refresh failed: {e}")
+            
+            if renewed:
+                self._refreshed_at = time.monotonic()
+                self.logger.info(f"Session of {username} refreshed")
+            else:
+                self.logger.warning(f"Session of {username} could not be refreshed")
+            return renewed
+    
     def _get_username(self) -> str:
         """
         Get username from config or user input
@@ -113,6 +214,7 @@ class Authenticator:
             UI.print_info(f"Loading saved session for {username}...")
             session_path = self._get_session_path(username)
             self.loader.load_session_from_file(username, str(session_path))
+            self._session_mtime = session_path.stat().st_mtime
             UI.print_success(MSG_SESSION_LOADED)
             self.logger.info(f"Session loaded for {username}")
             return True
@@ -129,11 +231,74 @@ class Authenticator:
             True if session is valid
         """
         try:
-            self.loader.test_login()
-            return True
+            if self.loader.test_login() is None:
+                self.logger.warning("Session validation failed: not logged in")
+                return False
         except Exception as e:
             self.logger.warning(f"Session validation failed: {e}")
             return False
+        
+        self._mark_verified(self.username)
+        return True
+    
+    def _verified_path(self, username: str) -> Path:
+        """
+        Get path of the file holding the last successful session check
+        
+        Args:
+            username: Username
+            
+        Returns:
+            Path next to the session file
+        """
+        session_path = self._get_session_path(username)
+        return session_path.with_name(session_path.name + SESSION_VERIFIED_SUFFIX)
+    
+    def _recently_verified(self, username: str) -> bool:
+        """
+        Check if the session was verified within the verification TTL
+        
+        Args:
+            username: Username
+            
+        Returns:
+            True if the last successful check is recent enough to trust
+        """
+        if self.verify_ttl <= 0:
+            return False
+        try:
+            verified_at = float(self._verified_path(username).read_text().strip())
+        except (OSError, ValueError):
+            return False
+        return 0 <= time.time() - verified_at < self.verify_ttl
+    
+    def _mark_verified(self, username: Optional[str]) -> None:
+        """
+        Store the time of a successful session check
+        
+        Args:
+            username: Username
+        """
+        if username is None:
+            return
+        try:
+            self._verified_path(username).write_text(f"{time.time():.0f}\n")
+        except OSError as e:
+            self.logger.debug(f"Could not store session check time: {e}")
+    
+    def _clear_verified(self, username: str) -> None:
+        """
+        Forget the last session check (after the session was rejected)
+        
+        Args:
+            username: Username
+        """
+        try:
+            self._verified_path(username).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.debug(f"Could not remove session check time: {e}")
     
     def _login_with_2fa(self, username: str, password: str) -> None:
         """
@@ -158,6 +323,8 @@ class Authenticator:
             # Save session for future use
             session_path = self._get_session_path(username)
             self.loader.save_session_to_file(str(session_path))
+            self._session_mtime = session_path.stat().st_mtime
+            self._mark_verified(username)
             
             UI.print_success(MSG_LOGIN_SUCCESS)
             UI.print_success(MSG_NO_PASSWORD_REQUIRED)
@@ -194,6 +361,8 @@ class Authenticator:
             # Save session for future use
             session_path = self._get_session_path(username)
             self.loader.save_session_to_file(str(session_path))
+            self._session_mtime = session_path.stat().st_mtime
+            self._mark_verified(username)
             
             UI.print_success(MSG_LOGIN_SUCCESS)
             UI.print_success(MSG_NO_PASSWORD_REQUIRED)
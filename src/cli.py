@@ -13,8 +13,15 @@ class CLI:
     """Command-line interface handler"""
     
     def __init__(self) -> None:
-        """Initialize CLI argument parser"""
+        """Initialize CLI argument parsers"""
         self.parser = self._create_parser()
+        self.commands = {
+            'batch': self._create_batch_parser(),
+            'dedupe': self._create_dedupe_parser(),
+            'extract': self._create_extract_parser(),
+            'ls': self._create_ls_parser(),
+            'watch': self._create_watch_parser(),
+        }
     
     def _create_parser(self) -> argparse.ArgumentParser:
         """
@@ -43,6 +50,190 @@ class CLI:
             help='Instagram username to download from (defaults to authenticated user)'
         )
         
+        output_group = self._add_common_options(parser)
+        output_group.add_argument(
+            '--list',
+            action='store_true',
+            help='List available highlights without downloading'
+        )
+        output_group.add_argument(
+            '--json',
+            action='store_true',
+            help='With --list, print the listing as JSON on stdout'
+        )
+        
+        return parser
+    
+    def _create_batch_parser(self) -> argparse.ArgumentParser:
+        """
+        Create argument parser for the batch command
+        
+        Returns:
+            Configured ArgumentParser
+        """
+        parser = argparse.ArgumentParser(
+            prog=f"{APP_NAME.lower()} batch",
+            description="Back up several profiles with a single login",
+            formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        
+        parser.add_argument(
+            'file',
+            nargs='?',
+            type=Path,
+            help='File with one username per line (default: targets in config.yaml)'
+        )
+        parser.add_argument(
+            '-j', '--parallel',
+            metavar='N',
+            type=int,
+            help='Number of profiles backed up at once (default: advanced.profile_parallelism)'
+        )
+        
+        self._add_common_options(parser)
+        return parser
+    
+    def _create_watch_parser(self) -> argparse.ArgumentParser:
+        """
+        Create argument parser for the watch command
+        
+        Returns:
+            Configured ArgumentParser
+        """
+        parser = argparse.ArgumentParser(
+            prog=f"{APP_NAME.lower()} watch",
+            description="Keep polling profiles and capture every new story before it expires",
+            formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        
+        parser.add_argument(
+            'file',
+            nargs='?',
+            type=Path,
+            help='File with one username per line (default: targets in config.yaml)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Check every profile once and exit (for cron)'
+        )
+        parser.add_argument(
+            '--budget',
+            metavar='N',
+            type=int,
+            help='Maximum requests per hour (default: watch.max_requests_per_hour)'
+        )
+        
+        self._add_common_options(parser)
+        return parser
+    
+    def _create_dedupe_parser(self) -> argparse.ArgumentParser:
+        """
+        Create argument parser for the dedupe command
+        
+        Returns:
+            Configured ArgumentParser
+        """
+        parser = argparse.ArgumentParser(
+            prog=f"{APP_NAME.lower()} dedupe",
+            description="Hardlink identical media in an existing backups tree to one stored copy",
+            formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        
+        parser.add_argument(
+            '-o', '--output',
+            metavar='DIR',
+            type=Path,
+            help='Backups directory to convert (default: ./backups)'
+        )
+        parser.add_argument(
+            '-q', '--quiet',
+            action='store_true',
+            help='Minimal output (errors only)'
+        )
+        parser.add_argument(
+            '-v', '--verbose',
+            action='store_true',
+            help='Verbose output (debug info)'
+        )
+        
+        return parser
+    
+    def _create_ls_parser(self) -> argparse.ArgumentParser:
+        """
+        Create argument parser for the ls command
+        
+        Returns:
+            Configured ArgumentParser
+        """
+        parser = argparse.ArgumentParser(
+            prog=f"{APP_NAME.lower()} ls",
+            description="List the files in a backup archive (read from its index)",
+            formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        
+        parser.add_argument('archive', type=Path, help='Archive (.tar, .tar.zst or .tar.gz)')
+        parser.add_argument('prefix', nargs='?', default='', help='Only list names starting with this')
+        parser.add_argument(
+            '-l', '--long',
+            action='store_true',
+            help='Show size and modification time'
+        )
+        parser.add_argument('-q', '--quiet', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('-v', '--verbose', action='store_true', help=argparse.SUPPRESS)
+        
+        return parser
+    
+    def _create_extract_parser(self) -> argparse.ArgumentParser:
+        """
+        Create argument parser for the extract command
+        
+        Returns:
+            Configured ArgumentParser
+        """
+        parser = argparse.ArgumentParser(
+            prog=f"{APP_NAME.lower()} extract",
+            description="Restore files of a backup archive as loose files",
+            formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        
+        parser.add_argument('archive', type=Path, help='Archive (.tar, .tar.zst or .tar.gz)')
+        parser.add_argument(
+            'members',
+            nargs='*',
+            metavar='NAME',
+            help='Files or directories to extract (default: everything)'
+        )
+        parser.add_argument(
+            '-C', '--directory',
+            metavar='DIR',
+            type=Path,
+            help='Target directory (default: the archive path without its extension, '
+                 'i.e. the loose backup layout)'
+        )
+        parser.add_argument(
+            '-q', '--quiet',
+            action='store_true',
+            help='Minimal output (errors only)'
+        )
+        parser.add_argument(
+            '-v', '--verbose',
+            action='store_true',
+            help='Verbose output (debug info)'
+        )
+        
+        return parser
+    
+    def _add_common_options(self, parser: argparse.ArgumentParser) -> argparse._ArgumentGroup:
+        """
+        Add options shared by all commands
+        
+        Args:
+            parser: Parser to extend
+            
+        Returns:
+            Output options group, for command specific additions
+        """
         # Authentication options
         auth_group = parser.add_argument_group('authentication options')
         auth_group.add_argument(
@@ -75,6 +266,16 @@ class CLI:
             action='store_true',
             help='Force re-download all items (disable incremental backup)'
         )
+        download_group.add_argument(
+            '--rebuild-manifest',
+            action='store_true',
+            help='Rebuild the download manifest from files already in the output directory'
+        )
+        download_group.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Ignore cached profile lookups and highlight listings'
+        )
         
         # Output options
         output_group = parser.add_argument_group('output options')
@@ -84,11 +285,6 @@ class CLI:
             type=Path,
             help='Custom output directory (default: ./backups)'
         )
-        output_group.add_argument(
-            '--list',
-            action='store_true',
-            help='List available highlights without downloading'
-        )
         output_group.add_argument(
             '-q', '--quiet',
             action='store_true',
@@ -104,8 +300,20 @@ class CLI:
             action='store_true',
             help='Disable progress bars'
         )
+        output_group.add_argument(
+            '--trace',
+            metavar='FILE',
+            type=Path,
+            help='Write per-phase timings as a Chrome trace (open in chrome://tracing or Perfetto)'
+        )
+        output_group.add_argument(
+            '--metrics-file',
+            metavar='FILE',
+            type=Path,
+            help='Write phase timings and run statistics as a Prometheus textfile (.prom)'
+        )
         
-        return parser
+        return output_group
     
     def _get_examples(self) -> str:
         """
@@ -128,6 +336,9 @@ examples:
   # List highlights without downloading
   igsaver.py --list username
   
+  # Same listing as JSON, for scripts
+  igsaver.py --list --json username | jq '.totals'
+  
   # Force re-download everything
   igsaver.py --force
   
@@ -136,25 +347,72 @@ examples:
   
   # Verbose mode (debug info)
   igsaver.py -v username
+  
+  # Back up every profile listed in a file, 4 at a time
+  igsaver.py batch profiles.txt -j 4
+  
+  # Record where a run spends its time
+  igsaver.py --trace trace.json --metrics-file /var/lib/node_exporter/igsaver.prom username
+  
+  # Capture new stories of the profiles in a file as they are posted
+  igsaver.py watch profiles.txt
+  
+  # Store identical media of an existing backup only once
+  igsaver.py dedupe -o /path/to/backups
+  
+  # Browse and restore archived backups (output.archive)
+  igsaver.py ls -l backups/username.tar.zst highlights/
+  igsaver.py extract backups/username.tar.zst "highlights/Travel"
+  
+  # Back up a profile named like a command (batch, dedupe, extract, ls, watch)
+  igsaver.py -- watch --stories
 """
     
     def parse_args(self, args: Optional[list] = None) -> argparse.Namespace:
         """
         Parse command-line arguments
         
+        A leading command name (e.g. "batch") selects that command's parser;
+        anything else is parsed as a single-profile backup. A leading "--"
+        makes the next argument a username even if it names a command.
+        
         Args:
             args: Optional argument list (defaults to sys.argv)
             
         Returns:
-            Parsed arguments namespace
+            Parsed arguments namespace (command is None for a plain backup)
         """
-        parsed = self.parser.parse_args(args)
+        args = list(sys.argv[1:] if args is None else args)
+        
+        if args and args[0] == '--':
+            args = args[1:]
+            command = None
+        else:
+            command = args[0] if args and args[0] in self.commands else None
+        
+        if command is not None:
+            parser = self.commands[command]
+            parsed = parser.parse_intermixed_args(args[1:])
+            parsed.command = command
+            parsed.username = None
+            parsed.list = False
+            parsed.json = False
+        else:
+            parser = self.parser
+            parsed = parser.parse_args(args)
+            parsed.command = None
         
         # Validate conflicting options
-        if parsed.force and parsed.skip_existing:
+        if getattr(parsed, 'force', False) and parsed.skip_existing:
             parsed.skip_existing = False
         
         if parsed.quiet and parsed.verbose:
-            self.parser.error("--quiet and --verbose are mutually exclusive")
+            parser.error("--quiet and --verbose are mutually exclusive")
+        
+        if parsed.json and not parsed.list:
+            parser.error("--json requires --list")
+        
+        if parsed.list and parsed.stories:
+            parser.error("--list describes highlights and cannot be combined with --stories")
         
         return parsed
@@ -3,7 +3,6 @@
 import os
 from typing import Optional
 from pathlib import Path
-from dotenv import load_dotenv
 
 from .constants import ROOT_DIR, BACKUPS_DIR, SESSIONS_DIR, LOGS_DIR
 
@@ -15,20 +14,23 @@ class Config:
         """
         Initialize configuration
         
+        Nothing is created on disk; see ensure_directories().
+        
         Args:
             env_file: Optional path to .env file
         """
+        from dotenv import load_dotenv
+        
         if env_file:
             load_dotenv(env_file)
         else:
             load_dotenv()
         
         self._username: Optional[str] = os.getenv('IG_USERNAME')
-        self._setup_directories()
     
-    def _setup_directories(self) -> None:
-        """Create required directories if they don't exist"""
-        BACKUPS_DIR.mkdir(exist_ok=True)
+    def ensure_directories(self) -> None:
+        """Create required directories if they don't exist (once a download starts)"""
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
         SESSIONS_DIR.mkdir(exist_ok=True)
         LOGS_DIR.mkdir(exist_ok=True)
     
@@ -2,10 +2,11 @@
 
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Callable, TypeVar
 from datetime import datetime
 from dataclasses import dataclass
 
+T = TypeVar("T")
 
 @dataclass
 class DownloadConfig:
@@ -25,6 +26,10 @@ class OutputConfig:
     flatten_structure: bool = False
     include_caption: bool = False
     max_filename_length: int = 255
+    dedupe: bool = False
+    fsync: str = "highlight"
+    archive: str = "none"
+    archive_compression: str = "zstd"
 
 
 @dataclass
@@ -34,6 +39,51 @@ class AdvancedConfig:
     max_retries: int = 3
     log_level: str = "INFO"
     concurrent_downloads: int = 1
+    engine: str = "threads"
+    profile_parallelism: int = 1
+    highlight_batch_size: int = 20
+
+
+@dataclass
+class CacheConfig:
+    """Metadata cache configuration"""
+    enabled: bool = True
+    profile_ttl_hours: float = 168
+    highlights_ttl_hours: float = 1
+
+
+@dataclass
+class SessionsConfig:
+    """Session pool configuration"""
+    pool: bool = False
+    accounts: list = None
+    quarantine_minutes: float = 15
+    verify_ttl_hours: float = 24
+    
+    def __post_init__(self):
+        if self.accounts is None:
+            self.accounts = []
+
+
+@dataclass
+class WatchConfig:
+    """Stories watch daemon configuration"""
+    min_interval_minutes: float = 10
+    max_interval_hours: float = 6
+    max_requests_per_hour: int = 200
+
+
+@dataclass
+class StorageConfig:
+    """Storage backend configuration"""
+    backend: str = "local"
+    endpoint: Optional[str] = None
+    bucket: Optional[str] = None
+    prefix: str = ""
+    region: str = "us-east-1"
+    access_key: Optional[str] = None
+    secret_key: Optional[str] = None
+    part_size_mb: float = 8
 
 
 @dataclass
@@ -66,6 +116,11 @@ class ConfigLoader:
         self.output = OutputConfig()
         self.advanced = AdvancedConfig()
         self.filters = FiltersConfig()
+        self.cache = CacheConfig()
+        self.sessions = SessionsConfig()
+        self.watch = WatchConfig()
+        self.storage = StorageConfig()
+        self.targets: List[str] = []
         
         if self.config_path.exists():
             self.load()
@@ -91,6 +146,26 @@ class ConfigLoader:
             # Load filters config
             if 'filters' in data:
                 self._load_filters_config(data['filters'])
+            
+            # Load cache config
+            if 'cache' in data:
+                self._load_cache_config(data['cache'])
+            
+            # Load session pool config
+            if 'sessions' in data:
+                self._load_sessions_config(data['sessions'])
+            
+            # Load stories watch config
+            if 'watch' in data:
+                self._load_watch_config(data['watch'])
+            
+            # Load storage backend config
+            if 'storage' in data:
+                self._load_storage_config(data['storage'])
+            
+            # Load batch targets
+            if data.get('targets'):
+                self.targets = [str(target).strip().lstrip('@') for target in data['targets']]
                 
         except Exception as e:
             print(f"Warning: Could not load config file: {e}")
@@ -122,6 +197,10 @@ class ConfigLoader:
         self.output.flatten_structure = data.get('flatten_structure', False)
         self.output.include_caption = data.get('include_caption', False)
         self.output.max_filename_length = data.get('max_filename_length', 255)
+        self.output.dedupe = data.get('dedupe', False)
+        self.output.fsync = str(data.get('fsync', 'highlight')).lower()
+        self.output.archive = str(data.get('archive') or 'none').lower()
+        self.output.archive_compression = str(data.get('archive_compression') or 'zstd').lower()
     
     def _load_advanced_config(self, data: Dict[str, Any]) -> None:
         """Load advanced configuration section"""
@@ -129,6 +208,9 @@ class ConfigLoader:
         self.advanced.max_retries = data.get('max_retries', 3)
         self.advanced.log_level = data.get('log_level', 'INFO')
         self.advanced.concurrent_downloads = data.get('concurrent_downloads', 1)
+        self.advanced.engine = data.get('engine', 'threads')
+        self.advanced.profile_parallelism = data.get('profile_parallelism', 1)
+        self.advanced.highlight_batch_size = data.get('highlight_batch_size', 20)
     
     def _load_filters_config(self, data: Dict[str, Any]) -> None:
         """Load filters configuration section"""
@@ -137,6 +219,36 @@ class ConfigLoader:
         self.filters.min_size_mb = data.get('min_size_mb')
         self.filters.max_size_mb = data.get('max_size_mb')
     
+    def _load_cache_config(self, data: Dict[str, Any]) -> None:
+        """Load metadata cache configuration section"""
+        self.cache.enabled = data.get('enabled', True)
+        self.cache.profile_ttl_hours = float(data.get('profile_ttl_hours', 168))
+        self.cache.highlights_ttl_hours = float(data.get('highlights_ttl_hours', 1))
+    
+    def _load_sessions_config(self, data: Dict[str, Any]) -> None:
+        """Load session pool configuration section"""
+        self.sessions.pool = data.get('pool', False)
+        self.sessions.accounts = [str(account).strip().lstrip('@') for account in data.get('accounts') or []]
+        self.sessions.quarantine_minutes = float(data.get('quarantine_minutes', 15))
+        self.sessions.verify_ttl_hours = float(data.get('verify_ttl_hours', 24))
+    
+    def _load_watch_config(self, data: Dict[str, Any]) -> None:
+        """Load stories watch configuration section"""
+        self.watch.min_interval_minutes = float(data.get('min_interval_minutes', 10))
+        self.watch.max_interval_hours = float(data.get('max_interval_hours', 6))
+        self.watch.max_requests_per_hour = int(data.get('max_requests_per_hour', 200))
+    
+    def _load_storage_config(self, data: Dict[str, Any]) -> None:
+        """Load storage backend configuration section"""
+        self.storage.backend = str(data.get('backend', 'local')).lower()
+        self.storage.endpoint = data.get('endpoint')
+        self.storage.bucket = data.get('bucket')
+        self.storage.prefix = str(data.get('prefix') or '')
+        self.storage.region = str(data.get('region', 'us-east-1'))
+        self.storage.access_key = data.get('access_key')
+        self.storage.secret_key = data.get('secret_key')
+        self.storage.part_size_mb = float(data.get('part_size_mb', 8))
+    
     def should_download_item(self, item, item_date: Optional[datetime] = None) -> bool:
         """
         Check if item should be downloaded based on filters
@@ -163,3 +275,36 @@ class ConfigLoader:
                 return False
         
         return True
+    
+    def is_before_date_window(self, latest_date: Optional[datetime]) -> bool:
+        """
+        Check if a highlight holds only items older than min_date
+        
+        Args:
+            latest_date: Date of the newest item (from the highlight listing)
+            
+        Returns:
+            True if every item is filtered out by date
+        """
+        return bool(self.download.min_date and latest_date and latest_date < self.download.min_date)
+    
+    def filter_items(self, items: Iterable[T], on_filtered: Callable[[int], None]) -> Iterator[T]:
+        """
+        Yield items passing should_download_item, judged on metadata only
+        
+        Every item is checked: Instagram does not guarantee the order of
+        highlight and story items, so iteration cannot stop at the first
+        item newer than max_date. The items are already in memory.
+        
+        Args:
+            items: Items with date_utc and is_video
+            on_filtered: Called with the number of items filtered out
+            
+        Yields:
+            Items to download
+        """
+        for item in items:
+            if self.should_download_item(item, getattr(item, 'date_utc', None)):
+                yield item
+            else:
+                on_filtered(1)
@@ -17,8 +17,41 @@ SEPARATOR_LINE = "=" * 50
 SEPARATOR_CHAR = "="
 SEPARATOR_LENGTH = 50
 
+# Download manifest (stored in the backup root)
+MANIFEST_FILENAME = ".igsaver-manifest.sqlite3"
+# Remote storage: the manifest is published again after this many new records
+MANIFEST_PUBLISH_EVERY = 50
+BLOBS_DIRNAME = ".blobs"
+CACHE_FILENAME = ".igsaver-cache.sqlite3"
+MEDIA_EXTENSIONS = (".jpg", ".mp4", ".webp", ".heic", ".png")
+
+# Archive output (output.archive)
+ARCHIVE_INDEX_SUFFIX = ".idx"  # SQLite member index, next to the archive
+ARCHIVE_SPOOL_BYTES = 16 * 1024 * 1024  # Media bodies larger than this are spooled to disk until appended
+
+# Size estimates for --list while the manifest has no downloads of a media type
+ESTIMATED_PHOTO_BYTES = 300 * 1024
+ESTIMATED_VIDEO_BYTES = 3 * 1024 * 1024
+ESTIMATED_VIDEO_BYTES_PER_SECOND = 250 * 1024
+
+# Media size probes (filters.min_size_mb/max_size_mb)
+SIZE_PROBE_WORKERS = 8
+SIZE_PROBE_BATCH = 16
+
+# Stories watch daemon
+WATCH_STATE_FILENAME = ".igsaver-watch.sqlite3"
+WATCH_CADENCE_WEIGHT = 0.3  # Weight of the latest gap in the moving average of story gaps
+WATCH_BACKOFF = 1.5  # Growth of the polling interval after a check found nothing new
+STORY_LIFETIME_SECONDS = 24 * 3600
+REELS_TRAY_QUERY_HASH = "d15efd8c0c5b23f0ef71f18bf363c704"
+HIGHLIGHT_ITEMS_QUERY_HASH = "45246d3fe16ccc6577e0bd297a5db1ab"  # Reels media, takes several highlight ids
+
+# Active stories of up to this many profiles are fetched per request (reels media API limit)
+STORIES_BATCH_SIZE = 50
+
 # Session configuration
 SESSION_FILE_PREFIX = "session-"
+SESSION_VERIFIED_SUFFIX = ".verified"  # Time of the last successful login check, next to the session
 
 # Download configuration
 DOWNLOAD_VIDEOS = True
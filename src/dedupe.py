@@ -0,0 +1,199 @@
+"""Content-addressed blob store deduplicating media across highlights and stories"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .constants import BLOBS_DIRNAME, MEDIA_EXTENSIONS
+
+# Linux ioctl cloning a file's extents (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+@dataclass
+class DedupeStats:
+    """Result of deduplicating files"""
+    files_scanned: int = 0
+    files_linked: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def saved_str(self) -> str:
+        """Get human-readable size of freed space"""
+        bytes_val = float(self.bytes_saved)
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if bytes_val < 1024.0:
+                return f"{bytes_val:.1f} {unit}"
+            bytes_val /= 1024.0
+        return f"{bytes_val:.1f} TB"
+
+
+class BlobStore:
+    """
+    Store media once per content hash under the backup root
+
+    Every media file becomes a hardlink (or reflink, where hardlinks are
+    not possible) to "<backup>/.blobs/<sha256[:2]>/<sha256>", so the same
+    media saved to stories and to several highlights takes disk space once.
+    """
+
+    def __init__(self, backup_dir: Path) -> None:
+        """
+        Initialize blob store
+
+        Args:
+            backup_dir: Backup root directory
+        """
+        self.backup_dir = backup_dir
+        self.root = backup_dir / BLOBS_DIRNAME
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        """
+        Get blob location for a content hash
+
+        Args:
+            digest: SHA-256 hex digest
+
+        Returns:
+            Path of the blob
+        """
+        return self.root / digest[:2] / digest
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        """
+        Hash file content
+
+        Args:
+            path: File to hash
+
+        Returns:
+            SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def ingest(self, path: Path) -> int:
+        """
+        Make a media file share storage with its blob
+
+        The first file with a given content becomes the blob (hardlinked
+        into the store); later files with the same content are replaced by
+        links to it.
+
+        Args:
+            path: Media file inside the backup tree
+
+        Returns:
+            Number of bytes freed (0 if the content was new)
+        """
+        digest = self.hash_file(path)
+        blob = self.blob_path(digest)
+
+        with self._lock:
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                self._link(path, blob)
+                return 0
+
+            path_stat = path.stat()
+            blob_stat = blob.stat()
+            if (path_stat.st_dev, path_stat.st_ino) == (blob_stat.st_dev, blob_stat.st_ino):
+                return 0
+
+            # Link under a temporary name, then atomically replace the copy
+            temp = path.with_name(path.name + ".dedupe")
+            self._link(blob, temp)
+            os.replace(temp, path)
+            return path_stat.st_size
+
+    def add(self, path: Path) -> int:
+        """
+        Deduplicate a freshly downloaded media file
+
+        Failures are logged and leave the file as a plain copy; they never
+        fail the download itself.
+
+        Args:
+            path: Media file inside the backup tree
+
+        Returns:
+            Number of bytes freed
+        """
+        try:
+            return self.ingest(path)
+        except OSError as e:
+            self.logger.warning(f"Could not deduplicate {path}: {e}")
+            return 0
+
+    def dedupe_tree(self) -> DedupeStats:
+        """
+        Convert an existing backups tree in place
+
+        Returns:
+            Deduplication statistics
+        """
+        stats = DedupeStats()
+        for path in self._iter_media():
+            stats.files_scanned += 1
+            saved = self.add(path)
+            if saved:
+                stats.files_linked += 1
+                stats.bytes_saved += saved
+
+        self.logger.info(
+            f"Deduplicated {stats.files_linked} of {stats.files_scanned} files, "
+            f"{stats.bytes_saved} bytes freed"
+        )
+        return stats
+
+    def _iter_media(self) -> Iterator[Path]:
+        """
+        Find media files in the backups tree
+
+        Yields:
+            Paths of media files outside the blob store
+        """
+        for directory, dirnames, filenames in os.walk(self.backup_dir):
+            if Path(directory) == self.backup_dir and BLOBS_DIRNAME in dirnames:
+                dirnames.remove(BLOBS_DIRNAME)
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in MEDIA_EXTENSIONS:
+                    yield Path(directory) / filename
+
+    def _link(self, source: Path, target: Path) -> None:
+        """
+        Create target sharing storage with source
+
+        Tries a hardlink first and a reflink (copy-on-write clone) second.
+
+        Args:
+            source: Existing file
+            target: Path to create
+
+        Raises:
+            OSError: If the filesystem supports neither
+        """
+        try:
+            os.link(source, target)
+            return
+        except OSError as e:
+            self.logger.debug(f"Hardlink {target} failed ({e}), trying reflink")
+
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                target.unlink()
+                raise
@@ -1,9 +1,11 @@
 """Download management for Instagram highlights"""
 
 import logging
-import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import instaloader
 
 from .config import Config
@@ -12,6 +14,54 @@ from .exceptions import DownloadError, ProfileError
 from .constants import ERR_PROFILE_NOT_FOUND, ERR_PRIVATE_PROFILE
 from .progress import ProgressTracker
 from .summary import BackupStats
+from .item_downloader import ItemDownloader
+from .manifest import DownloadManifest, HighlightState
+from .rate_limiter import RateLimiter
+from .dedupe import BlobStore
+from .tracing import tracer
+from .metadata_cache import MetadataCache
+from .config_loader import ConfigLoader
+from .size_filter import SizeFilter
+from .media_file import FileSyncer
+from .storage import LocalStorage, StorageBackend
+from .listing import HighlightListing, SizeEstimator
+from .transport import MediaInfo
+from .reels import fetch_highlight_items, fetch_highlight_iphone_structs
+
+
+@dataclass
+class HighlightProgress:
+    """Item counters of a highlight while its items are in flight"""
+    
+    title: str
+    queued: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    listed: bool = False
+    error: Optional[str] = None
+    unchanged: bool = False
+    filtered: int = 0
+    before_date_window: bool = False
+    highlight_id: int = 0
+    directory: Optional[Path] = None
+    state: Optional[HighlightState] = None
+    
+    @property
+    def complete(self) -> bool:
+        """True once all items are listed and finished"""
+        return self.listed and self.succeeded + self.failed == self.queued
+    
+    @property
+    def result(self) -> str:
+        """Highlight status: downloaded, skipped, or failed"""
+        if self.error is not None:
+            return "failed"
+        if self.succeeded > 0:
+            return "downloaded"
+        elif self.failed == 0:
+            return "skipped"
+        else:
+            return "failed"
 
 
 class HighlightsDownloader:
@@ -22,7 +72,15 @@ class HighlightsDownloader:
         config: Config, 
         loader: instaloader.Instaloader,
         progress: Optional[ProgressTracker] = None,
-        skip_existing: bool = True
+        skip_existing: bool = True,
+        max_workers: int = 1,
+        manifest: Optional[DownloadManifest] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0,
+        blob_store: Optional[BlobStore] = None,
+        cache: Optional[MetadataCache] = None,
+        config_loader: Optional[ConfigLoader] = None,
+        storage: Optional[StorageBackend] = None
     ) -> None:
         """
         Initialize downloader
@@ -32,12 +90,34 @@ class HighlightsDownloader:
             loader: Authenticated Instaloader instance
             progress: Optional progress tracker
             skip_existing: If True, skip already downloaded files
+            max_workers: Number of items downloaded in parallel
+            manifest: Optional download manifest used for skip checks
+            rate_limiter: Optional limiter shared by all downloaders
+            max_retries: Retries per request after a failed attempt
+            blob_store: Optional store deduplicating downloaded media
+            cache: Optional cache of profile lookups and highlight listings
+            config_loader: Optional configuration whose date/type/size filters
+                items must pass before their media is requested
+            storage: Optional backend receiving files (default: local filesystem)
         """
         self.config = config
         self.loader = loader
         self.logger = logging.getLogger(__name__)
         self.progress = progress or ProgressTracker()
         self.skip_existing = skip_existing
+        self.rate_limiter = rate_limiter or RateLimiter(None)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.manifest = manifest
+        self.config_loader = config_loader
+        self.size_filter = SizeFilter.from_config(config_loader.filters, cache) if config_loader else None
+        self.batch_size = max(1, int(config_loader.advanced.highlight_batch_size)) if config_loader else 1
+        self.syncer = FileSyncer(config_loader.output.fsync) if config_loader else FileSyncer()
+        self.storage = storage or LocalStorage(self.syncer)
+        self.item_downloader = ItemDownloader(
+            loader, skip_existing, max_workers, manifest, self.rate_limiter, max_retries, blob_store,
+            self.progress, self.storage
+        )
         self.stats = BackupStats()
     
     def download(self, username: str) -> BackupStats:
@@ -56,33 +136,36 @@ class HighlightsDownloader:
         """
         try:
             profile = self._get_profile(username)
-            highlights_list = list(self._get_highlights(profile))
+            UI.print_info(f"Downloading highlights from {profile.username}...")
+            highlights = self._get_highlights(profile)
             
-            self.stats.highlights_found = len(highlights_list)
+            # Total grows as highlights and their items are discovered
+            pbar = self.progress.create_bar(total=0, desc="Downloading items", unit="item")
             
-            if self.stats.highlights_found == 0:
-                UI.print_warning(f"No highlights found for {username}")
-                self.stats.finish()
-                return self.stats
+            tracked: Dict[int, HighlightProgress] = {}
+            jobs = self._iter_items(username, highlights, tracked)
             
-            # Create progress bar for highlights
-            pbar = self.progress.create_bar(
-                total=self.stats.highlights_found,
-                desc="Processing highlights",
-                unit="highlight"
-            )
-            
-            for highlight in highlights_list:
-                result = self._download_highlight(username, highlight)
+            for highlight_id, result, size in self.item_downloader.download_many(jobs):
+                highlight = tracked[highlight_id]
                 if result == "downloaded":
-                    self.stats.highlights_downloaded += 1
+                    highlight.succeeded += 1
+                    self.stats.increment_downloaded(size)
                 elif result == "skipped":
-                    self.stats.highlights_skipped += 1
+                    highlight.succeeded += 1  # Count as success
+                    self.stats.increment_skipped()
                 else:
-                    self.stats.highlights_failed += 1
+                    highlight.failed += 1
+                    self.stats.increment_failed()
                 pbar.update(1)
+                
+                if highlight.complete:
+                    self._finish_highlight(tracked.pop(highlight_id))
             
             pbar.close()
+            
+            if self.stats.highlights_found == 0:
+                UI.print_warning(f"No highlights found for {username}")
+            
             self.stats.finish()
             return self.stats
             
@@ -96,6 +179,58 @@ class HighlightsDownloader:
             self.logger.error(f"Download error: {e}")
             raise DownloadError(f"Download error: {e}")
     
+    def list_highlights(self, username: str) -> List[HighlightListing]:
+        """
+        Describe all highlights of a user without downloading media
+        
+        Item listings are requested concurrently (one request per
+        highlight_batch_size highlights, up to max_workers at once); media
+        is never fetched.
+        
+        Args:
+            username: Instagram username
+            
+        Returns:
+            Listing per highlight, in profile order
+            
+        Raises:
+            ProfileError: If profile cannot be accessed
+            DownloadError: If the highlights cannot be listed
+        """
+        try:
+            profile = self._get_profile(username)
+            highlights = self._get_highlights(profile)
+        except instaloader.exceptions.ProfileNotExistsException:
+            raise ProfileError(f"{username} - {ERR_PROFILE_NOT_FOUND}")
+        except instaloader.exceptions.PrivateProfileNotFollowedException:
+            raise ProfileError(f"{username} {ERR_PRIVATE_PROFILE}")
+        except Exception as e:
+            self.logger.error(f"Listing error: {e}")
+            raise DownloadError(f"Listing error: {e}")
+        
+        estimator = SizeEstimator(self.manifest)
+        
+        def describe(highlight: instaloader.Highlight) -> HighlightListing:
+            try:
+                # Only the item listing; get_items() would also request the iPhone variants
+                with tracer.span("items", highlight=highlight.title):
+                    self.rate_limiter.call(lambda: highlight.itemcount, self.max_retries)
+                items = [MediaInfo.from_node(node) for node in highlight._items or []]
+            except Exception as e:
+                self.logger.error(f"Cannot access items in highlight '{highlight.title}': {e}")
+                return HighlightListing(highlight.unique_id, highlight.title, error=str(e))
+            return estimator.summarize(
+                highlight.unique_id, highlight.title, items,
+                self._get_highlight_dir(username, highlight.title)
+            )
+        
+        batches = [highlights[i:i + self.batch_size] for i in range(0, len(highlights), self.batch_size)]
+        workers = min(self.item_downloader.max_workers, len(highlights)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Listing needs no iPhone variants, those are only fetched for downloads
+            list(executor.map(lambda batch: self._prefetch_items(batch, iphone=False), batches))
+            return list(executor.map(describe, highlights))
+    
     def _get_profile(self, username: str) -> instaloader.Profile:
         """
         Get Instagram profile
@@ -106,103 +241,337 @@ class HighlightsDownloader:
         Returns:
             Profile instance
         """
+        if self.cache is not None:
+            node = self.cache.get_profile(username)
+            if node is not None:
+                self.logger.info(f"Using cached profile: {username}")
+                return instaloader.Profile(self.loader.context, node)
+        
         UI.print_info(f"\nFetching profile for {username}...")
         self.logger.info(f"Fetching profile: {username}")
-        return instaloader.Profile.from_username(self.loader.context, username)
+        try:
+            with tracer.span("profile", username=username):
+                profile = self.rate_limiter.call(
+                    lambda: instaloader.Profile.from_username(self.loader.context, username),
+                    self.max_retries
+                )
+        except instaloader.exceptions.ProfileNotExistsException:
+            if self.cache is not None:
+                self.cache.invalidate_profile(username)
+            raise
+        
+        if self.cache is not None:
+            self.cache.put_profile(username, profile._node)
+        return profile
     
-    def _get_highlights(self, profile: instaloader.Profile) -> instaloader.NodeIterator:
+    def _get_highlights(self, profile: instaloader.Profile) -> List[instaloader.Highlight]:
         """
         Get highlights from profile
         
+        The listing is a single request, issued through the rate limiter
+        so it is paced, retried and repeated after a session refresh.
+        
         Args:
             profile: Instagram profile
             
         Returns:
-            Iterator of highlights
+            Highlights (cached listing or fetched from Instagram)
         """
-        UI.print_info(f"Downloading highlights from {profile.username}...")
+        if self.cache is not None:
+            nodes = self.cache.get_highlights(profile.userid)
+            if nodes is not None:
+                self.logger.info(f"Using cached highlight listing for {profile.username}")
+                return [instaloader.Highlight(self.loader.context, node, profile) for node in nodes]
+        
         self.logger.info(f"Fetching highlights for {profile.username}")
-        return self.loader.get_highlights(profile)
+        with tracer.span("highlights", username=profile.username):
+            highlights = self.rate_limiter.call(
+                lambda: list(self.loader.get_highlights(profile)), self.max_retries
+            )
+        
+        if self.cache is not None:
+            self.cache.put_highlights(profile.userid, [highlight._node for highlight in highlights])
+        return highlights
     
-    def _download_highlight(self, username: str, highlight: instaloader.Highlight) -> str:
+    def _iter_items(
+        self,
+        username: str,
+        highlights: Iterable[instaloader.Highlight],
+        tracked: Dict[int, HighlightProgress]
+    ) -> Iterator[Tuple[int, instaloader.StoryItem, Path]]:
         """
-        Download a single highlight
+        Produce download jobs as highlights and items are listed
+        
+        Highlights are taken batch_size at a time; the item listings of a
+        batch are fetched together, and its downloads start before the next
+        batch is listed. Highlights that finish while listing (unchanged
+        since the last backup, no items, listing error) are reported right
+        away, the others once their last item is done.
         
         Args:
             username: Instagram username
-            highlight: Highlight to download
+            highlights: Iterator of highlights
+            tracked: Receives per-highlight counters, keyed by highlight id
+            
+        Yields:
+            (highlight_id, item, target_dir) per item
+        """
+        highlights = list(highlights)
+        for start in range(0, len(highlights), self.batch_size):
+            batch = []
+            for highlight in highlights[start:start + self.batch_size]:
+                progress = self._track(username, highlight, tracked)
+                if progress is not None:
+                    batch.append((highlight, progress))
+            
+            self._prefetch_items([highlight for highlight, _ in batch])
+            for highlight, progress in batch:
+                yield from self._iter_highlight_items(highlight, progress, tracked)
+    
+    def _track(
+        self,
+        username: str,
+        highlight: instaloader.Highlight,
+        tracked: Dict[int, HighlightProgress]
+    ) -> Optional[HighlightProgress]:
+        """
+        Start tracking a highlight, finishing it if its items need no listing
+        
+        Args:
+            username: Instagram username
+            highlight: Highlight from the listing
+            tracked: Receives per-highlight counters, keyed by highlight id
             
         Returns:
-            True if download successful
+            Counters of the highlight, or None if it is already finished
+            (unchanged since the last backup, or older than min_date)
+        """
+        self.stats.highlights_found += 1
+        highlight_id = highlight.unique_id
+        highlight_dir = self._get_highlight_dir(username, highlight.title)
+        progress = HighlightProgress(
+            title=highlight.title,
+            highlight_id=highlight_id,
+            directory=highlight_dir,
+            state=HighlightState.from_node(highlight._node)
+        )
+        tracked[highlight_id] = progress
+        self.logger.info(f"Processing highlight: {highlight.title}")
+        
+        if self._is_unchanged(progress):
+            self.logger.info(f"Highlight '{highlight.title}' unchanged since last backup")
+            progress.unchanged = True
+            progress.listed = True
+            self._finish_highlight(tracked.pop(highlight_id))
+            return None
+        
+        if self._is_before_date_window(progress):
+            self.logger.info(f"Highlight '{highlight.title}' has no items after min_date")
+            self._count_filtered(progress, progress.state.item_count or 0)
+            progress.before_date_window = True
+            progress.listed = True
+            self._finish_highlight(tracked.pop(highlight_id))
+            return None
+        
+        return progress
+    
+    def _prefetch_items(self, highlights: List[instaloader.Highlight], iphone: bool = True) -> None:
+        """
+        Fetch the item listings of several highlights in one request
+        
+        Fills each highlight's listing so itemcount and get_items() need
+        no request of their own. Highlights missing from the response, or
+        all of them if the request fails, are listed one by one afterwards.
+        
+        Args:
+            highlights: Highlights whose items are about to be listed
+            iphone: Also fetch the iPhone variants (in a second batched
+                request), as get_items() would before a download
+        """
+        pending = [highlight for highlight in highlights if not highlight._items]
+        if len(pending) < 2:
+            return
+        
+        highlight_ids = [highlight.unique_id for highlight in pending]
+        try:
+            with tracer.span("items", highlights=len(pending)):
+                reels = self.rate_limiter.call(
+                    lambda: fetch_highlight_items(self.loader.context, highlight_ids), self.max_retries
+                )
+                iphone_structs = {}
+                if iphone:
+                    iphone_structs = self.rate_limiter.call(
+                        lambda: fetch_highlight_iphone_structs(self.loader.context, highlight_ids), self.max_retries
+                    )
+        except Exception as e:
+            self.logger.warning(f"Batched item listing failed, listing highlights one by one: {e}")
+            return
+        
+        for highlight in pending:
+            if highlight.unique_id in reels:
+                highlight._items = reels[highlight.unique_id]
+            if highlight.unique_id in iphone_structs:
+                highlight._iphone_struct_ = iphone_structs[highlight.unique_id]
+        self.logger.info(f"Listed items of {len(reels)} highlights in one request")
+    
+    def _iter_highlight_items(
+        self,
+        highlight: instaloader.Highlight,
+        progress: HighlightProgress,
+        tracked: Dict[int, HighlightProgress]
+    ) -> Iterator[Tuple[int, instaloader.StoryItem, Path]]:
+        """
+        Produce download jobs for the items of one highlight
+        
+        Args:
+            highlight: Highlight to list
+            progress: Counters of the highlight
+            tracked: Per-highlight counters, keyed by highlight id
+            
+        Yields:
+            (highlight_id, item, target_dir) per item
         """
+        highlight_id = highlight.unique_id
+        highlight_dir = progress.directory
         try:
-            highlight_dir = self._get_highlight_dir(username, highlight.title)
-            highlight_dir.mkdir(parents=True, exist_ok=True)
+            self.storage.makedirs(highlight_dir)
             
-            self.logger.info(f"Processing highlight: {highlight.title}")
-            self.progress.write(f"\n📁 {highlight.title}")
+            # Item listing and iPhone variants are fetched here unless the batch did,
+            # paced and retried; get_items() then reuses both without a request
+            with tracer.span("items", highlight=highlight.title):
+                self.rate_limiter.call(lambda: highlight.itemcount, self.max_retries)
+                self.rate_limiter.call(highlight._fetch_iphone_struct, self.max_retries)
             
-            items_downloaded = 0
-            items_failed = 0
+            items = list(highlight.get_items())
+            self.item_downloader.register(items, highlight_dir)
+            if self.config_loader is not None:
+                items = self.config_loader.filter_items(
+                    items, lambda filtered: self._count_filtered(progress, filtered)
+                )
+            if self.size_filter is not None:
+                items = self.size_filter.select(
+                    items,
+                    lambda item: item.mediaid,
+                    lambda item: self.item_downloader.probe_size(item, highlight_dir),
+                    lambda filtered: self._count_filtered(progress, filtered)
+                )
             
-            # Direct iteration approach - let errors bubble up per item
-            try:
-                items_list = list(highlight.get_items())
-                self.stats.items_total += len(items_list)
+            for item in items:
+                progress.queued += 1
+                self.stats.items_total += 1
+                self.progress.add_total(1)
+                yield highlight_id, item, highlight_dir
                 
-                for item in items_list:
-                    try:
-                        result = self._download_item(item, highlight_dir)
-                        if result == "downloaded":
-                            items_downloaded += 1
-                            self.stats.increment_downloaded()
-                        elif result == "skipped":
-                            items_downloaded += 1  # Count as success
-                            self.stats.increment_skipped()
-                        else:
-                            items_failed += 1
-                            self.stats.increment_failed()
-                    except KeyError as ke:
-                        self.logger.warning(f"Skipping item - missing data: {ke}")
-                        items_failed += 1
-                        self.stats.increment_failed()
-                        continue
-                    except Exception as item_error:
-                        self.logger.warning(f"Error on item: {item_error}")
-                        items_failed += 1
-                        self.stats.increment_failed()
-                        continue
-                        
-            except (KeyError, AttributeError) as e:
-                # Highlight structure issue - log and skip
-                self.logger.error(f"Cannot access items in highlight '{highlight.title}': {e}")
-                self.progress.write(f"  ⚠  No accessible items (may be expired)")
-                self.stats.add_error(f"Highlight '{highlight.title}': {str(e)[:50]}")
-                return "failed"
+        except Exception as e:
+            # Highlight structure issue - log and skip
+            self.logger.error(f"Cannot access items in highlight '{highlight.title}': {e}")
+            progress.error = str(e)
+            self.stats.add_error(f"Highlight '{highlight.title}': {str(e)[:50]}")
             
-            total_items = items_downloaded + items_failed
+            # A cached listing may still name a removed highlight
+            if self.cache is not None:
+                self.cache.invalidate_highlights(highlight.owner_id)
+        
+        progress.listed = True
+        if progress.complete:
+            self._finish_highlight(tracked.pop(highlight_id))
+    
+    def _is_unchanged(self, highlight: HighlightProgress) -> bool:
+        """
+        Check if a highlight can be skipped without listing its items
+        
+        Args:
+            highlight: Counters of the highlight with its listing state
             
-            if total_items > 0:
-                self.progress.write(f"  ✓ {items_downloaded} items, {items_failed} failed")
-            else:
-                self.progress.write(f"  ⚠  No items found")
+        Returns:
+            True if incremental and the listing matches the last complete backup
+        """
+        if not self.skip_existing or self.manifest is None:
+            return False
+        return self.manifest.is_highlight_unchanged(
+            highlight.highlight_id, highlight.directory, highlight.state
+        )
+    
+    def _is_before_date_window(self, highlight: HighlightProgress) -> bool:
+        """
+        Check if a highlight's listing shows all its items predate min_date
+        
+        Args:
+            highlight: Counters of the highlight with its listing state
             
-            self.logger.info(
-                f"Highlight '{highlight.title}': {items_downloaded} succeeded, {items_failed} failed"
+        Returns:
+            True if its items need not be listed
+        """
+        if self.config_loader is None or highlight.state is None or highlight.state.latest_media is None:
+            return False
+        latest = datetime.utcfromtimestamp(highlight.state.latest_media)
+        return self.config_loader.is_before_date_window(latest)
+    
+    def _count_filtered(self, highlight: HighlightProgress, count: int) -> None:
+        """
+        Count items of a highlight left out by date/type filters
+        
+        Args:
+            highlight: Counters of the highlight
+            count: Number of items filtered out
+        """
+        highlight.filtered += count
+        self.stats.add_filtered(count)
+    
+    def _finish_highlight(self, highlight: HighlightProgress) -> None:
+        """
+        Report a highlight whose items are all processed
+        
+        A highlight backed up completely (no failures, nothing filtered out)
+        has its listing state stored so the next run can skip it while it
+        stays unchanged.
+        
+        Args:
+            highlight: Counters of the finished highlight
+        """
+        # Files must be on disk before the highlight is recorded as backed up
+        self.syncer.flush(highlight.directory)
+        
+        result = highlight.result
+        if result == "downloaded":
+            self.stats.highlights_downloaded += 1
+        elif result == "skipped":
+            self.stats.highlights_skipped += 1
+        else:
+            self.stats.highlights_failed += 1
+        
+        if highlight.unchanged:
+            self.stats.highlights_unchanged += 1
+        elif (
+            result != "failed"
+            and highlight.filtered == 0
+            and not highlight.before_date_window
+            and highlight.state is not None
+            and self.manifest is not None
+        ):
+            self.manifest.record_highlight(highlight.highlight_id, highlight.directory, highlight.state)
+        
+        total_items = highlight.succeeded + highlight.failed
+        
+        if highlight.unchanged:
+            self.progress.write(f"📁 {highlight.title}  ⊘ Unchanged since last backup")
+        elif highlight.before_date_window:
+            self.progress.write(f"📁 {highlight.title}  ⊘ No items after min_date")
+        elif highlight.error is not None:
+            self.progress.write(f"📁 {highlight.title}  ⚠  No accessible items (may be expired)")
+        elif total_items > 0:
+            filtered = f", {highlight.filtered} filtered out" if highlight.filtered else ""
+            self.progress.write(
+                f"📁 {highlight.title}  ✓ {highlight.succeeded} items, {highlight.failed} failed{filtered}"
             )
-            
-            if items_downloaded > 0:
-                return "downloaded"
-            elif items_failed == 0:
-                return "skipped"
-            else:
-                return "failed"
-            
-        except Exception as e:
-            self.logger.error(f"Error downloading highlight {highlight.title}: {e}", exc_info=True)
-            self.progress.write(f"  ✗ Error: {str(e)[:50]}")
-            self.stats.add_error(f"Highlight '{highlight.title}': {str(e)[:50]}")
-            return "failed"
+        elif highlight.filtered > 0:
+            self.progress.write(f"📁 {highlight.title}  ⊘ {highlight.filtered} items filtered out")
+        else:
+            self.progress.write(f"📁 {highlight.title}  ⚠  No items found")
+        
+        self.logger.info(
+            f"Highlight '{highlight.title}': {highlight.succeeded} succeeded, {highlight.failed} failed"
+        )
     
     def _download_highlight_native(self, highlight: instaloader.Highlight, target_dir: Path) -> None:
         """
@@ -231,42 +600,6 @@ class HighlightsDownloader:
             self.logger.error(f"Native download failed: {e}")
             raise
     
-    def _download_item(self, item: instaloader.StoryItem, target_dir: Path) -> str:
-        """
-        Download a single story item
-        
-        Args:
-            item: Story item to download
-            target_dir: Target directory
-            
-        Returns:
-            Status: "downloaded", "skipped", or "failed"
-        """
-        try:
-            # Check if file already exists (incremental backup)
-            if self.skip_existing:
-                date_str = item.date_utc.strftime('%Y-%m-%d_%H-%M-%S_UTC')
-                video_file = target_dir / f"{date_str}.mp4"
-                jpg_file = target_dir / f"{date_str}.jpg"
-                
-                if video_file.exists() or jpg_file.exists():
-                    self.logger.debug(f"Skipping existing item: {date_str}")
-                    return "skipped"
-            
-            # Change to target directory to avoid path issues
-            original_dir = os.getcwd()
-            os.chdir(target_dir)
-            
-            try:
-                self.loader.download_storyitem(item, '.')
-            finally:
-                os.chdir(original_dir)
-            
-            return "downloaded"
-        except Exception as e:
-            self.logger.warning(f"Failed to download item: {e}")
-            return "failed"
-    
     def _get_highlight_dir(self, username: str, highlight_title: str) -> Path:
         """
         Get directory path for highlight
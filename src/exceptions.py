@@ -21,6 +21,11 @@ class DownloadError(IGSaverException):
     pass
 
 
+class RateLimitError(DownloadError):
+    """Raised when Instagram throttles requests"""
+    pass
+
+
 class ProfileError(IGSaverException):
     """Raised when profile operations fail"""
     pass
@@ -0,0 +1,344 @@
+"""Concurrent download of story items into explicit target directories"""
+
+import json
+import logging
+import lzma
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+import instaloader
+from instaloader.structures import get_json_structure
+
+from .exceptions import DownloadError, RateLimitError
+from .manifest import DownloadManifest
+from .media_file import CHUNK_SIZE, TargetNames, media_extension, parse_content_range
+from .rate_limiter import RateLimiter
+from .dedupe import BlobStore
+from .progress import ProgressTracker
+from .size_filter import probe_with_session
+from .storage import LocalStorage, StorageBackend
+from .tracing import tracer
+
+
+class ItemDownloader:
+    """Download story items with a bounded pool of worker threads"""
+
+    def __init__(
+        self,
+        loader: instaloader.Instaloader,
+        skip_existing: bool = True,
+        max_workers: int = 1,
+        manifest: Optional[DownloadManifest] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0,
+        blob_store: Optional[BlobStore] = None,
+        progress: Optional[ProgressTracker] = None,
+        storage: Optional[StorageBackend] = None
+    ) -> None:
+        """
+        Initialize item downloader
+
+        Args:
+            loader: Authenticated Instaloader instance
+            skip_existing: If True, skip already downloaded files
+            max_workers: Maximum number of items downloaded at once
+            manifest: Optional download manifest used for skip checks
+            rate_limiter: Optional limiter pacing and retrying item requests
+            max_retries: Retries per item after a failed attempt
+            blob_store: Optional store deduplicating downloaded media
+            progress: Optional progress tracker receiving transferred bytes
+            storage: Backend receiving written files (default: local filesystem)
+        """
+        self.loader = loader
+        self.skip_existing = skip_existing
+        self.max_workers = max(1, int(max_workers or 1))
+        self.manifest = manifest
+        self.rate_limiter = rate_limiter or RateLimiter(None)
+        self.max_retries = max_retries
+        self.blob_store = blob_store
+        self.progress = progress or ProgressTracker(disable=True)
+        self.storage = storage or LocalStorage()
+        self.names = TargetNames(manifest.owner if manifest is not None else None)
+        self.logger = logging.getLogger(__name__)
+
+    def download(self, item: instaloader.StoryItem, target_dir: Path) -> Tuple[str, int]:
+        """
+        Download a single story item into target directory
+
+        Safe to call from several threads at once: files are written to
+        paths built from target_dir, the working directory is never changed.
+
+        Args:
+            item: Story item to download
+            target_dir: Target directory
+
+        Returns:
+            (status, size): status is "downloaded", "skipped", or "failed",
+            size the number of bytes of the media file written
+        """
+        try:
+            if self.skip_existing and self._already_downloaded(item, target_dir):
+                return "skipped", 0
+
+            with tracer.span("item", media_id=item.mediaid):
+                media_file, size = self.rate_limiter.call(
+                    lambda: self._write_item(item, target_dir), self.max_retries
+                )
+                if media_file is not None:
+                    with tracer.span("write"):
+                        if self.blob_store is not None:
+                            self.blob_store.add(media_file)
+                        if self.manifest is not None:
+                            self.manifest.record(
+                                item.mediaid,
+                                media_file,
+                                size,
+                                "video" if item.is_video else "photo"
+                            )
+            return "downloaded", size
+        except Exception as e:
+            self.logger.warning(f"Failed to download item: {e}")
+            return "failed", 0
+
+    def register(self, items: Iterable[instaloader.StoryItem], target_dir: Path) -> None:
+        """
+        Announce the listed items of a directory before any is downloaded
+
+        Items posted in the same second are then named by media id, not by
+        the order their downloads finish in (see TargetNames).
+
+        Args:
+            items: Listed items (filtered ones included)
+            target_dir: Target directory
+        """
+        for item in items:
+            self.names.register(self._target_name(item, target_dir), item.mediaid)
+
+    def probe_size(self, item: instaloader.StoryItem, target_dir: Path) -> Optional[int]:
+        """
+        Get the size of the media download() would fetch, without its body
+
+        Args:
+            item: Story item
+            target_dir: Target directory
+
+        Returns:
+            Size in bytes, or None if unknown or the item is skipped anyway
+        """
+        if self.skip_existing and self._already_downloaded(item, target_dir):
+            return None
+
+        url = item.video_url if item.is_video and self.loader.download_videos is True else item.url
+        session = self.loader.context.get_anonymous_session()
+        try:
+            with tracer.span("probe", media_id=item.mediaid):
+                return probe_with_session(session, url)
+        finally:
+            session.close()
+
+    def _already_downloaded(self, item: instaloader.StoryItem, target_dir: Path) -> bool:
+        """
+        Check if item exists in target directory (incremental backup)
+
+        Uses the manifest when available, which needs no filesystem access;
+        otherwise falls back to looking for a file named after the item date.
+
+        Args:
+            item: Story item to check
+            target_dir: Target directory
+
+        Returns:
+            True if item was already downloaded
+        """
+        if self.manifest is not None:
+            if self.manifest.contains(item.mediaid, target_dir):
+                self.logger.debug(f"Skipping item in manifest: {item.mediaid}")
+                return True
+            return False
+
+        date_str = item.date_utc.strftime('%Y-%m-%d_%H-%M-%S_UTC')
+        video_file = target_dir / f"{date_str}.mp4"
+        jpg_file = target_dir / f"{date_str}.jpg"
+
+        if self.storage.exists(video_file) or self.storage.exists(jpg_file):
+            self.logger.debug(f"Skipping existing item: {date_str}")
+            return True
+        return False
+
+    def download_many(
+        self,
+        jobs: Iterable[Tuple[Any, instaloader.StoryItem, Path]]
+    ) -> Iterator[Tuple[Any, str, int]]:
+        """
+        Download items concurrently
+
+        Jobs are pulled lazily, so at most a couple of items per worker are
+        in flight at any time. Results are yielded in completion order and
+        in the calling thread, so callers can update counters without locks.
+
+        Args:
+            jobs: Iterable of (tag, item, target_dir) tuples
+
+        Yields:
+            (tag, status, size) for every job, as returned by download()
+        """
+        if self.max_workers == 1:
+            for tag, item, target_dir in jobs:
+                yield (tag, *self.download(item, target_dir))
+            return
+
+        max_pending = self.max_workers * 2
+        pending: Dict[Future, Any] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="igsaver-item") as executor:
+            try:
+                for tag, item, target_dir in jobs:
+                    if len(pending) >= max_pending:
+                        yield from self._collect(pending, FIRST_COMPLETED)
+                    pending[executor.submit(self.download, item, target_dir)] = tag
+
+                while pending:
+                    yield from self._collect(pending, FIRST_COMPLETED)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _collect(self, pending: Dict[Future, Any], return_when: str) -> Iterator[Tuple[Any, str, int]]:
+        """
+        Wait for pending downloads and yield finished ones
+
+        Args:
+            pending: Mapping of future to job tag (finished entries are removed)
+            return_when: concurrent.futures wait condition
+
+        Yields:
+            (tag, status, size) for each finished future
+        """
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            tag = pending.pop(future)
+            yield (tag, *future.result())
+
+    def _write_item(self, item: instaloader.StoryItem, target_dir: Path) -> Tuple[Optional[Path], int]:
+        """
+        Write media and metadata of an item into target directory
+
+        Mirrors Instaloader.download_storyitem, but resolves the filename
+        against target_dir instead of the process working directory, items
+        posted in the same second get distinct names, and every file is
+        renamed into place only once complete.
+
+        Args:
+            item: Story item to write
+            target_dir: Target directory
+
+        Returns:
+            (path, size) of the main media file, path None if no media was written
+        """
+        self.storage.makedirs(target_dir)
+        filename = self.names.resolve(self._target_name(item, target_dir), item.mediaid)
+        mtime = item.date_local
+        media_file: Optional[Path] = None
+        size = 0
+
+        video_url_fetch_failed = False
+        if item.is_video and self.loader.download_videos is True:
+            video_url = item.video_url
+            if video_url:
+                with tracer.span("media"):
+                    media_file, size = self._download_media(filename, video_url, mtime)
+            else:
+                video_url_fetch_failed = True
+
+        if video_url_fetch_failed or not item.is_video or self.loader.download_video_thumbnails is True:
+            with tracer.span("media"):
+                picture_file, picture_size = self._download_media(filename, item.url, mtime)
+            if media_file is None:
+                media_file, size = picture_file, picture_size
+
+        if self.loader.save_metadata is not False:
+            with tracer.span("write"):
+                self._write_metadata(filename, item)
+
+        return media_file, size
+
+    def _target_name(self, item: instaloader.StoryItem, target_dir: Path) -> str:
+        """Date-based target path of an item, without extension"""
+        return str(target_dir / self.loader.format_filename(item))
+
+    def _write_metadata(self, filename: str, item: instaloader.StoryItem) -> None:
+        """
+        Write the JSON sidecar of an item, atomically
+
+        Same content as Instaloader.save_metadata_json, which writes in place.
+
+        Args:
+            filename: Target path without extension
+            item: Story item
+        """
+        structure = get_json_structure(item)
+        if self.loader.compress_json:
+            data = lzma.compress(json.dumps(structure, separators=(',', ':')).encode(), check=lzma.CHECK_NONE)
+            self.storage.write_file(Path(filename + '.json.xz'), data)
+        else:
+            self.storage.write_file(Path(filename + '.json'), json.dumps(structure, indent=4, sort_keys=True).encode())
+
+    def _download_media(self, filename: str, url: str, mtime: datetime) -> Tuple[Path, int]:
+        """
+        Download a media URL to filename plus the extension of its content
+
+        The body is streamed to the storage backend. Locally it goes to a
+        .part file first; if an earlier attempt left one behind, only the
+        missing byte range is requested, and the file is renamed into place
+        once its length matches the announced size.
+
+        Args:
+            filename: Target path without extension
+            url: Media URL
+            mtime: Modification time to set on the file
+
+        Returns:
+            (path, size) of the written file
+        """
+        offset = self.storage.resume_offset(filename, url)
+        session = self.loader.context.get_anonymous_session()
+
+        try:
+            # Identity encoding keeps byte offsets and Content-Length comparable
+            headers = {'Accept-Encoding': 'identity'}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+            resp = session.get(url, stream=True, headers=headers)
+
+            if resp.status_code == 416:
+                # Part file is not a prefix of this media, start over
+                self.storage.discard_partial(filename, url)
+                raise DownloadError(f"Range not satisfiable for {url}")
+            if resp.status_code == 403:
+                raise instaloader.exceptions.QueryReturnedForbiddenException(f"403 Forbidden: {url}")
+            if resp.status_code == 404:
+                raise instaloader.exceptions.QueryReturnedNotFoundException(f"404 Not Found: {url}")
+            if resp.status_code == 429:
+                raise RateLimitError(f"429 Too Many Requests: {url}")
+            if resp.status_code not in (200, 206):
+                raise DownloadError(f"HTTP {resp.status_code} when fetching {url}")
+
+            start, total = parse_content_range(
+                resp.status_code,
+                resp.headers.get('Content-Range'),
+                resp.headers.get('Content-Length')
+            )
+            self.progress.expect_bytes(None if total is None else total - start)
+            extension = media_extension(resp.headers.get('Content-Type'), url)
+            writer = self.storage.open_media(filename, extension, start, url)
+            try:
+                for chunk in iter(lambda: resp.raw.read(CHUNK_SIZE), b''):
+                    writer.write(chunk)
+                    self.progress.add_bytes(len(chunk))
+            except BaseException:
+                writer.abort()
+                raise
+            return writer.finish(total, mtime)
+        finally:
+            session.close()
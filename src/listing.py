@@ -0,0 +1,196 @@
+"""Metadata-only listing of highlights (--list)"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .constants import (
+    ESTIMATED_PHOTO_BYTES,
+    ESTIMATED_VIDEO_BYTES,
+    ESTIMATED_VIDEO_BYTES_PER_SECOND,
+)
+from .manifest import DownloadManifest
+from .progress import format_bytes
+from .transport import MediaInfo
+
+
+@dataclass
+class HighlightListing:
+    """What a highlight contains, from item metadata only"""
+    highlight_id: int
+    title: str
+    items: int = 0
+    videos: int = 0
+    newest: Optional[datetime] = None
+    oldest: Optional[datetime] = None
+    estimated_bytes: int = 0
+    backed_up: int = 0
+    error: Optional[str] = None
+
+    @property
+    def photos(self) -> int:
+        """Number of photo items"""
+        return self.items - self.videos
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Express listing as JSON-serializable dict"""
+        return {
+            "id": str(self.highlight_id),
+            "title": self.title,
+            "items": self.items,
+            "videos": self.videos,
+            "photos": self.photos,
+            "newest": self.newest.isoformat() if self.newest else None,
+            "oldest": self.oldest.isoformat() if self.oldest else None,
+            "estimated_bytes": self.estimated_bytes,
+            "backed_up": self.backed_up,
+            "error": self.error,
+        }
+
+
+class SizeEstimator:
+    """
+    Estimate media sizes without downloading anything
+
+    Items already in the manifest report their real size. Others are
+    estimated from the average size of that media type in this backup,
+    or, for a backup without such downloads, from fixed defaults (videos
+    scaled by their duration when Instagram reports it).
+    """
+
+    def __init__(self, manifest: Optional[DownloadManifest] = None) -> None:
+        """
+        Initialize estimator
+
+        Args:
+            manifest: Optional download manifest of the backup
+        """
+        self.manifest = manifest
+        self.averages = manifest.average_sizes() if manifest is not None else {}
+
+    def summarize(
+        self,
+        highlight_id: int,
+        title: str,
+        items: Iterable[MediaInfo],
+        directory: Path
+    ) -> HighlightListing:
+        """
+        Build the listing of one highlight
+
+        Args:
+            highlight_id: Instagram highlight id
+            title: Highlight title
+            items: Item metadata
+            directory: Directory the highlight is backed up to
+
+        Returns:
+            Highlight listing
+        """
+        listing = HighlightListing(highlight_id, title)
+        for item in items:
+            listing.items += 1
+            listing.videos += item.is_video
+            listing.newest = max(filter(None, (listing.newest, item.date_utc)))
+            listing.oldest = min(filter(None, (listing.oldest, item.date_utc)))
+
+            stored = None
+            if self.manifest is not None:
+                stored = self.manifest.stored_size(item.media_id, directory)
+            if stored is not None:
+                listing.backed_up += 1
+                listing.estimated_bytes += stored
+            else:
+                listing.estimated_bytes += self.estimate(item)
+        return listing
+
+    def estimate(self, item: MediaInfo) -> int:
+        """
+        Estimate the size of an item not downloaded yet
+
+        Args:
+            item: Item metadata
+
+        Returns:
+            Estimated bytes
+        """
+        if item.is_video:
+            if "video" in self.averages:
+                return int(self.averages["video"])
+            duration = item.node.get("video_duration")
+            if duration:
+                return int(float(duration) * ESTIMATED_VIDEO_BYTES_PER_SECOND)
+            return ESTIMATED_VIDEO_BYTES
+        return int(self.averages.get("photo", ESTIMATED_PHOTO_BYTES))
+
+
+def format_table(username: str, listings: List[HighlightListing]) -> str:
+    """
+    Format listings as a table with a totals line
+
+    Args:
+        username: Instagram username
+        listings: Listings of the profile's highlights
+
+    Returns:
+        Table text
+    """
+    header = ["Highlight", "Items", "Videos", "Newest", "Oldest", "Size (est.)", "Backed up"]
+    rows = []
+    for listing in listings:
+        if listing.error is not None:
+            rows.append([listing.title, "-", "-", "-", "-", "-", f"error: {listing.error[:30]}"])
+            continue
+        rows.append([
+            listing.title,
+            str(listing.items),
+            str(listing.videos),
+            listing.newest.strftime("%Y-%m-%d") if listing.newest else "-",
+            listing.oldest.strftime("%Y-%m-%d") if listing.oldest else "-",
+            format_bytes(listing.estimated_bytes),
+            f"{listing.backed_up}/{listing.items}",
+        ])
+
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    lines = [f"\nHighlights of {username}:"]
+    for row in [header] + rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  " + "  ".join(cells))
+
+    items = sum(listing.items for listing in listings)
+    videos = sum(listing.videos for listing in listings)
+    size = sum(listing.estimated_bytes for listing in listings)
+    backed_up = sum(listing.backed_up for listing in listings)
+    lines.append(
+        f"\n{len(listings)} highlights, {items} items ({videos} videos), "
+        f"~{format_bytes(size)}, {backed_up} already backed up"
+    )
+    return "\n".join(lines)
+
+
+def to_json(username: str, listings: List[HighlightListing], requests: int) -> str:
+    """
+    Format listings as a JSON document
+
+    Args:
+        username: Instagram username
+        listings: Listings of the profile's highlights
+        requests: Requests issued to produce the listing
+
+    Returns:
+        JSON text
+    """
+    return json.dumps({
+        "username": username,
+        "highlights": [listing.to_dict() for listing in listings],
+        "totals": {
+            "highlights": len(listings),
+            "items": sum(listing.items for listing in listings),
+            "videos": sum(listing.videos for listing in listings),
+            "estimated_bytes": sum(listing.estimated_bytes for listing in listings),
+            "backed_up": sum(listing.backed_up for listing in listings),
+        },
+        "requests": requests,
+    }, indent=2)
@@ -9,6 +9,14 @@ from datetime import datetime
 from .constants import LOG_FORMAT, LOG_DATE_FORMAT, LOGS_DIR
 
 
+class _DirectoryCreatingFileHandler(logging.FileHandler):
+    """File handler creating the log directory when the file is opened"""
+    
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
 class Logger:
     """Application logger"""
     
@@ -57,11 +65,11 @@ class Logger:
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
         
-        # File handler
+        # File handler (the file and its directory are created with the first record)
         if log_file is None:
             log_file = LOGS_DIR / f"igsaver_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         
-        file_handler = logging.FileHandler(log_file)
+        file_handler = _DirectoryCreatingFileHandler(log_file, delay=True)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 """Main entry point for IGsaver application"""
 
+import contextlib
 import sys
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from .app import IGSaver
 from .cli import CLI
 from .ui import UI
-from .exceptions import IGSaverException
-from .summary import SummaryReport
+from .exceptions import IGSaverException, ConfigurationError
 from .constants import APP_DESCRIPTION
 
+# Heavy modules (instaloader, requests, yaml, tqdm) are imported once a
+# command needs them, so --help, --version and dedupe start quickly
+if TYPE_CHECKING:
+    from .app import IGSaver
+    from .summary import BackupStats
+
 
 def main(args: Optional[list] = None) -> int:
     """
@@ -35,27 +40,61 @@ def main(args: Optional[list] = None) -> int:
         elif parsed_args.quiet:
             logging.getLogger().setLevel(logging.ERROR)
         
-        # Print header (unless quiet mode)
-        if not parsed_args.quiet:
+        # Print header (unless quiet mode or output meant for scripts)
+        if not parsed_args.quiet and not parsed_args.json and parsed_args.command != 'ls':
             UI.print_header(APP_DESCRIPTION)
         
+        # Converting a tree needs neither a session nor a downloader
+        if parsed_args.command == 'dedupe':
+            return run_dedupe(parsed_args)
+        
+        # Archives are read through their index alone
+        if parsed_args.command == 'ls':
+            return run_ls(parsed_args)
+        if parsed_args.command == 'extract':
+            return run_extract(parsed_args)
+        
+        from .app import IGSaver
+        from .summary import SummaryReport
+        from .tracing import tracer
+        
+        # Spans are only recorded when an export was requested
+        if parsed_args.trace or parsed_args.metrics_file:
+            tracer.enable()
+        
         # Create app with configuration
         app = IGSaver(
             output_dir=parsed_args.output,
             skip_existing=not parsed_args.force,
             show_progress=not parsed_args.no_progress and not parsed_args.quiet,
-            config_file=Path("config.yaml") if Path("config.yaml").exists() else None
+            config_file=Path("config.yaml") if Path("config.yaml").exists() else None,
+            rebuild_manifest=parsed_args.rebuild_manifest,
+            refresh_cache=parsed_args.refresh
         )
         
         # Override auth username if specified
         if parsed_args.auth_username:
             app.config._username = parsed_args.auth_username
         
+        if parsed_args.command == 'batch':
+            return run_batch(app, parsed_args)
+        
+        if parsed_args.command == 'watch':
+            return run_watch(app, parsed_args)
+        
         # Determine target username
         target_username = parsed_args.username
         
+        if parsed_args.list:
+            return run_list(app, parsed_args)
+        
         # Run backup (stories or highlights)
-        stats = app.run(target_username, download_stories=parsed_args.stories)
+        try:
+            stats = app.run(target_username, download_stories=parsed_args.stories)
+        finally:
+            app.close()
+        
+        export_traces(parsed_args, stats)
         
         # Show summary (unless quiet mode)
         if not parsed_args.quiet:
@@ -85,6 +124,247 @@ def main(args: Optional[list] = None) -> int:
         return 1
 
 
+def read_targets(path: Path) -> List[str]:
+    """
+    Read usernames from a targets file
+    
+    Args:
+        path: File with one username per line ('#' starts a comment)
+        
+    Returns:
+        List of usernames
+        
+    Raises:
+        ConfigurationError: If the file cannot be read
+    """
+    try:
+        with open(path, 'r') as f:
+            lines = [line.split('#', 1)[0].strip() for line in f]
+    except OSError as e:
+        raise ConfigurationError(f"Cannot read targets file {path}: {e}")
+    return [line for line in lines if line]
+
+
+def run_list(app: "IGSaver", parsed_args) -> int:
+    """
+    Print the highlights of a profile without downloading media
+    
+    With --json, all progress output goes to stderr so stdout holds
+    only the JSON document.
+    
+    Args:
+        app: Application instance
+        parsed_args: Parsed command-line arguments
+        
+    Returns:
+        Exit code (1 if any highlight could not be listed)
+    """
+    from .listing import format_table, to_json
+    
+    try:
+        if parsed_args.json:
+            with contextlib.redirect_stdout(sys.stderr):
+                listings, requests = app.list_highlights(parsed_args.username)
+        else:
+            listings, requests = app.list_highlights(parsed_args.username)
+    finally:
+        app.close()
+    
+    username = parsed_args.username or app.authenticated_username
+    if parsed_args.json:
+        print(to_json(username, listings, requests))
+    else:
+        print(format_table(username, listings))
+        if not parsed_args.quiet:
+            UI.print_info(f"Listed with {requests} requests, no media downloaded")
+    
+    return 1 if any(listing.error is not None for listing in listings) else 0
+
+
+def run_batch(app: "IGSaver", parsed_args) -> int:
+    """
+    Run the batch command
+    
+    Args:
+        app: Application instance
+        parsed_args: Parsed batch arguments
+        
+    Returns:
+        Exit code (0 for success, 1 if any profile failed completely)
+    """
+    if parsed_args.file:
+        targets = read_targets(parsed_args.file)
+    else:
+        targets = app.config_loader.targets
+    
+    if not targets:
+        raise ConfigurationError("No targets: pass a file or add a targets list to config.yaml")
+    
+    from .summary import SummaryReport
+    
+    try:
+        total, per_profile = app.run_batch(
+            targets,
+            download_stories=parsed_args.stories,
+            parallelism=parsed_args.parallel
+        )
+    finally:
+        app.close()
+    
+    export_traces(parsed_args, total)
+    
+    if not parsed_args.quiet:
+        output_dir = parsed_args.output or app.config.backup_dir
+        print(SummaryReport.generate_batch(total, per_profile, output_dir))
+    
+    for stats in per_profile.values():
+        if stats.items_downloaded == 0 and (stats.errors or stats.items_failed > 0):
+            return 1
+    
+    return 0
+
+
+def run_watch(app: "IGSaver", parsed_args) -> int:
+    """
+    Run the watch command until interrupted
+    
+    Args:
+        app: Application instance
+        parsed_args: Parsed watch arguments
+        
+    Returns:
+        Exit code (0 for success)
+    """
+    if parsed_args.file:
+        targets = read_targets(parsed_args.file)
+    else:
+        targets = app.config_loader.targets
+    
+    if not targets:
+        raise ConfigurationError("No targets: pass a file or add a targets list to config.yaml")
+    
+    if parsed_args.budget is not None:
+        app.config_loader.watch.max_requests_per_hour = parsed_args.budget
+    
+    from .summary import SummaryReport
+    
+    try:
+        stats = app.watch(targets, once=parsed_args.once)
+    except KeyboardInterrupt:
+        UI.print_info("\nStopped watching, schedule saved")
+        return 0
+    finally:
+        app.close()
+    
+    export_traces(parsed_args, stats)
+    
+    if not parsed_args.quiet:
+        output_dir = parsed_args.output or app.config.backup_dir
+        print(SummaryReport.generate(stats, f"{len(targets)} watched profiles", output_dir))
+    return 0
+
+
+def export_traces(parsed_args, stats: "BackupStats") -> None:
+    """
+    Write the trace files requested on the command line
+    
+    Args:
+        parsed_args: Parsed arguments
+        stats: Statistics of the finished run
+    """
+    from .tracing import tracer
+    
+    if parsed_args.trace:
+        tracer.export_chrome(parsed_args.trace)
+        logging.getLogger(__name__).info(f"Trace written to {parsed_args.trace}")
+    if parsed_args.metrics_file:
+        tracer.export_prometheus(parsed_args.metrics_file, stats)
+        logging.getLogger(__name__).info(f"Metrics written to {parsed_args.metrics_file}")
+
+
+def run_dedupe(parsed_args) -> int:
+    """
+    Run the dedupe command
+    
+    Args:
+        parsed_args: Parsed dedupe arguments
+        
+    Returns:
+        Exit code (0 for success)
+        
+    Raises:
+        ConfigurationError: If the backups directory does not exist
+    """
+    from .config import Config
+    from .dedupe import BlobStore
+    
+    backup_dir = parsed_args.output or Config().backup_dir
+    if not backup_dir.is_dir():
+        raise ConfigurationError(f"Backups directory not found: {backup_dir}")
+    
+    if not parsed_args.quiet:
+        UI.print_info(f"Deduplicating media in {backup_dir}...")
+    stats = BlobStore(backup_dir).dedupe_tree()
+    
+    if not parsed_args.quiet:
+        UI.print_success(
+            f"{stats.files_linked} of {stats.files_scanned} files linked to existing copies, "
+            f"{stats.saved_str} freed"
+        )
+    return 0
+
+
+def run_ls(parsed_args) -> int:
+    """
+    Run the ls command
+    
+    Args:
+        parsed_args: Parsed ls arguments
+        
+    Returns:
+        Exit code (0 for success)
+    """
+    from datetime import datetime
+    from .archive import TarArchive
+    
+    archive = TarArchive(parsed_args.archive, create=False)
+    try:
+        for member in archive.members(parsed_args.prefix):
+            if parsed_args.long:
+                mtime = datetime.fromtimestamp(member.mtime).strftime('%Y-%m-%d %H:%M')
+                print(f"{member.size:>12}  {mtime}  {member.name}")
+            else:
+                print(member.name)
+    finally:
+        archive.close()
+    return 0
+
+
+def run_extract(parsed_args) -> int:
+    """
+    Run the extract command
+    
+    Args:
+        parsed_args: Parsed extract arguments
+        
+    Returns:
+        Exit code (0 for success)
+    """
+    from .archive import TarArchive, archive_root, extract
+    
+    archive = TarArchive(parsed_args.archive, create=False)
+    target_dir = parsed_args.directory or archive_root(parsed_args.archive)
+    
+    try:
+        count = extract(archive, target_dir, parsed_args.members)
+    finally:
+        archive.close()
+    
+    if not parsed_args.quiet:
+        UI.print_success(f"{count} files extracted to {target_dir}")
+    return 0
+
+
 def cli_entry() -> None:
     """Command-line entry point"""
     sys.exit(main())
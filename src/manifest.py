@@ -0,0 +1,447 @@
+"""Persistent manifest of downloaded media"""
+
+import json
+import logging
+import lzma
+import os
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .constants import MANIFEST_FILENAME
+from .exceptions import DownloadError
+
+
+@dataclass(frozen=True)
+class HighlightState:
+    """Change markers of a highlight as shown in the highlight listing"""
+    latest_media: Optional[int] = None
+    item_count: Optional[int] = None
+    cover_id: Optional[str] = None
+
+    @classmethod
+    def from_node(cls, node: Dict[str, Any]) -> "HighlightState":
+        """
+        Read change markers from a highlight listing node
+
+        Args:
+            node: Highlight node as returned by Instagram
+
+        Returns:
+            HighlightState (fields missing from the node are None)
+        """
+        latest = node.get('latest_reel_media')
+        count = node.get('media_count')
+        cover = node.get('cover_media') or {}
+        cover_id = cover.get('id')
+        if cover_id is None and cover.get('thumbnail_src'):
+            # CDN query strings expire, the file name identifies the image
+            cover_id = urlsplit(cover['thumbnail_src']).path.rsplit('/', 1)[-1]
+
+        return cls(
+            latest_media=None if latest is None else int(latest),
+            item_count=None if count is None else int(count),
+            cover_id=None if cover_id is None else str(cover_id),
+        )
+
+    @property
+    def comparable(self) -> bool:
+        """True if new items would change this state (timestamp or count known)"""
+        return self.latest_media is not None or self.item_count is not None
+
+
+class DownloadManifest:
+    """
+    SQLite manifest of downloaded media, stored in the backup root
+
+    Entries are keyed by media id and the directory (relative to the backup
+    root) the media was saved to, so the same item saved to stories and to
+    a highlight is tracked once per location.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS media (
+            media_id      TEXT NOT NULL,
+            directory     TEXT NOT NULL,
+            path          TEXT NOT NULL,
+            size          INTEGER NOT NULL,
+            media_type    TEXT NOT NULL,
+            downloaded_at TEXT NOT NULL,
+            PRIMARY KEY (media_id, directory)
+        )
+    """
+
+    HIGHLIGHTS_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS highlights (
+            highlight_id TEXT PRIMARY KEY,
+            directory    TEXT NOT NULL,
+            latest_media INTEGER,
+            item_count   INTEGER,
+            cover_id     TEXT,
+            backed_up_at TEXT NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        backup_dir: Path,
+        directory_exists: Optional[Callable[[Path], bool]] = None,
+        publish: Optional[Callable[[Path], None]] = None,
+        publish_every: int = 0
+    ) -> None:
+        """
+        Open (or create) the manifest for a backup root
+
+        Args:
+            backup_dir: Backup root directory
+            directory_exists: Check for highlight directories (default: local
+                filesystem; remote storage backends pass their own)
+            publish: Optional upload of a consistent copy of the manifest
+                (remote storage backends), called by publish_snapshot()
+            publish_every: Publish a snapshot after this many new records
+                (0: only when publish_snapshot() is called)
+        """
+        self.backup_dir = backup_dir
+        self.directory_exists = directory_exists or Path.is_dir
+        self.path = backup_dir / MANIFEST_FILENAME
+        self.publish = publish
+        self.publish_every = publish_every
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._unpublished = 0
+
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        self.created = not self.path.exists()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(self.SCHEMA)
+            self._conn.execute(self.HIGHLIGHTS_SCHEMA)
+
+    def contains(self, media_id: str, directory: Path) -> bool:
+        """
+        Check if media was already downloaded to directory
+
+        Args:
+            media_id: Instagram media id
+            directory: Target directory of the item
+
+        Returns:
+            True if an entry exists
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM media WHERE media_id = ? AND directory = ?",
+                (str(media_id), self._relative(directory))
+            ).fetchone()
+        return row is not None
+
+    def stored_size(self, media_id: str, directory: Path) -> Optional[int]:
+        """
+        Get size of media already downloaded to directory
+
+        Args:
+            media_id: Instagram media id
+            directory: Target directory of the item
+
+        Returns:
+            File size in bytes, or None if not downloaded
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM media WHERE media_id = ? AND directory = ?",
+                (str(media_id), self._relative(directory))
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def owner(self, filename: str) -> Optional[str]:
+        """
+        Get the media id stored under a target path by an earlier download
+
+        Args:
+            filename: Target path without extension
+
+        Returns:
+            Media id, or None if no media file was recorded under that name
+        """
+        prefix = self._relative(Path(filename)) + "."
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id FROM media WHERE substr(path, 1, ?) = ? AND instr(substr(path, ?), '/') = 0",
+                (len(prefix), prefix, len(prefix) + 1)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def average_sizes(self) -> Dict[str, float]:
+        """
+        Get average file size per media type
+
+        Returns:
+            Average bytes keyed by "video"/"photo" (types without entries are left out)
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT media_type, AVG(size) FROM media GROUP BY media_type").fetchall()
+        return {media_type: float(average) for media_type, average in rows}
+
+    def record(self, media_id: str, path: Path, size: int, media_type: str) -> None:
+        """
+        Record a downloaded media file (committed immediately)
+
+        Args:
+            media_id: Instagram media id
+            path: Path of the media file
+            size: File size in bytes
+            media_type: "video" or "photo"
+
+        Raises:
+            DownloadError: If the path is already recorded for another media id
+                (one of the two media would be lost)
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT media_id FROM media WHERE path = ? AND media_id != ?",
+                (self._relative(path), str(media_id))
+            ).fetchone()
+            if row is not None:
+                raise DownloadError(f"{path} already holds media {row[0]}, not recording {media_id}")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    str(media_id),
+                    self._relative(path.parent),
+                    self._relative(path),
+                    size,
+                    media_type,
+                    datetime.now().isoformat(timespec='seconds'),
+                )
+            )
+            self._unpublished += 1
+            due = self.publish_every and self._unpublished >= self.publish_every
+
+        if due and self.publish is not None:
+            self.publish_snapshot(wait=False)
+
+    def is_highlight_unchanged(self, highlight_id: int, directory: Path, state: HighlightState) -> bool:
+        """
+        Check if a highlight is unchanged since its last complete backup
+
+        Only listings exposing the latest item timestamp or the item count
+        can prove that nothing was added; others are always re-listed.
+
+        Args:
+            highlight_id: Instagram highlight id
+            directory: Target directory of the highlight
+            state: Change markers from the current listing
+
+        Returns:
+            True if the stored state matches and the directory still exists
+        """
+        if not state.comparable:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT directory, latest_media, item_count, cover_id FROM highlights WHERE highlight_id = ?",
+                (str(highlight_id),)
+            ).fetchone()
+
+        if row is None or row[0] != self._relative(directory):
+            return False
+        return HighlightState(row[1], row[2], row[3]) == state and self.directory_exists(directory)
+
+    def record_highlight(self, highlight_id: int, directory: Path, state: HighlightState) -> None:
+        """
+        Record the listing state of a completely backed up highlight
+
+        Args:
+            highlight_id: Instagram highlight id
+            directory: Target directory of the highlight
+            state: Change markers from the listing the backup was made from
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO highlights VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    str(highlight_id),
+                    self._relative(directory),
+                    state.latest_media,
+                    state.item_count,
+                    state.cover_id,
+                    datetime.now().isoformat(timespec='seconds'),
+                )
+            )
+
+    def count(self) -> int:
+        """
+        Get number of manifest entries
+
+        Returns:
+            Entry count
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM media")
+            self._conn.execute("DELETE FROM highlights")
+
+    def publish_snapshot(self, wait: bool = True) -> bool:
+        """
+        Pass a consistent copy of the manifest to publish
+
+        Committed entries may still sit in the write-ahead log, so the
+        database is copied through the SQLite backup API instead of
+        uploading the file in use. A failed upload is logged, the next
+        snapshot (at the latest on close) includes its entries.
+
+        Args:
+            wait: If False, return at once while another snapshot is published
+
+        Returns:
+            True if a snapshot was published
+        """
+        if self.publish is None or not self._publish_lock.acquire(blocking=wait):
+            return False
+        try:
+            fd, name = tempfile.mkstemp(prefix=f"{MANIFEST_FILENAME}.", suffix=".snapshot", dir=self.backup_dir)
+            os.close(fd)
+            snapshot = Path(name)
+            try:
+                target = sqlite3.connect(name)
+                try:
+                    with self._lock:
+                        self._conn.backup(target)
+                        unpublished, self._unpublished = self._unpublished, 0
+                finally:
+                    target.close()
+                try:
+                    self.publish(snapshot)
+                except Exception as e:
+                    with self._lock:
+                        self._unpublished += unpublished
+                    self.logger.warning(f"Could not publish download manifest: {e}")
+                    return False
+                return True
+            finally:
+                snapshot.unlink(missing_ok=True)
+        finally:
+            self._publish_lock.release()
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def import_tree(self) -> int:
+        """
+        Build manifest entries from an existing backups tree
+
+        Items are identified through the JSON metadata sidecar written next
+        to every media file (".json", or ".json.xz" when compressed); media
+        without a sidecar cannot be keyed by media id and are left out.
+
+        Returns:
+            Number of imported entries
+        """
+        imported = self.import_items(
+            (media_id, media_file, media_file.stat().st_size, is_video)
+            for media_id, media_file, is_video in self._scan_tree()
+        )
+        self.logger.info(f"Imported {imported} manifest entries from {self.backup_dir}")
+        return imported
+
+    def import_items(self, items: Iterable[Tuple[str, Path, int, bool]]) -> int:
+        """
+        Add manifest entries for items found outside the loose tree (archives)
+
+        Args:
+            items: (media_id, media_file, size, is_video) per item
+
+        Returns:
+            Number of imported entries
+        """
+        rows = []
+        for media_id, media_file, size, is_video in items:
+            rows.append((
+                media_id,
+                self._relative(media_file.parent),
+                self._relative(media_file),
+                size,
+                "video" if is_video else "photo",
+                datetime.now().isoformat(timespec='seconds'),
+            ))
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def _scan_tree(self) -> Iterator[Tuple[str, Path, bool]]:
+        """
+        Find downloaded items in the backups tree
+
+        Yields:
+            (media_id, media_file, is_video) for every sidecar with media
+        """
+        patterns = (
+            "*/highlights/*/*.json", "*/highlights/*/*.json.xz",
+            "*/stories/*.json", "*/stories/*.json.xz",
+        )
+        for pattern in patterns:
+            for sidecar in self.backup_dir.glob(pattern):
+                try:
+                    opener = lzma.open if sidecar.name.endswith(".xz") else open
+                    with opener(sidecar, 'rt') as f:
+                        node = json.load(f)["node"]
+                    media_id = str(node["id"])
+                except (OSError, ValueError, KeyError, TypeError, lzma.LZMAError) as e:
+                    self.logger.debug(f"Ignoring sidecar {sidecar}: {e}")
+                    continue
+
+                media_file = self._find_media(sidecar)
+                if media_file is None:
+                    self.logger.debug(f"No media next to {sidecar}")
+                    continue
+
+                yield media_id, media_file, bool(node.get("is_video"))
+
+    @staticmethod
+    def _find_media(sidecar: Path) -> Optional[Path]:
+        """
+        Find media file belonging to a metadata sidecar
+
+        Args:
+            sidecar: Path of the .json or .json.xz sidecar
+
+        Returns:
+            Media file path, or None if missing
+        """
+        stem = sidecar.name[:sidecar.name.rindex(".json")]
+        for extension in (".mp4", ".jpg", ".webp", ".heic", ".png"):
+            candidate = sidecar.with_name(stem + extension)
+            if candidate.exists():
+                return candidate
+        return None
+
+    def _relative(self, path: Path) -> str:
+        """
+        Express path relative to the backup root when possible
+
+        Args:
+            path: Absolute or relative path
+
+        Returns:
+            Path string used as manifest key
+        """
+        try:
+            return path.relative_to(self.backup_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
@@ -0,0 +1,380 @@
+"""Media and sidecar files written through .part files and renamed into place"""
+
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from .exceptions import ConfigurationError, DownloadError
+
+PART_SUFFIX = ".part"
+SOURCE_SUFFIX = ".src"
+CHUNK_SIZE = 64 * 1024
+FSYNC_POLICIES = ("file", "highlight", "none")
+
+
+def media_extension(content_type: Optional[str], url: str) -> str:
+    """
+    Get file extension for downloaded media
+
+    Same rules as Instaloader: the Content-Type header wins, otherwise
+    the extension found in the URL path is used.
+
+    Args:
+        content_type: Content-Type response header
+        url: Media URL
+
+    Returns:
+        Extension including the leading dot
+    """
+    if content_type:
+        extension = '.' + content_type.split(';')[0].split('/')[-1]
+        return extension.lower().replace('jpeg', 'jpg')
+
+    match = re.search('\\.[a-z0-9]*\\?', url)
+    return '.' + (url[-3:] if match is None else match.group(0)[1:-1])
+
+
+def parse_content_range(status: int, content_range: Optional[str], content_length: Optional[str]) -> Tuple[int, Optional[int]]:
+    """
+    Get start offset and total size of a (partial) media response
+
+    Args:
+        status: HTTP status code (200 or 206)
+        content_range: Content-Range response header
+        content_length: Content-Length response header
+
+    Returns:
+        (offset of the first body byte, total size or None if unknown)
+
+    Raises:
+        DownloadError: If a partial response has no usable Content-Range
+    """
+    if status == 206:
+        match = re.match(r'bytes (\d+)-\d+/(\d+|\*)', content_range or '')
+        if not match:
+            raise DownloadError(f"Invalid Content-Range: {content_range}")
+        total = None if match.group(2) == '*' else int(match.group(2))
+        return int(match.group(1)), total
+
+    return 0, int(content_length) if content_length else None
+
+
+def _fsync_path(path: Path) -> None:
+    """Flush a file or directory to disk"""
+    if path.is_dir():
+        if os.name == 'nt':
+            # Directories cannot be opened for fsync on Windows
+            return
+        fd = os.open(path, os.O_RDONLY)
+    else:
+        fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileSyncer:
+    """
+    Apply the output.fsync policy to files renamed into place
+
+    "file" flushes every file to disk before it gets its final name and
+    its directory right after; "highlight" remembers renamed files and
+    flushes them, with their directory, when flush() is called for that
+    directory once a highlight (or a profile's stories) is done; "none"
+    leaves write-back to the operating system.
+    """
+
+    def __init__(self, policy: str = "highlight") -> None:
+        """
+        Initialize syncer
+
+        Args:
+            policy: "file", "highlight" or "none"
+
+        Raises:
+            ConfigurationError: If policy is unknown
+        """
+        if policy not in FSYNC_POLICIES:
+            raise ConfigurationError(f"Unknown fsync policy '{policy}', expected one of {', '.join(FSYNC_POLICIES)}")
+        self.policy = policy
+        self._pending: Dict[Path, List[Path]] = {}
+        self._lock = threading.Lock()
+
+    def before_rename(self, temp_path: Path) -> None:
+        """
+        Called with a complete temporary file about to get its final name
+
+        Args:
+            temp_path: Temporary file
+        """
+        if self.policy == "file":
+            _fsync_path(temp_path)
+
+    def after_rename(self, path: Path) -> None:
+        """
+        Called once a file has its final name
+
+        Args:
+            path: Final path of the file
+        """
+        if self.policy == "file":
+            _fsync_path(path.parent)
+        elif self.policy == "highlight":
+            with self._lock:
+                self._pending.setdefault(path.parent, []).append(path)
+
+    def flush(self, directory: Optional[Path] = None) -> int:
+        """
+        Flush files renamed into a directory since its last flush
+
+        Args:
+            directory: Directory to flush (None flushes every directory)
+
+        Returns:
+            Number of files flushed
+        """
+        with self._lock:
+            if directory is None:
+                pending, self._pending = self._pending, {}
+            else:
+                files = self._pending.pop(directory, None)
+                pending = {directory: files} if files else {}
+
+        count = 0
+        for parent, files in pending.items():
+            for path in files:
+                try:
+                    _fsync_path(path)
+                    count += 1
+                except FileNotFoundError:
+                    # Replaced by a link into the blob store, which has its own data
+                    pass
+            _fsync_path(parent)
+        return count
+
+
+class TargetNames:
+    """
+    Unique target names for items whose date-based names collide
+
+    Items posted in the same second get the same "<date>_UTC" name. Items
+    of a directory are registered before any of them is resolved; of the
+    items sharing a name, the one an earlier run stored under it (looked
+    up through owner, the download manifest) keeps it, otherwise the one
+    with the smallest media id. The others get their media id appended.
+    Names therefore do not depend on the order downloads finish in,
+    concurrent downloads never share a .part file and no item replaces
+    another one's file.
+    """
+
+    def __init__(self, owner: Optional[Callable[[str], Optional[str]]] = None) -> None:
+        """
+        Initialize name registry
+
+        Args:
+            owner: Optional lookup of the media id an earlier run stored
+                under a target path (without extension)
+        """
+        self.owner = owner
+        self._candidates: Dict[str, Set[str]] = {}
+        self._keepers: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, filename: str, media_id: object) -> None:
+        """
+        Announce an item before items of its directory are resolved
+
+        Args:
+            filename: Date-based target path without extension
+            media_id: Media id of the item
+        """
+        with self._lock:
+            self._candidates.setdefault(filename, set()).add(str(media_id))
+
+    def resolve(self, filename: str, media_id: object) -> str:
+        """
+        Get the target path of an item
+
+        Args:
+            filename: Date-based target path without extension
+            media_id: Media id of the item
+
+        Returns:
+            filename, or filename plus "_<media_id>" if taken by another item
+
+        Raises:
+            DownloadError: If the resulting name is stored under another
+                media id, checked before anything is written to it
+        """
+        media_id = str(media_id)
+        with self._lock:
+            keeper = self._keepers.get(filename)
+            candidates = self._candidates.get(filename, set()) | {media_id}
+        if keeper is None:
+            # Numeric ids: shorter is smaller
+            keeper = (self.owner(filename) if self.owner is not None else None) or min(
+                candidates, key=lambda candidate: (len(candidate), candidate)
+            )
+            with self._lock:
+                keeper = self._keepers.setdefault(filename, keeper)
+        if keeper == media_id:
+            return filename
+
+        name = f"{filename}_{media_id}"
+        holder = self.owner(name) if self.owner is not None else None
+        if holder is not None and holder != media_id:
+            raise DownloadError(f"{name} already holds media {holder}, not writing {media_id}")
+        return name
+
+
+def write_atomic(path: Path, data: bytes, syncer: Optional[FileSyncer] = None) -> Path:
+    """
+    Write a small file (sidecar) under a temporary name and rename it into place
+
+    Args:
+        path: Final path
+        data: File content
+        syncer: Optional syncer applying the fsync policy
+
+    Returns:
+        Final path
+    """
+    temp_path = Path(str(path) + PART_SUFFIX)
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    if syncer is not None:
+        syncer.before_rename(temp_path)
+    os.replace(temp_path, path)
+    if syncer is not None:
+        syncer.after_rename(path)
+    return path
+
+
+class PartialFile:
+    """
+    Media file being downloaded
+
+    Bytes are appended to "<filename><extension>.part", the extension being
+    the one of the URL, so a video and its thumbnail never share a part
+    file. The URL path is kept in "<part file>.src": an interrupted download
+    leaves both behind and the next attempt of the same media requests only
+    the missing range, while a part file of other media is discarded. The
+    file gets its final name only once the expected length has been
+    received.
+    """
+
+    def __init__(self, filename: str, url: str, syncer: Optional[FileSyncer] = None) -> None:
+        """
+        Initialize partial file
+
+        Args:
+            filename: Target path without extension
+            url: Media URL the bytes come from
+            syncer: Optional syncer applying the fsync policy on finish()
+        """
+        self.filename = filename
+        self.part_path = Path(filename + media_extension(None, url) + PART_SUFFIX)
+        self.source_path = Path(str(self.part_path) + SOURCE_SUFFIX)
+        # CDN query strings expire, the path identifies the media
+        self.source = urlsplit(url).path
+        self.syncer = syncer
+
+    @property
+    def offset(self) -> int:
+        """Number of bytes already downloaded"""
+        try:
+            return self.part_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def resume_offset(self) -> int:
+        """
+        Get the offset to resume from, discarding a part file of other media
+
+        Returns:
+            Number of bytes already downloaded from this URL (0 to start over)
+        """
+        offset = self.offset
+        if not offset:
+            return 0
+        try:
+            source = self.source_path.read_text()
+        except FileNotFoundError:
+            source = None
+        if source != self.source:
+            self.discard()
+            return 0
+        return offset
+
+    def range_header(self) -> dict:
+        """
+        Get request headers resuming the download
+
+        Returns:
+            Range header dict (empty when starting from scratch)
+        """
+        offset = self.resume_offset()
+        return {'Range': f'bytes={offset}-'} if offset else {}
+
+    def open(self, start: int) -> BinaryIO:
+        """
+        Open part file for writing the body of a response
+
+        Args:
+            start: Offset of the first body byte (0 restarts the download)
+
+        Returns:
+            Binary file object positioned at start
+
+        Raises:
+            DownloadError: If the response does not continue the part file
+        """
+        if start == 0:
+            self.source_path.write_text(self.source)
+            return open(self.part_path, 'wb')
+        if start != self.offset:
+            self.discard()
+            raise DownloadError(f"Server resumed at byte {start}, expected {self.offset}")
+        return open(self.part_path, 'ab')
+
+    def finish(self, extension: str, total: Optional[int], mtime: datetime) -> Path:
+        """
+        Verify length and move part file to its final name
+
+        Args:
+            extension: Final extension including the leading dot
+            total: Expected size in bytes (None if unknown)
+            mtime: Modification time to set on the file
+
+        Returns:
+            Path of the completed file
+
+        Raises:
+            DownloadError: If fewer bytes than expected were received
+                (the part file is kept for resuming)
+        """
+        size = self.offset
+        if total is not None and size != total:
+            if size > total:
+                self.discard()
+            raise DownloadError(f"Incomplete download: {size} of {total} bytes")
+
+        path = Path(self.filename + extension)
+        os.utime(self.part_path, (datetime.now().timestamp(), mtime.timestamp()))
+        if self.syncer is not None:
+            self.syncer.before_rename(self.part_path)
+        os.replace(self.part_path, path)
+        self.source_path.unlink(missing_ok=True)
+        if self.syncer is not None:
+            self.syncer.after_rename(path)
+        return path
+
+    def discard(self) -> None:
+        """Remove part file and its source"""
+        self.part_path.unlink(missing_ok=True)
+        self.source_path.unlink(missing_ok=True)
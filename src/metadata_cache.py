@@ -0,0 +1,177 @@
+"""Persistent TTL cache of profile lookups, highlight listings and media sizes"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .constants import CACHE_FILENAME
+
+
+class MetadataCache:
+    """
+    SQLite cache of Instagram metadata, stored in the backup root
+
+    Profile lookups and highlight listings are the rate-limited GraphQL
+    calls of every run. Their results are kept with a timestamp and served
+    while younger than the configured TTL; "refresh" ignores stored
+    entries but still saves fresh results.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key       TEXT PRIMARY KEY,
+            value     TEXT NOT NULL,
+            stored_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        backup_dir: Path,
+        profile_ttl: float = 7 * 24 * 3600,
+        highlights_ttl: float = 3600,
+        refresh: bool = False
+    ) -> None:
+        """
+        Open (or create) the cache for a backup root
+
+        Args:
+            backup_dir: Backup root directory
+            profile_ttl: Seconds a profile lookup stays valid
+            highlights_ttl: Seconds a highlight listing stays valid
+            refresh: If True, ignore cached entries (results are still stored)
+        """
+        self.path = backup_dir / CACHE_FILENAME
+        self.profile_ttl = profile_ttl
+        self.highlights_ttl = highlights_ttl
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(self.SCHEMA)
+
+    def get_profile(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached profile node
+
+        Args:
+            username: Instagram username
+
+        Returns:
+            Profile node (at least "id", "username", "is_private"), or None
+        """
+        return self._get(f"profile:{username.lower()}", self.profile_ttl)
+
+    def put_profile(self, username: str, node: Dict[str, Any]) -> None:
+        """
+        Store profile node
+
+        Args:
+            username: Instagram username
+            node: Profile node (at least "id", "username", "is_private")
+        """
+        self._put(f"profile:{username.lower()}", node)
+
+    def get_highlights(self, userid: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get cached highlight listing
+
+        Args:
+            userid: Instagram user id
+
+        Returns:
+            Highlight nodes (at least "id", "title"), or None
+        """
+        return self._get(f"highlights:{userid}", self.highlights_ttl)
+
+    def put_highlights(self, userid: int, nodes: List[Dict[str, Any]]) -> None:
+        """
+        Store highlight listing
+
+        Args:
+            userid: Instagram user id
+            nodes: Highlight nodes (at least "id", "title")
+        """
+        self._put(f"highlights:{userid}", nodes)
+
+    def get_media_size(self, media_id: Any) -> Optional[int]:
+        """
+        Get probed media size (sizes of a media id never change)
+
+        Args:
+            media_id: Instagram media id
+
+        Returns:
+            Size in bytes, or None
+        """
+        return self._get(f"size:{media_id}", float("inf"))
+
+    def put_media_size(self, media_id: Any, size: int) -> None:
+        """
+        Store probed media size
+
+        Args:
+            media_id: Instagram media id
+            size: Size in bytes
+        """
+        self._put(f"size:{media_id}", size)
+
+    def invalidate_profile(self, username: str) -> None:
+        """Drop cached profile (e.g. after the username disappeared)"""
+        self._delete(f"profile:{username.lower()}")
+
+    def invalidate_highlights(self, userid: int) -> None:
+        """Drop cached highlight listing (e.g. after a highlight was removed)"""
+        self._delete(f"highlights:{userid}")
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key: str, ttl: float) -> Optional[Any]:
+        """Get value if present and younger than ttl"""
+        if self.refresh or ttl <= 0:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > ttl:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.logger.debug(f"Metadata cache hit: {key}")
+        return json.loads(row[0])
+
+    def _put(self, key: str, value: Any) -> None:
+        """Store value with the current time"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+
+    def _delete(self, key: str) -> None:
+        """Remove a single entry"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
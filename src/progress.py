@@ -1,7 +1,92 @@
 """Progress tracking and visual feedback"""
 
-from typing import Optional
-from tqdm import tqdm
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Optional
+
+if TYPE_CHECKING:
+    from tqdm import tqdm
+
+
+def format_bytes(num_bytes: float) -> str:
+    """
+    Format a byte count for display
+    
+    Args:
+        num_bytes: Number of bytes
+        
+    Returns:
+        Human-readable size, e.g. "3.2 MB"
+    """
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024.0:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024.0
+    return f"{num_bytes:.1f} TB"
+
+
+class ThroughputMeter:
+    """Bytes received over time, bucketed per second for live and peak rates"""
+    
+    def __init__(self, window: int = 5) -> None:
+        """
+        Initialize meter
+        
+        Args:
+            window: Number of one-second buckets the live rate averages over
+        """
+        self.total = 0
+        self.peak = 0.0
+        self._buckets: Deque[int] = deque(maxlen=window)
+        self._bucket_start = time.monotonic()
+        self._bucket_bytes = 0
+        self._lock = threading.Lock()
+    
+    def reset(self) -> None:
+        """Forget rates and peak (totals keep counting)"""
+        with self._lock:
+            self.peak = 0.0
+            self._buckets.clear()
+            self._bucket_start = time.monotonic()
+            self._bucket_bytes = 0
+    
+    def add(self, num_bytes: int) -> None:
+        """
+        Record received bytes
+        
+        Args:
+            num_bytes: Number of bytes written to disk
+        """
+        with self._lock:
+            self._roll(time.monotonic())
+            self._bucket_bytes += num_bytes
+            self.total += num_bytes
+    
+    @property
+    def rate(self) -> float:
+        """Bytes per second over the last few seconds"""
+        with self._lock:
+            now = time.monotonic()
+            self._roll(now)
+            elapsed = len(self._buckets) + (now - self._bucket_start)
+            received = sum(self._buckets) + self._bucket_bytes
+            return received / elapsed if elapsed > 0 else 0.0
+    
+    def _roll(self, now: float) -> None:
+        """Close buckets whose second has passed (caller holds the lock)"""
+        if now - self._bucket_start >= self._buckets.maxlen + 1:
+            # Idle for longer than the window
+            self.peak = max(self.peak, float(self._bucket_bytes))
+            self._buckets.clear()
+            self._bucket_start = now
+            self._bucket_bytes = 0
+            return
+        while now - self._bucket_start >= 1.0:
+            self.peak = max(self.peak, float(self._bucket_bytes))
+            self._buckets.append(self._bucket_bytes)
+            self._bucket_start += 1.0
+            self._bucket_bytes = 0
 
 
 class ProgressTracker:
@@ -15,9 +100,13 @@ class ProgressTracker:
             disable: If True, disable all progress bars
         """
         self.disable = disable
-        self.current_bar: Optional[tqdm] = None
+        self.current_bar: Optional["tqdm"] = None
+        self.throughput = ThroughputMeter()
+        self.bytes_expected = 0
+        self.transfers_started = 0
+        self._postfix_updated = 0.0
     
-    def create_bar(self, total: int, desc: str, unit: str = "item") -> tqdm:
+    def create_bar(self, total: int, desc: str, unit: str = "item") -> "tqdm":
         """
         Create a new progress bar
         
@@ -29,7 +118,9 @@ class ProgressTracker:
         Returns:
             tqdm progress bar instance
         """
-        if self.current_bar:
+        from tqdm import tqdm
+        
+        if self.current_bar is not None:
             self.current_bar.close()
         
         self.current_bar = tqdm(
@@ -37,7 +128,7 @@ class ProgressTracker:
             desc=desc,
             unit=unit,
             disable=self.disable,
-            bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]'
+            bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]'
         )
         return self.current_bar
     
@@ -48,12 +139,78 @@ class ProgressTracker:
         Args:
             n: Number of items to increment
         """
-        if self.current_bar:
+        if self.current_bar is not None:
             self.current_bar.update(n)
     
+    def add_total(self, n: int = 1) -> None:
+        """
+        Grow total of current progress bar as more items are discovered
+        
+        Args:
+            n: Number of newly discovered items
+        """
+        if self.current_bar is not None:
+            self.current_bar.total = (self.current_bar.total or 0) + n
+            self.current_bar.refresh()
+    
+    def expect_bytes(self, num_bytes: Optional[int]) -> None:
+        """
+        Register a media transfer and its announced length
+        
+        Args:
+            num_bytes: Bytes the response will deliver (None if unknown)
+        """
+        with self.throughput._lock:
+            self.transfers_started += 1
+            self.bytes_expected += num_bytes or 0
+    
+    def add_bytes(self, num_bytes: int) -> None:
+        """
+        Count bytes written to disk and refresh rate and ETA
+        
+        Safe to call from worker threads; the bar is redrawn at most twice
+        per second.
+        
+        Args:
+            num_bytes: Number of bytes written
+        """
+        self.throughput.add(num_bytes)
+        
+        now = time.monotonic()
+        if self.current_bar is None or self.disable or now - self._postfix_updated < 0.5:
+            return
+        self._postfix_updated = now
+        
+        rate = self.throughput.rate
+        postfix = f"{format_bytes(rate)}/s"
+        eta = self.eta(rate)
+        if eta is not None:
+            postfix += f", ETA {int(eta) // 60}:{int(eta) % 60:02d}"
+        self.current_bar.set_postfix_str(postfix)
+    
+    def eta(self, rate: float) -> Optional[float]:
+        """
+        Estimate seconds until all known items are transferred
+        
+        Remaining bytes are estimated as the average announced media
+        length times the number of unfinished items.
+        
+        Args:
+            rate: Current bytes per second
+            
+        Returns:
+            Seconds remaining, or None without enough data
+        """
+        if rate <= 0 or self.transfers_started == 0 or self.current_bar is None:
+            return None
+        
+        average = self.bytes_expected / self.transfers_started
+        unfinished = max(0, (self.current_bar.total or 0) - self.current_bar.n)
+        return unfinished * average / rate
+    
     def close(self) -> None:
         """Close current progress bar"""
-        if self.current_bar:
+        if self.current_bar is not None:
             self.current_bar.close()
             self.current_bar = None
     
@@ -64,7 +221,7 @@ class ProgressTracker:
         Args:
             message: Message to write
         """
-        if self.current_bar:
+        if self.current_bar is not None:
             self.current_bar.write(message)
         else:
             print(message)
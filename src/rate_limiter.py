@@ -0,0 +1,321 @@
+"""Adaptive request rate limiting and retries"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .exceptions import RateLimitError
+
+T = TypeVar("T")
+
+# Messages Instagram/Instaloader use when a client is throttled
+THROTTLE_MARKERS = ("please wait a few minutes", "too many requests", "rate limit")
+
+# Messages Instagram/Instaloader use when a session is no longer logged in
+LOGIN_MARKERS = ("login required", "redirected to login", "login_required", "401 unauthorized")
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """
+    Check if an error means the client is being throttled
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        True for HTTP 429 / "please wait" responses
+    """
+    if isinstance(error, RateLimitError):
+        return True
+    if type(error).__name__ == "TooManyRequestsException":
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+def is_login_error(error: BaseException) -> bool:
+    """
+    Check if an error means the session has expired
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        True for LoginRequired / HTTP 401 responses
+    """
+    if type(error).__name__ == "LoginRequiredException":
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in LOGIN_MARKERS)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Check if retrying a failed request can help
+
+    Missing media, forbidden URLs and missing profiles are permanent;
+    everything else (connection errors, throttling, timeouts) is retried.
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        True if the request should be retried
+    """
+    permanent = (
+        "QueryReturnedNotFoundException",
+        "QueryReturnedForbiddenException",
+        "ProfileNotExistsException",
+        "PrivateProfileNotFollowedException",
+        "LoginRequiredException",
+        "ProfileError",
+    )
+    return type(error).__name__ not in permanent
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all downloaders
+
+    The refill rate starts at the configured ceiling, is halved whenever a
+    throttling response is seen (and all callers pause for a cool-down),
+    and grows back additively with every successful request. A request
+    rejected because the session expired is repeated once after
+    session_refresher (if set) renewed the login.
+    """
+
+    def __init__(
+        self,
+        max_rate: Optional[float],
+        burst: int = 1,
+        min_rate: float = 0.05,
+        cooldown: float = 30.0
+    ) -> None:
+        """
+        Initialize rate limiter
+
+        Args:
+            max_rate: Rate ceiling in requests per second (None or 0 for unlimited)
+            burst: Number of requests that may be issued back to back
+            min_rate: Lowest rate the limiter adapts down to
+            cooldown: Seconds all callers pause after a throttling response
+        """
+        self.max_rate = max_rate if max_rate and max_rate > 0 else None
+        self.rate = self.max_rate
+        self.min_rate = min_rate
+        self.burst = max(1, burst)
+        self.cooldown = cooldown
+        self.logger = logging.getLogger(__name__)
+
+        self.request_count = 0
+        self.throttle_count = 0
+        self.retry_count = 0
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # Renews an expired login, returns True on success (set by the app)
+        self.session_refresher: Optional[Callable[[], bool]] = None
+
+    @classmethod
+    def from_delay(cls, delay_between_items: float, burst: int = 1) -> "RateLimiter":
+        """
+        Create limiter from the delay_between_items setting
+
+        Args:
+            delay_between_items: Seconds between requests (0 disables pacing)
+            burst: Number of requests that may be issued back to back
+
+        Returns:
+            RateLimiter instance
+        """
+        rate = 1.0 / delay_between_items if delay_between_items and delay_between_items > 0 else None
+        return cls(rate, burst=burst)
+
+    def reserve(self) -> float:
+        """
+        Take a token for one request
+
+        Returns:
+            Seconds the caller has to wait before issuing the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.request_count += 1
+            wait = max(0.0, self._paused_until - now)
+
+            if self.rate is None:
+                return wait
+
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+            self._tokens -= 1.0
+
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def acquire(self) -> None:
+        """Block until a request may be issued"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait on the event loop until a request may be issued"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """Grow rate back towards the ceiling after a successful request"""
+        if self.max_rate is None:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttle(self) -> None:
+        """
+        Halve rate and pause all callers after a throttling response
+
+        Responses of requests already in flight when the pause started
+        belong to the same throttling episode: they are counted, but do not
+        halve the rate again.
+        """
+        with self._lock:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if self._paused_until > now:
+                return
+            self._paused_until = now + self.cooldown
+            if self.rate is not None:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self.logger.warning(
+                f"Throttled by Instagram, pausing {self.cooldown:.0f}s "
+                f"(rate now {self.rate or 0:.2f} req/s)"
+            )
+
+    def backoff_delay(self, attempt: int, base: float = 1.0, limit: float = 60.0) -> float:
+        """
+        Exponential backoff with full jitter
+
+        Args:
+            attempt: Number of the failed attempt (1 for the first failure)
+            base: Delay scale in seconds
+            limit: Maximum delay in seconds
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        return random.uniform(0, min(limit, base * (2 ** (attempt - 1))))
+
+    def call(self, func: Callable[[], T], max_retries: int = 3) -> T:
+        """
+        Issue a paced request, retrying transient failures
+
+        Args:
+            func: Function performing the request
+            max_retries: Number of retries after the first attempt
+
+        Returns:
+            Return value of func
+
+        Raises:
+            Exception: Last error once retries are exhausted or not retryable
+        """
+        attempt = 0
+        refreshed = False
+        while True:
+            self.acquire()
+            try:
+                result = func()
+            except Exception as e:
+                if not refreshed and self._refresh_session(e):
+                    refreshed = True
+                    continue
+                attempt += 1
+                if not self._should_retry(e, attempt, max_retries):
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            self.on_success()
+            return result
+
+    async def call_async(self, func: Callable[[], Awaitable[T]], max_retries: int = 3) -> T:
+        """
+        Await a paced request, retrying transient failures
+
+        Args:
+            func: Coroutine function performing the request
+            max_retries: Number of retries after the first attempt
+
+        Returns:
+            Result of func
+
+        Raises:
+            Exception: Last error once retries are exhausted or not retryable
+        """
+        attempt = 0
+        refreshed = False
+        while True:
+            await self.acquire_async()
+            try:
+                result = await func()
+            except Exception as e:
+                if not refreshed and await asyncio.to_thread(self._refresh_session, e):
+                    refreshed = True
+                    continue
+                attempt += 1
+                if not self._should_retry(e, attempt, max_retries):
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt))
+                continue
+            self.on_success()
+            return result
+
+    def _refresh_session(self, error: Exception) -> bool:
+        """
+        Renew the login after a request failed because the session expired
+
+        Args:
+            error: Raised exception
+
+        Returns:
+            True if the session was renewed and the request should be repeated
+        """
+        if self.session_refresher is None or not is_login_error(error):
+            return False
+        self.logger.warning(f"Session rejected ({error}), refreshing login")
+        return self.session_refresher()
+
+    def _should_retry(self, error: Exception, attempt: int, max_retries: int) -> bool:
+        """
+        Record a failed attempt and decide whether to retry
+
+        Args:
+            error: Raised exception
+            attempt: Number of failed attempts so far
+            max_retries: Number of retries allowed
+
+        Returns:
+            True if the request should be attempted again
+        """
+        if is_throttle_error(error):
+            self.on_throttle()
+        if attempt > max_retries or not is_retryable_error(error):
+            return False
+        with self._lock:
+            self.retry_count += 1
+        self.logger.debug(f"Retrying after error (attempt {attempt}/{max_retries}): {error}")
+        return True
+
+    @property
+    def current_rate(self) -> Optional[float]:
+        """Current refill rate in requests per second (None if unlimited)"""
+        return self.rate
@@ -0,0 +1,85 @@
+"""Reels media requests covering several highlights or stories at once"""
+
+from typing import Any, Dict, List
+
+from .constants import HIGHLIGHT_ITEMS_QUERY_HASH
+
+
+def reel_id(value: Any) -> int:
+    """
+    Get the highlight id of a reel id ("highlight:<id>" or plain)
+
+    Args:
+        value: Reel id as returned by Instagram
+
+    Returns:
+        Highlight id
+    """
+    return int(str(value).split(':')[-1])
+
+
+def fetch_highlight_items(context: Any, highlight_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Get the item nodes of several highlights with one GraphQL request
+
+    Same query as Highlight.get_items(), with every id in
+    highlight_reel_ids instead of one.
+
+    Args:
+        context: InstaloaderContext
+        highlight_ids: Highlight ids
+
+    Returns:
+        Item nodes keyed by highlight id (reels Instagram did not return
+        are left out)
+    """
+    data = context.graphql_query(HIGHLIGHT_ITEMS_QUERY_HASH, {
+        "reel_ids": [],
+        "tag_names": [],
+        "location_ids": [],
+        "highlight_reel_ids": [str(highlight_id) for highlight_id in highlight_ids],
+        "precomposed_overlay": False,
+    })
+    return {reel_id(reel['id']): reel['items'] for reel in data['data']['reels_media']}
+
+
+def fetch_highlight_iphone_structs(context: Any, highlight_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Get the iPhone variants of several highlights with one API request
+
+    Highlight.get_items() asks for them one highlight at a time, only when
+    iPhone support is enabled and the context is logged in.
+
+    Args:
+        context: InstaloaderContext
+        highlight_ids: Highlight ids
+
+    Returns:
+        Reel structures keyed by highlight id (empty if not applicable)
+    """
+    if not (context.iphone_support and context.is_logged_in):
+        return {}
+    query = '&'.join(f'reel_ids=highlight:{highlight_id}' for highlight_id in highlight_ids)
+    data = context.get_iphone_json(path=f'api/v1/feed/reels_media/?{query}', params={})
+    return {reel_id(key): reel for key, reel in data['reels'].items()}
+
+
+def fetch_story_iphone_structs(context: Any, userids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Get the iPhone variants of the active stories of several users with one API request
+
+    Story.get_items() asks for them one user at a time, only when iPhone
+    support is enabled and the context is logged in.
+
+    Args:
+        context: InstaloaderContext
+        userids: Owner ids of the stories
+
+    Returns:
+        Reel structures keyed by owner id (empty if not applicable)
+    """
+    if not (context.iphone_support and context.is_logged_in) or not userids:
+        return {}
+    query = '&'.join(f'reel_ids={userid}' for userid in userids)
+    data = context.get_iphone_json(path=f'api/v1/feed/reels_media/?{query}', params={})
+    return {int(key): reel for key, reel in data['reels'].items()}
@@ -0,0 +1,212 @@
+"""Pool of authenticated Instagram sessions sharing the request load"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from .exceptions import SessionError
+from .rate_limiter import RateLimiter, is_login_error, is_throttle_error
+
+T = TypeVar("T")
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """Yield an error and the errors it was raised from or while handling"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+@dataclass
+class PooledSession:
+    """One logged-in account with its own request budget and health state"""
+    username: str
+    loader: Any
+    rate_limiter: RateLimiter
+    active: int = 0
+    jobs: int = 0
+    expired: bool = False
+    quarantined_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        """True if the session may take work at time now"""
+        return not self.expired and self.quarantined_until <= now
+
+
+class SessionPool:
+    """
+    Hand out authenticated sessions to profile backups
+
+    Every session paces its requests with its own RateLimiter, so N
+    accounts give N times the request budget of one. Work goes to the
+    available session with the fewest jobs in flight. A session that was
+    throttled is quarantined for a while, one whose login expired is
+    dropped; the job it was running is retried on another session.
+    """
+
+    def __init__(self, sessions: List[PooledSession], quarantine: float = 900.0) -> None:
+        """
+        Initialize pool
+
+        Args:
+            sessions: Loaded sessions (at least one)
+            quarantine: Seconds a throttled session is kept out of rotation
+        """
+        self.sessions = sessions
+        self.quarantine = quarantine
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    @property
+    def usernames(self) -> List[str]:
+        """Usernames of all sessions in the pool"""
+        return [session.username for session in self.sessions]
+
+    @property
+    def rate_limiters(self) -> List[RateLimiter]:
+        """Rate limiters of all sessions (for request statistics)"""
+        return [session.rate_limiter for session in self.sessions]
+
+    def acquire(self) -> PooledSession:
+        """
+        Take the least busy available session, waiting out quarantines
+
+        Returns:
+            Session to run a job with (hand back with release())
+
+        Raises:
+            SessionError: If every session has expired
+        """
+        while True:
+            session, wait = self._checkout()
+            if session is not None:
+                return session
+            time.sleep(wait)
+
+    async def acquire_async(self) -> PooledSession:
+        """Take the least busy available session without blocking the event loop"""
+        while True:
+            session, wait = self._checkout()
+            if session is not None:
+                return session
+            await asyncio.sleep(wait)
+
+    def release(self, session: PooledSession, error: Optional[BaseException] = None, throttled: bool = False) -> bool:
+        """
+        Hand a session back and update its health
+
+        Args:
+            session: Session returned by acquire()
+            error: Error the job failed with, if any
+            throttled: True if the session was throttled while running the job
+
+        Returns:
+            True if the session was taken out of rotation (the job may be
+            retried on another session)
+        """
+        causes = list(_error_chain(error)) if error is not None else []
+        with self._lock:
+            session.active -= 1
+            if any(is_login_error(cause) for cause in causes):
+                session.expired = True
+                self.logger.warning(f"Session of {session.username} has expired, removed from pool")
+                return True
+            if throttled or any(is_throttle_error(cause) for cause in causes):
+                others = [other for other in self.sessions if other is not session and not other.expired]
+                if not others:
+                    # Nothing to fall back to; the rate limiter already backs off
+                    return False
+                session.quarantined_until = time.monotonic() + self.quarantine
+                self.logger.warning(
+                    f"Session of {session.username} throttled, quarantined for {self.quarantine:.0f}s"
+                )
+                return error is not None
+            return False
+
+    def run(self, job: Callable[[PooledSession], T]) -> T:
+        """
+        Run a job on a pooled session, moving to another one if it fails
+
+        Args:
+            job: Function performing the work with the given session
+
+        Returns:
+            Return value of job
+
+        Raises:
+            Exception: Error of the last attempt
+        """
+        attempts = 0
+        while True:
+            session = self.acquire()
+            throttles = session.rate_limiter.throttle_count
+            try:
+                result = job(session)
+            except Exception as e:
+                attempts += 1
+                if self.release(session, e) and attempts < len(self.sessions):
+                    self.logger.info(f"Retrying on another session after: {e}")
+                    continue
+                raise
+            self.release(session, throttled=session.rate_limiter.throttle_count > throttles)
+            return result
+
+    async def run_async(self, job: Callable[[PooledSession], Awaitable[T]]) -> T:
+        """
+        Await a job on a pooled session, moving to another one if it fails
+
+        Args:
+            job: Coroutine function performing the work with the given session
+
+        Returns:
+            Result of job
+
+        Raises:
+            Exception: Error of the last attempt
+        """
+        attempts = 0
+        while True:
+            session = await self.acquire_async()
+            throttles = session.rate_limiter.throttle_count
+            try:
+                result = await job(session)
+            except Exception as e:
+                attempts += 1
+                if self.release(session, e) and attempts < len(self.sessions):
+                    self.logger.info(f"Retrying on another session after: {e}")
+                    continue
+                raise
+            self.release(session, throttled=session.rate_limiter.throttle_count > throttles)
+            return result
+
+    def _checkout(self) -> Tuple[Optional[PooledSession], float]:
+        """
+        Pick a session or tell how long until one is available
+
+        Returns:
+            (session, 0) or (None, seconds until the first quarantine ends)
+
+        Raises:
+            SessionError: If every session has expired
+        """
+        with self._lock:
+            now = time.monotonic()
+            alive = [session for session in self.sessions if not session.expired]
+            if not alive:
+                raise SessionError("All Instagram sessions have expired, log in again")
+
+            available = [session for session in alive if session.available(now)]
+            if not available:
+                return None, min(session.quarantined_until for session in alive) - now
+
+            session = min(available, key=lambda candidate: (candidate.active, candidate.jobs))
+            session.active += 1
+            session.jobs += 1
+            return session, 0.0
@@ -0,0 +1,203 @@
+"""Media size limits decided from probed sizes before any body is fetched"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from .constants import SIZE_PROBE_BATCH, SIZE_PROBE_WORKERS
+from .media_file import parse_content_range
+from .metadata_cache import MetadataCache
+
+T = TypeVar("T")
+
+MB = 1024 * 1024
+
+
+def probe_with_session(session: Any, url: str) -> Optional[int]:
+    """
+    Get the size of a media file with a requests session, without its body
+
+    Sends HEAD; if the response has no Content-Length, a GET for the first
+    byte reads the total from Content-Range instead.
+
+    Args:
+        session: requests Session
+        url: Media URL
+
+    Returns:
+        Size in bytes, or None if the server does not tell
+    """
+    resp = session.head(url, allow_redirects=True, headers={'Accept-Encoding': 'identity'})
+    if resp.status_code == 200 and resp.headers.get('Content-Length'):
+        return int(resp.headers['Content-Length'])
+
+    resp = session.get(url, stream=True, headers={'Accept-Encoding': 'identity', 'Range': 'bytes=0-0'})
+    try:
+        if resp.status_code not in (200, 206):
+            return None
+        return parse_content_range(
+            resp.status_code, resp.headers.get('Content-Range'), resp.headers.get('Content-Length')
+        )[1]
+    finally:
+        resp.close()
+
+
+class SizeFilter:
+    """
+    Enforce filters.min_size_mb/max_size_mb before media is downloaded
+
+    Sizes are probed concurrently in batches (HEAD or a one-byte ranged
+    GET), and kept in the metadata cache by media id so an item left out
+    once is not probed again. Items whose size cannot be probed are kept.
+    """
+
+    def __init__(
+        self,
+        min_size_mb: Optional[float] = None,
+        max_size_mb: Optional[float] = None,
+        cache: Optional[MetadataCache] = None
+    ) -> None:
+        """
+        Initialize filter
+
+        Args:
+            min_size_mb: Smallest media size to download, in MB
+            max_size_mb: Largest media size to download, in MB
+            cache: Optional cache storing probed sizes
+        """
+        self.min_bytes = None if min_size_mb is None else float(min_size_mb) * MB
+        self.max_bytes = None if max_size_mb is None else float(max_size_mb) * MB
+        self.cache = cache
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, filters: Any, cache: Optional[MetadataCache] = None) -> Optional["SizeFilter"]:
+        """
+        Create a filter from the filters configuration section
+
+        Args:
+            filters: FiltersConfig
+            cache: Optional cache storing probed sizes
+
+        Returns:
+            SizeFilter, or None if no size limit is configured
+        """
+        if filters.min_size_mb is None and filters.max_size_mb is None:
+            return None
+        return cls(filters.min_size_mb, filters.max_size_mb, cache)
+
+    def accepts(self, size: Optional[int]) -> bool:
+        """
+        Check a media size against the limits
+
+        Args:
+            size: Size in bytes, or None if unknown
+
+        Returns:
+            True if the item should be downloaded
+        """
+        if size is None:
+            return True
+        if self.min_bytes is not None and size < self.min_bytes:
+            return False
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        return True
+
+    def select(
+        self,
+        items: Iterable[T],
+        media_id: Callable[[T], Any],
+        probe: Callable[[T], Optional[int]],
+        on_filtered: Callable[[int], None]
+    ) -> Iterator[T]:
+        """
+        Yield items within the size limits, probing batches in threads
+
+        Args:
+            items: Items to check
+            media_id: Returns the media id of an item
+            probe: Returns the media size of an item (None if unknown)
+            on_filtered: Called with the number of items filtered out
+
+        Yields:
+            Items to download, in their original order
+        """
+        iterator = iter(items)
+        with ThreadPoolExecutor(max_workers=SIZE_PROBE_WORKERS, thread_name_prefix="igsaver-probe") as executor:
+            while True:
+                batch = list(islice(iterator, SIZE_PROBE_BATCH))
+                if not batch:
+                    return
+                sizes = executor.map(lambda item: self._size(media_id(item), lambda: probe(item)), batch)
+                for item, size in zip(batch, list(sizes)):
+                    if self.accepts(size):
+                        yield item
+                    else:
+                        on_filtered(1)
+
+    async def select_async(
+        self,
+        items: List[T],
+        media_id: Callable[[T], Any],
+        probe: Callable[[T], Awaitable[Optional[int]]],
+        on_filtered: Callable[[int], None]
+    ) -> List[T]:
+        """
+        Keep items within the size limits, probing concurrently on the event loop
+
+        Args:
+            items: Items to check
+            media_id: Returns the media id of an item
+            probe: Coroutine function returning the media size of an item
+            on_filtered: Called with the number of items filtered out
+
+        Returns:
+            Items to download, in their original order
+        """
+        semaphore = asyncio.Semaphore(SIZE_PROBE_WORKERS)
+
+        async def size_of(item: T) -> Optional[int]:
+            cached = self._cached(media_id(item))
+            if cached is not None:
+                return cached
+            async with semaphore:
+                try:
+                    size = await probe(item)
+                except Exception as e:
+                    self.logger.debug(f"Size probe failed for {media_id(item)}: {e}")
+                    return None
+            return self._store(media_id(item), size)
+
+        sizes = await asyncio.gather(*(size_of(item) for item in items))
+        kept = []
+        for item, size in zip(items, sizes):
+            if self.accepts(size):
+                kept.append(item)
+            else:
+                on_filtered(1)
+        return kept
+
+    def _size(self, media_id: Any, probe: Callable[[], Optional[int]]) -> Optional[int]:
+        """Get size from the cache or by probing (None if unknown)"""
+        cached = self._cached(media_id)
+        if cached is not None:
+            return cached
+        try:
+            size = probe()
+        except Exception as e:
+            self.logger.debug(f"Size probe failed for {media_id}: {e}")
+            return None
+        return self._store(media_id, size)
+
+    def _cached(self, media_id: Any) -> Optional[int]:
+        """Get a previously probed size"""
+        return None if self.cache is None else self.cache.get_media_size(media_id)
+
+    def _store(self, media_id: Any, size: Optional[int]) -> Optional[int]:
+        """Remember a probed size"""
+        if size is not None and self.cache is not None:
+            self.cache.put_media_size(media_id, size)
+        return size
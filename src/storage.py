@@ -0,0 +1,571 @@
+"""Storage backends receiving backed up media and sidecar files"""
+
+import hashlib
+import hmac
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .exceptions import ConfigurationError, DownloadError
+from .media_file import FileSyncer, PartialFile, write_atomic
+
+MB = 1024 * 1024
+
+# S3 rejects multipart parts below 5 MiB (except the last one)
+S3_MIN_PART_SIZE = 5 * MB
+
+
+class MediaWriter(ABC):
+    """Destination of one media body, written chunk by chunk"""
+
+    @abstractmethod
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk of the body"""
+
+    @abstractmethod
+    def finish(self, total: Optional[int], mtime: datetime) -> Tuple[Path, int]:
+        """
+        Complete the file
+
+        Args:
+            total: Expected size in bytes (None if unknown)
+            mtime: Modification time of the media
+
+        Returns:
+            (path, size) of the stored file
+
+        Raises:
+            DownloadError: If fewer bytes than expected were received
+        """
+
+    @abstractmethod
+    def abort(self) -> None:
+        """Give up after a failed transfer (resumable state may be kept)"""
+
+
+class StorageBackend(ABC):
+    """
+    Where backed up files end up
+
+    Files are addressed by their path in the local layout (backup root,
+    username, highlights/stories, ...); remote backends store them under
+    the same relative key.
+    """
+
+    local = True
+
+    def resume_offset(self, filename: str, url: str) -> int:
+        """
+        Get the number of bytes an earlier attempt already stored
+
+        Args:
+            filename: Target path without extension
+            url: Media URL (state left by other media is discarded)
+
+        Returns:
+            Offset to resume from (0 to start over)
+        """
+        return 0
+
+    @abstractmethod
+    def open_media(self, filename: str, extension: str, start: int, url: str) -> MediaWriter:
+        """
+        Start writing a media body
+
+        Args:
+            filename: Target path without extension
+            extension: Extension including the leading dot
+            start: Offset of the first body byte (see resume_offset)
+            url: Media URL the body comes from
+
+        Returns:
+            Writer receiving the body
+        """
+
+    @abstractmethod
+    def write_file(self, path: Path, data: bytes) -> Path:
+        """
+        Store a small file (sidecar) completely or not at all
+
+        Args:
+            path: Target path
+            data: File content
+
+        Returns:
+            Target path
+        """
+
+    @abstractmethod
+    def exists(self, path: Path) -> bool:
+        """
+        Check if a file or a non-empty directory exists
+
+        Args:
+            path: File or directory path
+        """
+
+    def makedirs(self, path: Path) -> None:
+        """Create a directory before files are written into it"""
+
+    def discard_partial(self, filename: str, url: str) -> None:
+        """Forget resumable state of a media file downloaded from url"""
+
+    def fetch_file(self, path: Path, local_path: Path) -> bool:
+        """
+        Copy a stored file to the local disk (e.g. the manifest)
+
+        Args:
+            path: Path in the local layout naming the stored file
+            local_path: Where to write it
+
+        Returns:
+            False if there is no such file
+        """
+        return False
+
+    def publish_file(self, local_path: Path, path: Path) -> None:
+        """
+        Store a local file (e.g. the manifest) in the backend
+
+        Args:
+            local_path: Local file
+            path: Path in the local layout naming the stored file
+        """
+
+    def stored_items(self) -> Iterator[Tuple[str, Path, int, bool]]:
+        """
+        Find downloaded items the backup tree scan cannot see
+
+        Used when the download manifest is rebuilt.
+
+        Yields:
+            (media_id, media_file, size, is_video) per item
+        """
+        return iter(())
+
+    def close(self) -> None:
+        """Release files and connections held by the backend"""
+
+
+class LocalMediaWriter(MediaWriter):
+    """Media body going to a .part file renamed into place"""
+
+    def __init__(self, partial: PartialFile, extension: str, start: int) -> None:
+        """
+        Initialize writer
+
+        Args:
+            partial: Part file of the media
+            extension: Final extension including the leading dot
+            start: Offset of the first body byte
+        """
+        self.partial = partial
+        self.extension = extension
+        self._file = partial.open(start)
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def finish(self, total: Optional[int], mtime: datetime) -> Tuple[Path, int]:
+        self._file.close()
+        path = self.partial.finish(self.extension, total, mtime)
+        return path, path.stat().st_size
+
+    def abort(self) -> None:
+        # The part file stays for resuming
+        self._file.close()
+
+
+class LocalStorage(StorageBackend):
+    """Files on the local filesystem, under their own paths"""
+
+    def __init__(self, syncer: Optional[FileSyncer] = None) -> None:
+        """
+        Initialize backend
+
+        Args:
+            syncer: Optional syncer applying the fsync policy
+        """
+        self.syncer = syncer
+
+    def resume_offset(self, filename: str, url: str) -> int:
+        return PartialFile(filename, url).resume_offset()
+
+    def open_media(self, filename: str, extension: str, start: int, url: str) -> MediaWriter:
+        return LocalMediaWriter(PartialFile(filename, url, self.syncer), extension, start)
+
+    def write_file(self, path: Path, data: bytes) -> Path:
+        return write_atomic(path, data, self.syncer)
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def makedirs(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+
+    def discard_partial(self, filename: str, url: str) -> None:
+        PartialFile(filename, url).discard()
+
+
+class S3MediaWriter(MediaWriter):
+    """
+    Media body streamed into an S3 object
+
+    Chunks are collected in memory up to one part; bodies smaller than a
+    part are sent with a single PUT, larger ones as a multipart upload
+    whose parts are sent as soon as they are full. Nothing touches the
+    local disk.
+    """
+
+    def __init__(self, storage: "S3Storage", path: Path) -> None:
+        """
+        Initialize writer
+
+        Args:
+            storage: Backend the object is written to
+            path: Path of the media file in the local layout
+        """
+        self.storage = storage
+        self.path = path
+        self.key = storage.key(path)
+        self.size = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._etags: List[str] = []
+
+    def write(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        self.size += len(chunk)
+        if len(self._buffer) >= self.storage.part_size:
+            if self._upload_id is None:
+                self._upload_id = self.storage.create_multipart_upload(self.key)
+            part = bytes(self._buffer[:self.storage.part_size])
+            del self._buffer[:self.storage.part_size]
+            self._etags.append(self.storage.upload_part(self.key, self._upload_id, len(self._etags) + 1, part))
+
+    def finish(self, total: Optional[int], mtime: datetime) -> Tuple[Path, int]:
+        if total is not None and self.size != total:
+            self.abort()
+            raise DownloadError(f"Incomplete download: {self.size} of {total} bytes")
+
+        # Objects get the upload time; the item date stays in the JSON sidecar
+        if self._upload_id is None:
+            self.storage.put_object(self.key, bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._etags.append(
+                    self.storage.upload_part(self.key, self._upload_id, len(self._etags) + 1, bytes(self._buffer))
+                )
+            self.storage.complete_multipart_upload(self.key, self._upload_id, self._etags)
+        self._buffer = bytearray()
+        return self.path, self.size
+
+    def abort(self) -> None:
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.storage.abort_multipart_upload(self.key, self._upload_id)
+            except Exception as e:
+                self.storage.logger.warning(f"Could not abort upload of {self.key}: {e}")
+            self._upload_id = None
+
+
+class S3Storage(StorageBackend):
+    """
+    Files stored as objects in an S3-compatible bucket (AWS, MinIO, ...)
+
+    Objects are keyed by their path relative to the backup root, under an
+    optional prefix; requests are signed with AWS Signature V4 and use
+    path-style URLs. The download manifest is kept next to the objects
+    (see fetch_file/publish_file), so skip checks need no listing.
+    """
+
+    local = False
+
+    def __init__(
+        self,
+        backup_dir: Path,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        prefix: str = "",
+        region: str = "us-east-1",
+        part_size: int = 8 * MB,
+        session: Optional[Any] = None
+    ) -> None:
+        """
+        Initialize backend
+
+        Args:
+            backup_dir: Backup root the local layout is relative to
+            endpoint: Endpoint URL, e.g. https://s3.eu-west-1.amazonaws.com
+            bucket: Bucket name
+            access_key: Access key id
+            secret_key: Secret access key
+            prefix: Key prefix of all objects
+            region: Signing region
+            part_size: Size of multipart upload parts in bytes
+            session: Optional requests session
+        """
+        import requests
+
+        self.backup_dir = backup_dir
+        self.endpoint = endpoint.rstrip('/')
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.prefix = prefix.strip('/')
+        self.region = region
+        self.part_size = max(S3_MIN_PART_SIZE, int(part_size))
+        self.session = session or requests.Session()
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, backup_dir: Path, storage: Any) -> "S3Storage":
+        """
+        Create backend from the storage configuration section
+
+        Credentials missing from the section are read from
+        AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY.
+
+        Args:
+            backup_dir: Backup root
+            storage: StorageConfig
+
+        Returns:
+            S3Storage instance
+
+        Raises:
+            ConfigurationError: If endpoint, bucket or credentials are missing
+        """
+        access_key = storage.access_key or os.getenv('AWS_ACCESS_KEY_ID')
+        secret_key = storage.secret_key or os.getenv('AWS_SECRET_ACCESS_KEY')
+        if not storage.endpoint or not storage.bucket:
+            raise ConfigurationError("storage.endpoint and storage.bucket are required for the s3 backend")
+        if not access_key or not secret_key:
+            raise ConfigurationError("No S3 credentials (storage.access_key/secret_key or AWS_* variables)")
+        return cls(
+            backup_dir,
+            storage.endpoint,
+            storage.bucket,
+            access_key,
+            secret_key,
+            prefix=storage.prefix or "",
+            region=storage.region,
+            part_size=int(storage.part_size_mb * MB),
+        )
+
+    def key(self, path: Path) -> str:
+        """
+        Get the object key of a path in the local layout
+
+        Args:
+            path: Path under the backup root
+
+        Returns:
+            Object key
+        """
+        relative = path.relative_to(self.backup_dir).as_posix()
+        return f"{self.prefix}/{relative}" if self.prefix else relative
+
+    def open_media(self, filename: str, extension: str, start: int, url: str) -> MediaWriter:
+        if start:
+            # Nothing is kept between attempts, so only complete bodies can be used
+            raise DownloadError(f"Server resumed at byte {start}, expected 0")
+        return S3MediaWriter(self, Path(filename + extension))
+
+    def write_file(self, path: Path, data: bytes) -> Path:
+        self.put_object(self.key(path), data)
+        return path
+
+    def exists(self, path: Path) -> bool:
+        key = self.key(path)
+        status, _, _ = self._request('HEAD', key)
+        if status == 200:
+            return True
+        # Directories exist as long as an object lives below them
+        status, _, body = self._request('GET', '', {'list-type': '2', 'prefix': key + '/', 'max-keys': '1'})
+        self._check(status, body, f"list {key}")
+        return b'<Key>' in body
+
+    def fetch_file(self, path: Path, local_path: Path) -> bool:
+        status, _, body = self._request('GET', self.key(path))
+        if status == 404:
+            return False
+        self._check(status, body, f"get {self.key(path)}")
+        write_atomic(local_path, body)
+        return True
+
+    def publish_file(self, local_path: Path, path: Path) -> None:
+        self.put_object(self.key(path), local_path.read_bytes())
+
+    def put_object(self, key: str, data: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        """Store an object with a single PUT"""
+        status, _, body = self._request('PUT', key, headers=headers, data=data)
+        self._check(status, body, f"put {key}")
+
+    def create_multipart_upload(self, key: str) -> str:
+        """Start a multipart upload, returning its upload id"""
+        status, _, body = self._request('POST', key, {'uploads': ''})
+        self._check(status, body, f"create upload of {key}")
+        return self._xml_text(body, 'UploadId')
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        """Send one part of a multipart upload, returning its ETag"""
+        status, headers, body = self._request(
+            'PUT', key, {'partNumber': str(number), 'uploadId': upload_id}, data=data
+        )
+        self._check(status, body, f"upload part {number} of {key}")
+        return headers.get('ETag', '')
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: List[str]) -> None:
+        """Assemble the uploaded parts into the object"""
+        parts = ''.join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in enumerate(etags, 1)
+        )
+        status, _, body = self._request(
+            'POST', key, {'uploadId': upload_id},
+            data=f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+        )
+        # Errors may also come with status 200, in the body
+        if status == 200 and b'<Error>' in body:
+            status = 500
+        self._check(status, body, f"complete upload of {key}")
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        """Discard the parts of an unfinished upload"""
+        status, _, body = self._request('DELETE', key, {'uploadId': upload_id})
+        if status not in (204, 404):
+            self._check(status, body, f"abort upload of {key}")
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        query: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        data: bytes = b''
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send a signed request for an object (or the bucket if key is empty)
+
+        Returns:
+            (status, headers, body)
+        """
+        path = '/' + quote(f"{self.bucket}/{key}" if key else self.bucket, safe='/-_.~')
+        query_string = '&'.join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+            for name, value in sorted((query or {}).items())
+        )
+        signed = self._sign(method, path, query_string, headers or {})
+        url = f"{self.endpoint}{path}" + (f"?{query_string}" if query_string else "")
+        resp = self.session.request(method, url, headers=signed, data=data or None)
+        return resp.status_code, dict(resp.headers), resp.content
+
+    def _sign(self, method: str, path: str, query_string: str, headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        Add AWS Signature V4 headers (payload left unsigned)
+
+        Args:
+            method: HTTP method
+            path: Encoded request path
+            query_string: Encoded, sorted query string
+            headers: Request headers
+
+        Returns:
+            Headers including Authorization
+        """
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        scope = f"{now.strftime('%Y%m%d')}/{self.region}/s3/aws4_request"
+
+        headers = {name.lower(): str(value).strip() for name, value in headers.items()}
+        headers['host'] = urlsplit(self.endpoint).netloc
+        headers['x-amz-date'] = amz_date
+        headers['x-amz-content-sha256'] = 'UNSIGNED-PAYLOAD'
+
+        names = sorted(headers)
+        canonical_request = '\n'.join([
+            method,
+            path,
+            query_string,
+            ''.join(f"{name}:{headers[name]}\n" for name in names),
+            ';'.join(names),
+            'UNSIGNED-PAYLOAD',
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+
+        signing_key = ('AWS4' + self.secret_key).encode()
+        for part in scope.split('/'):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        headers['authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        del headers['host']
+        return headers
+
+    @staticmethod
+    def _xml_text(body: bytes, tag: str) -> str:
+        """Get the text of the first element with the given tag (any namespace)"""
+        for element in ET.fromstring(body).iter():
+            if element.tag.split('}')[-1] == tag:
+                return element.text or ''
+        raise DownloadError(f"No {tag} in S3 response")
+
+    @staticmethod
+    def _check(status: int, body: bytes, what: str) -> None:
+        """Raise if an S3 response is an error"""
+        if 200 <= status < 300:
+            return
+        match = re.search(rb'<Code>([^<]*)</Code>', body or b'')
+        code = match.group(1).decode() if match else f"HTTP {status}"
+        raise DownloadError(f"S3 {what} failed: {code}")
+
+
+STORAGE_BACKENDS = ("local", "s3")
+
+
+def open_storage(backup_dir: Path, config_loader: Any) -> Optional[StorageBackend]:
+    """
+    Create the backend selected by the storage and output configuration
+
+    Args:
+        backup_dir: Backup root
+        config_loader: ConfigLoader
+
+    Returns:
+        Backend, or None when files are written as loose local files
+
+    Raises:
+        ConfigurationError: If the backend is unknown or incompletely configured
+    """
+    storage = config_loader.storage
+    output = config_loader.output
+    if storage.backend not in STORAGE_BACKENDS:
+        raise ConfigurationError(
+            f"Unknown storage backend '{storage.backend}', expected one of {', '.join(STORAGE_BACKENDS)}"
+        )
+    if storage.backend == "s3":
+        if output.archive != "none":
+            raise ConfigurationError("output.archive needs storage.backend: local")
+        return S3Storage.from_config(backup_dir, storage)
+    if output.archive != "none":
+        from .archive import ArchiveStorage
+        return ArchiveStorage(backup_dir, output.archive, output.archive_compression, output.fsync)
+    return None
@@ -1,17 +1,27 @@
 """Download active Instagram stories (24h)"""
 
 import logging
-import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import instaloader
 
 from .config import Config
 from .ui import UI
 from .exceptions import DownloadError, ProfileError
-from .constants import ERR_PROFILE_NOT_FOUND, ERR_PRIVATE_PROFILE
+from .constants import ERR_PROFILE_NOT_FOUND, ERR_PRIVATE_PROFILE, REELS_TRAY_QUERY_HASH, STORIES_BATCH_SIZE
 from .progress import ProgressTracker
 from .summary import BackupStats
+from .item_downloader import ItemDownloader
+from .manifest import DownloadManifest
+from .rate_limiter import RateLimiter
+from .dedupe import BlobStore
+from .tracing import tracer
+from .reels import fetch_story_iphone_structs
+from .metadata_cache import MetadataCache
+from .config_loader import ConfigLoader
+from .size_filter import SizeFilter
+from .media_file import FileSyncer
+from .storage import LocalStorage, StorageBackend
 
 
 class StoriesDownloader:
@@ -22,7 +32,15 @@ class StoriesDownloader:
         config: Config, 
         loader: instaloader.Instaloader,
         progress: Optional[ProgressTracker] = None,
-        skip_existing: bool = True
+        skip_existing: bool = True,
+        max_workers: int = 1,
+        manifest: Optional[DownloadManifest] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0,
+        blob_store: Optional[BlobStore] = None,
+        cache: Optional[MetadataCache] = None,
+        config_loader: Optional[ConfigLoader] = None,
+        storage: Optional[StorageBackend] = None
     ) -> None:
         """
         Initialize stories downloader
@@ -32,12 +50,32 @@ class StoriesDownloader:
             loader: Authenticated Instaloader instance
             progress: Optional progress tracker
             skip_existing: If True, skip already downloaded files
+            max_workers: Number of items downloaded in parallel
+            manifest: Optional download manifest used for skip checks
+            rate_limiter: Optional limiter shared by all downloaders
+            max_retries: Retries per request after a failed attempt
+            blob_store: Optional store deduplicating downloaded media
+            cache: Optional cache of profile lookups and highlight listings
+            config_loader: Optional configuration whose date/type/size filters
+                items must pass before their media is requested
+            storage: Optional backend receiving files (default: local filesystem)
         """
         self.config = config
         self.loader = loader
         self.logger = logging.getLogger(__name__)
         self.progress = progress or ProgressTracker()
         self.skip_existing = skip_existing
+        self.rate_limiter = rate_limiter or RateLimiter(None)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.config_loader = config_loader
+        self.size_filter = SizeFilter.from_config(config_loader.filters, cache) if config_loader else None
+        self.syncer = FileSyncer(config_loader.output.fsync) if config_loader else FileSyncer()
+        self.storage = storage or LocalStorage(self.syncer)
+        self.item_downloader = ItemDownloader(
+            loader, skip_existing, max_workers, manifest, self.rate_limiter, max_retries, blob_store,
+            self.progress, self.storage
+        )
         self.stats = BackupStats()
     
     def download(self, username: str) -> BackupStats:
@@ -62,16 +100,29 @@ class StoriesDownloader:
             self.logger.info(f"Fetching stories for {username}")
             
             try:
-                stories = list(self.loader.get_stories([profile.userid]))
+                with tracer.span("stories", username=username):
+                    stories = self.rate_limiter.call(
+                        lambda: list(self.loader.get_stories([profile.userid])), self.max_retries
+                    )
+                story_dir = self._get_story_dir(username)
                 
-                if not stories:
-                    UI.print_warning(f"No active stories found for {username}")
-                    self.stats.finish()
-                    return self.stats
+                # Total grows as story items are discovered
+                pbar = self.progress.create_bar(total=0, desc="Downloading stories", unit="item")
+                
+                jobs = self._iter_items(stories, story_dir, self.stats)
+                for stats, result, size in self.item_downloader.download_many(jobs):
+                    self._count(stats, result, size)
+                    pbar.update(1)
+                
+                pbar.close()
+                self.syncer.flush(story_dir)
                 
-                # Process each story
-                for story in stories:
-                    self._download_story(username, story)
+                if self.stats.items_total == 0 and self.stats.items_filtered > 0:
+                    UI.print_info(f"All {self.stats.items_filtered} active stories filtered out")
+                elif self.stats.items_total == 0 and not self.stats.errors:
+                    UI.print_warning(f"No active stories found for {username}")
+                else:
+                    self.progress.write(f"  ✓ Downloaded {self.stats.items_downloaded} items")
                 
                 self.progress.close()
                 self.stats.finish()
@@ -91,6 +142,129 @@ class StoriesDownloader:
             self.logger.error(f"Download error: {e}")
             raise DownloadError(f"Download error: {e}")
     
+    def download_many(self, usernames: List[str]) -> Dict[str, BackupStats]:
+        """
+        Download active stories of several users with batched story requests
+        
+        Profiles are resolved first (from the metadata cache when possible),
+        then the stories of up to STORIES_BATCH_SIZE profiles are fetched per
+        request and their items fan out into each user's stories directory.
+        A profile that cannot be resolved does not stop the others.
+        
+        Args:
+            usernames: Instagram usernames
+            
+        Returns:
+            Backup statistics per username
+        """
+        per_user = {username: BackupStats() for username in usernames}
+        profiles: Dict[int, str] = {}
+        
+        for username in usernames:
+            try:
+                profiles[self.resolve_userid(username)] = username
+            except Exception as e:
+                self.logger.error(f"Backup of {username} failed: {e}")
+                per_user[username].add_error(f"{username}: {e}")
+        
+        userids = list(profiles)
+        chunks = [userids[i:i + STORIES_BATCH_SIZE] for i in range(0, len(userids), STORIES_BATCH_SIZE)]
+        UI.print_info(f"Fetching active stories of {len(userids)} profiles in {len(chunks)} requests...")
+        
+        pbar = self.progress.create_bar(total=0, desc="Downloading stories", unit="item")
+        for chunk in chunks:
+            try:
+                with tracer.span("stories", profiles=len(chunk)):
+                    stories = self.rate_limiter.call(
+                        lambda: list(self.loader.get_stories(chunk)), self.max_retries
+                    )
+                    self._prefetch_iphone_structs(stories)
+            except Exception as e:
+                self.logger.error(f"Error getting stories: {e}")
+                for userid in chunk:
+                    per_user[profiles[userid]].add_error(f"{profiles[userid]}: Could not fetch stories: {e}")
+                continue
+            
+            jobs = (
+                job
+                for story in stories if story.owner_id in profiles
+                for job in self._iter_items(
+                    [story],
+                    self._get_story_dir(profiles[story.owner_id]),
+                    per_user[profiles[story.owner_id]],
+                    f"📱 Active Stories of {profiles[story.owner_id]}"
+                )
+            )
+            for stats, result, size in self.item_downloader.download_many(jobs):
+                self._count(stats, result, size)
+                pbar.update(1)
+        pbar.close()
+        self.syncer.flush()
+        
+        without = [username for username in profiles.values() if per_user[username].items_total == 0]
+        if without:
+            self.logger.info(f"No active stories: {', '.join(without)}")
+        
+        for stats in per_user.values():
+            stats.finish()
+        return per_user
+    
+    def resolve_userid(self, username: str) -> int:
+        """
+        Get the user id of a profile (cached lookup)
+        
+        Args:
+            username: Instagram username
+            
+        Returns:
+            Instagram user id
+            
+        Raises:
+            ProfileError: If profile does not exist
+        """
+        try:
+            return self._get_profile(username).userid
+        except instaloader.exceptions.ProfileNotExistsException:
+            raise ProfileError(f"{username} - {ERR_PROFILE_NOT_FOUND}")
+    
+    def reels_tray(self) -> Dict[int, int]:
+        """
+        Get latest story timestamps of all followed profiles with an active story
+        
+        A single request, answered without listing any story item.
+        
+        Returns:
+            Unix time of the newest story item, keyed by user id
+        """
+        with tracer.span("reels_tray"):
+            data = self.rate_limiter.call(
+                lambda: self.loader.context.graphql_query(REELS_TRAY_QUERY_HASH, {"only_stories": True}),
+                self.max_retries
+            )
+        edges = data["data"]["user"]["feed_reels_tray"]["edge_reels_tray_to_reel"]["edges"]
+        return {
+            int(edge["node"]["id"]): int(edge["node"]["latest_reel_media"])
+            for edge in edges
+            if edge["node"].get("latest_reel_media")
+        }
+    
+    def latest_reels(self, userids: List[int]) -> Dict[int, int]:
+        """
+        Get latest story timestamps of the given profiles
+        
+        Args:
+            userids: Instagram user ids (one request per 50)
+            
+        Returns:
+            Unix time of the newest story item, keyed by user id (profiles
+            without an active story are left out)
+        """
+        with tracer.span("stories", profiles=len(userids)):
+            stories = self.rate_limiter.call(
+                lambda: list(self.loader.get_stories(userids)), self.max_retries
+            )
+        return {story.owner_id: int(story._node["latest_reel_media"]) for story in stories}
+    
     def _get_profile(self, username: str) -> instaloader.Profile:
         """
         Get Instagram profile
@@ -101,93 +275,116 @@ class StoriesDownloader:
         Returns:
             Profile instance
         """
+        if self.cache is not None:
+            node = self.cache.get_profile(username)
+            if node is not None:
+                self.logger.info(f"Using cached profile: {username}")
+                return instaloader.Profile(self.loader.context, node)
+        
         UI.print_info(f"\nFetching profile for {username}...")
         self.logger.info(f"Fetching profile: {username}")
-        return instaloader.Profile.from_username(self.loader.context, username)
+        try:
+            with tracer.span("profile", username=username):
+                profile = self.rate_limiter.call(
+                    lambda: instaloader.Profile.from_username(self.loader.context, username),
+                    self.max_retries
+                )
+        except instaloader.exceptions.ProfileNotExistsException:
+            if self.cache is not None:
+                self.cache.invalidate_profile(username)
+            raise
+        
+        if self.cache is not None:
+            self.cache.put_profile(username, profile._node)
+        return profile
     
-    def _download_story(self, username: str, story: instaloader.Story) -> None:
+    def _prefetch_iphone_structs(self, stories: List[instaloader.Story]) -> None:
         """
-        Download all items from a story
+        Fetch the iPhone variants of several stories with one request
+        
+        Story.get_items() would otherwise request them per story; stories
+        missing from the response fall back to that request in _iter_items.
         
         Args:
-            username: Instagram username
-            story: Story object
+            stories: Stories of one get_stories() request
         """
-        try:
-            story_dir = self._get_story_dir(username)
-            story_dir.mkdir(parents=True, exist_ok=True)
-            
-            self.progress.write(f"\n📱 Active Stories")
-            
-            items_list = list(story.get_items())
-            self.stats.items_total += len(items_list)
+        context = self.loader.context
+        if not (context.iphone_support and context.is_logged_in):
+            return
+        userids = [story.owner_id for story in stories]
+        iphone_structs = self.rate_limiter.call(
+            lambda: fetch_story_iphone_structs(self.loader.context, userids), self.max_retries
+        )
+        for story in stories:
+            if story.owner_id in iphone_structs:
+                story._iphone_struct_ = iphone_structs[story.owner_id]
+    
+    def _iter_items(
+        self,
+        stories: Iterable[instaloader.Story],
+        story_dir: Path,
+        stats: BackupStats,
+        heading: str = "📱 Active Stories"
+    ) -> Iterator[Tuple[BackupStats, instaloader.StoryItem, Path]]:
+        """
+        Produce download jobs as stories and their items are listed
+        
+        Args:
+            stories: Iterator of stories
+            story_dir: Target directory for story items
+            stats: Statistics of the profile the stories belong to
+            heading: Line printed before the first item
             
-            # Create progress bar for story items
-            if len(items_list) > 0:
-                pbar = self.progress.create_bar(
-                    total=len(items_list),
-                    desc="Downloading stories",
-                    unit="item"
-                )
+        Yields:
+            (stats, item, story_dir) per item
+        """
+        for story in stories:
+            try:
+                if stats.items_total == 0:
+                    self.storage.makedirs(story_dir)
+                    self.progress.write(f"\n{heading}")
                 
-                for item in items_list:
-                    try:
-                        result = self._download_item(item, story_dir)
-                        if result == "downloaded":
-                            self.stats.increment_downloaded()
-                        elif result == "skipped":
-                            self.stats.increment_skipped()
-                        else:
-                            self.stats.increment_failed()
-                        pbar.update(1)
-                    except Exception as e:
-                        self.logger.warning(f"Error downloading story item: {e}")
-                        self.stats.increment_failed()
-                        pbar.update(1)
-                        continue
+                # Paced and retried here; get_items() then reuses the iPhone variants
+                context = self.loader.context
+                if context.iphone_support and context.is_logged_in and story._iphone_struct_ is None:
+                    self.rate_limiter.call(story._fetch_iphone_struct, self.max_retries)
+                items = list(story.get_items())
+                self.item_downloader.register(items, story_dir)
+                if self.config_loader is not None:
+                    items = self.config_loader.filter_items(items, stats.add_filtered)
+                if self.size_filter is not None:
+                    items = self.size_filter.select(
+                        items,
+                        lambda item: item.mediaid,
+                        lambda item: self.item_downloader.probe_size(item, story_dir),
+                        stats.add_filtered
+                    )
                 
-                pbar.close()
-                self.progress.write(f"  ✓ Downloaded {self.stats.items_downloaded} items")
-            
-        except Exception as e:
-            self.logger.error(f"Error downloading story: {e}")
-            self.stats.add_error(f"Story download error: {str(e)[:50]}")
+                for item in items:
+                    stats.items_total += 1
+                    self.progress.add_total(1)
+                    yield stats, item, story_dir
+                    
+            except Exception as e:
+                self.logger.error(f"Error downloading story: {e}")
+                stats.add_error(f"Story download error: {str(e)[:50]}")
     
-    def _download_item(self, item: instaloader.StoryItem, target_dir: Path) -> str:
+    @staticmethod
+    def _count(stats: BackupStats, result: str, size: int = 0) -> None:
         """
-        Download a single story item
+        Add an item result to statistics
         
         Args:
-            item: Story item to download
-            target_dir: Target directory
-            
-        Returns:
-            Status: "downloaded", "skipped", or "failed"
+            stats: Statistics to update
+            result: "downloaded", "skipped" or "failed"
+            size: Bytes written for a downloaded item
         """
-        try:
-            # Check if file already exists (incremental backup)
-            if self.skip_existing:
-                date_str = item.date_utc.strftime('%Y-%m-%d_%H-%M-%S_UTC')
-                video_file = target_dir / f"{date_str}.mp4"
-                jpg_file = target_dir / f"{date_str}.jpg"
-                
-                if video_file.exists() or jpg_file.exists():
-                    self.logger.debug(f"Skipping existing item: {date_str}")
-                    return "skipped"
-            
-            # Change to target directory to avoid path issues
-            original_dir = os.getcwd()
-            os.chdir(target_dir)
-            
-            try:
-                self.loader.download_storyitem(item, '.')
-            finally:
-                os.chdir(original_dir)
-            
-            return "downloaded"
-        except Exception as e:
-            self.logger.warning(f"Failed to download story item: {e}")
-            return "failed"
+        if result == "downloaded":
+            stats.increment_downloaded(size)
+        elif result == "skipped":
+            stats.increment_skipped()
+        else:
+            stats.increment_failed()
     
     def _get_story_dir(self, username: str) -> Path:
         """
@@ -2,9 +2,11 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
+from .progress import format_bytes
+
 
 @dataclass
 class BackupStats:
@@ -16,14 +18,24 @@ class BackupStats:
     highlights_found: int = 0
     highlights_downloaded: int = 0
     highlights_skipped: int = 0
+    highlights_unchanged: int = 0
     highlights_failed: int = 0
     
     items_total: int = 0
     items_downloaded: int = 0
     items_skipped: int = 0
     items_failed: int = 0
+    items_filtered: int = 0
     
     bytes_downloaded: int = 0
+    peak_bytes_per_second: float = 0.0
+    
+    requests_made: int = 0
+    requests_throttled: int = 0
+    requests_retried: int = 0
+    
+    phase_counts: Dict[str, int] = field(default_factory=dict)
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
     
     errors: List[str] = field(default_factory=list)
     
@@ -61,6 +73,73 @@ class BackupStats:
             bytes_val /= 1024.0
         return f"{bytes_val:.1f} TB"
     
+    @property
+    def average_bytes_per_second(self) -> float:
+        """Get average download throughput over the whole backup"""
+        seconds = self.duration.total_seconds()
+        return self.bytes_downloaded / seconds if seconds > 0 else 0.0
+    
+    @property
+    def request_rate(self) -> float:
+        """Get effective request rate (requests per second)"""
+        seconds = self.duration.total_seconds()
+        return self.requests_made / seconds if seconds > 0 else 0.0
+    
+    @classmethod
+    def combine(cls, stats_list: Iterable["BackupStats"]) -> "BackupStats":
+        """
+        Aggregate statistics of several backups
+        
+        Args:
+            stats_list: Statistics to combine
+            
+        Returns:
+            Combined statistics spanning all backups
+        """
+        stats_list = list(stats_list)
+        combined = cls()
+        if not stats_list:
+            return combined
+        
+        combined.start_time = min(stats.start_time for stats in stats_list)
+        end_times = [stats.end_time for stats in stats_list if stats.end_time]
+        combined.end_time = max(end_times) if end_times else None
+        
+        for stats in stats_list:
+            combined.highlights_found += stats.highlights_found
+            combined.highlights_downloaded += stats.highlights_downloaded
+            combined.highlights_skipped += stats.highlights_skipped
+            combined.highlights_unchanged += stats.highlights_unchanged
+            combined.highlights_failed += stats.highlights_failed
+            combined.items_total += stats.items_total
+            combined.items_downloaded += stats.items_downloaded
+            combined.items_skipped += stats.items_skipped
+            combined.items_failed += stats.items_failed
+            combined.items_filtered += stats.items_filtered
+            combined.bytes_downloaded += stats.bytes_downloaded
+            combined.peak_bytes_per_second = max(combined.peak_bytes_per_second, stats.peak_bytes_per_second)
+            combined.requests_made += stats.requests_made
+            combined.requests_throttled += stats.requests_throttled
+            combined.requests_retried += stats.requests_retried
+            combined.add_phases({
+                name: (count, stats.phase_seconds.get(name, 0.0))
+                for name, count in stats.phase_counts.items()
+            })
+            combined.errors.extend(stats.errors)
+        
+        return combined
+    
+    def add_phases(self, totals: Dict[str, Tuple[int, float]]) -> None:
+        """
+        Add traced phase timings
+        
+        Args:
+            totals: Span count and total seconds per phase
+        """
+        for name, (count, seconds) in totals.items():
+            self.phase_counts[name] = self.phase_counts.get(name, 0) + count
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+    
     def add_error(self, error: str) -> None:
         """
         Add an error to the list
@@ -87,6 +166,15 @@ class BackupStats:
     def increment_failed(self) -> None:
         """Increment failed counter"""
         self.items_failed += 1
+    
+    def add_filtered(self, count: int = 1) -> None:
+        """
+        Count items left out by date/type filters
+        
+        Args:
+            count: Number of items filtered out
+        """
+        self.items_filtered += count
 
 
 class SummaryReport:
@@ -118,7 +206,8 @@ class SummaryReport:
         lines.append("Highlights:")
         lines.append(f"  ✓ Downloaded: {stats.highlights_downloaded}")
         if stats.highlights_skipped > 0:
-            lines.append(f"  ⊘ Skipped: {stats.highlights_skipped}")
+            unchanged = f" ({stats.highlights_unchanged} unchanged)" if stats.highlights_unchanged else ""
+            lines.append(f"  ⊘ Skipped: {stats.highlights_skipped}{unchanged}")
         if stats.highlights_failed > 0:
             lines.append(f"  ✗ Failed: {stats.highlights_failed}")
         lines.append(f"  ━ Total found: {stats.highlights_found}")
@@ -131,12 +220,35 @@ class SummaryReport:
             lines.append(f"  ⊘ Skipped (already exist): {stats.items_skipped}")
         if stats.items_failed > 0:
             lines.append(f"  ✗ Failed: {stats.items_failed}")
+        if stats.items_filtered > 0:
+            lines.append(f"  ⊘ Filtered out (date/type/size): {stats.items_filtered}")
         lines.append(f"  ━ Total: {stats.items_total}")
         lines.append("")
         
         # Size info
         if stats.bytes_downloaded > 0:
             lines.append(f"Downloaded: {stats.size_str}")
+            average = stats.average_bytes_per_second
+            peak = max(stats.peak_bytes_per_second, average)
+            lines.append(f"  Throughput: {format_bytes(average)}/s average, {format_bytes(peak)}/s peak")
+            lines.append("")
+        
+        # Request info
+        if stats.requests_made > 0:
+            lines.append(f"Requests: {stats.requests_made} ({stats.request_rate:.2f} req/s)")
+            if stats.requests_throttled > 0:
+                lines.append(f"  ⚠ Throttled: {stats.requests_throttled}")
+            if stats.requests_retried > 0:
+                lines.append(f"  ↻ Retried: {stats.requests_retried}")
+            lines.append("")
+        
+        # Phase timings (only recorded while tracing)
+        if stats.phase_seconds:
+            lines.append("Time by phase (summed over workers):")
+            for name, seconds in sorted(stats.phase_seconds.items(), key=lambda entry: -entry[1]):
+                count = stats.phase_counts.get(name, 0)
+                average = seconds / count if count else 0.0
+                lines.append(f"  {name:<10} {seconds:8.2f}s  {count:5d}× {average * 1000:8.1f} ms avg")
             lines.append("")
         
         # Errors
@@ -160,6 +272,45 @@ class SummaryReport:
         
         return "\n".join(lines)
     
+    @staticmethod
+    def generate_batch(
+        total: BackupStats,
+        per_profile: Dict[str, BackupStats],
+        output_dir: Path
+    ) -> str:
+        """
+        Generate summary report for a batch backup
+        
+        Args:
+            total: Aggregated statistics
+            per_profile: Statistics per username
+            output_dir: Output directory
+            
+        Returns:
+            Formatted summary string
+        """
+        lines = []
+        lines.append("\n" + "=" * 60)
+        lines.append("PROFILES")
+        lines.append("=" * 60)
+        
+        width = max((len(username) for username in per_profile), default=0)
+        for username, stats in per_profile.items():
+            if stats.errors and stats.items_total == 0 and stats.highlights_found == 0:
+                error = stats.errors[0].replace(f"{username}: ", "", 1)
+                lines.append(f"  ✗ {username:<{width}}  {error[:50]}")
+                continue
+            failed = stats.items_failed > 0 or stats.highlights_failed > 0
+            mark = "⚠" if failed else "✓"
+            lines.append(
+                f"  {mark} {username:<{width}}  {stats.items_downloaded} downloaded, "
+                f"{stats.items_skipped} skipped, {stats.items_failed} failed ({stats.duration_str})"
+            )
+        
+        target = f"{len(per_profile)} profiles"
+        lines.append(SummaryReport.generate(total, target, output_dir))
+        return "\n".join(lines)
+    
     @staticmethod
     def print_summary(stats: BackupStats, target_user: str, output_dir: Path) -> None:
         """
@@ -0,0 +1,234 @@
+"""Per-phase span tracing with Chrome trace and Prometheus textfile export"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .summary import BackupStats
+
+# Phase name -> (number of spans, total seconds)
+PhaseTotals = Dict[str, Tuple[int, float]]
+
+# Spans kept for export_chrome(); older ones are dropped (long igsaver watch runs)
+MAX_EVENTS = 100_000
+
+
+class _NullSpan:
+    """Span returned while tracing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Timed region recorded on exit"""
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, self.args)
+
+
+class Tracer:
+    """
+    Record how long each phase of a backup takes
+
+    Phases are profile lookup ("profile"), highlight and story listing
+    ("highlights", "stories"), item metadata ("items"), whole items
+    ("item"), media transfer ("media") and final disk writes ("write").
+    While disabled, span() returns a shared no-op context manager. Only
+    the latest max_events spans are kept for the Chrome trace; phase
+    totals cover every span.
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = MAX_EVENTS) -> None:
+        """
+        Initialize tracer
+
+        Args:
+            enabled: Record spans from the start
+            max_events: Number of spans kept for export_chrome()
+        """
+        self.enabled = enabled
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.dropped = 0
+        self._totals: Dict[str, List[float]] = {}
+        self._tracks: Dict[int, int] = {}
+        self._next_tid = 1
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording spans"""
+        self.enabled = True
+
+    def span(self, name: str, **args: Any):
+        """
+        Time a phase
+
+        Args:
+            name: Phase name
+            **args: Details shown in the trace (username, highlight, media id)
+
+        Returns:
+            Context manager timing its body
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def totals(self) -> PhaseTotals:
+        """
+        Get span count and total seconds per phase
+
+        Returns:
+            Phase totals recorded so far
+        """
+        with self._lock:
+            return {name: (int(count), seconds) for name, (count, seconds) in self._totals.items()}
+
+    def totals_since(self, before: PhaseTotals) -> PhaseTotals:
+        """
+        Get phase totals recorded after a snapshot
+
+        Args:
+            before: Result of an earlier totals() call
+
+        Returns:
+            Difference per phase (phases without new spans are left out)
+        """
+        result = {}
+        for name, (count, seconds) in self.totals().items():
+            old_count, old_seconds = before.get(name, (0, 0.0))
+            if count > old_count:
+                result[name] = (count - old_count, seconds - old_seconds)
+        return result
+
+    def export_chrome(self, path: Path) -> None:
+        """
+        Write spans as a Chrome trace (chrome://tracing, Perfetto)
+
+        Args:
+            path: Output JSON file
+        """
+        with self._lock:
+            events = list(self.events)
+            dropped = self.dropped
+        trace: Dict[str, Any] = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if dropped:
+            trace["otherData"] = {"dropped_spans": dropped}
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+
+    def export_prometheus(self, path: Path, stats: BackupStats) -> None:
+        """
+        Write phase timings and run statistics for the node exporter textfile collector
+
+        The file is replaced atomically so the collector never reads a
+        partial file.
+
+        Args:
+            path: Output .prom file
+            stats: Statistics of the finished run
+        """
+        lines = [
+            "# HELP igsaver_phase_seconds Time spent per backup phase in the last run (summed over workers)",
+            "# TYPE igsaver_phase_seconds gauge",
+        ]
+        for name, seconds in sorted(stats.phase_seconds.items()):
+            lines.append(f'igsaver_phase_seconds{{phase="{name}"}} {seconds:.6f}')
+
+        lines += [
+            "# HELP igsaver_phase_spans Number of timed spans per backup phase in the last run",
+            "# TYPE igsaver_phase_spans gauge",
+        ]
+        for name, count in sorted(stats.phase_counts.items()):
+            lines.append(f'igsaver_phase_spans{{phase="{name}"}} {count}')
+
+        gauges = [
+            ("items", "Items by result in the last run", [
+                ('result="downloaded"', stats.items_downloaded),
+                ('result="skipped"', stats.items_skipped),
+                ('result="failed"', stats.items_failed),
+                ('result="filtered"', stats.items_filtered),
+            ]),
+            ("bytes_downloaded", "Bytes downloaded in the last run", [("", stats.bytes_downloaded)]),
+            ("requests", "Requests issued in the last run", [("", stats.requests_made)]),
+            ("duration_seconds", "Wall time of the last run", [("", stats.duration.total_seconds())]),
+            ("last_run_timestamp_seconds", "Unix time the last run finished", [("", time.time())]),
+        ]
+        for metric, help_text, samples in gauges:
+            lines += [f"# HELP igsaver_{metric} {help_text}", f"# TYPE igsaver_{metric} gauge"]
+            for labels, value in samples:
+                label_str = f"{{{labels}}}" if labels else ""
+                lines.append(f"igsaver_{metric}{label_str} {value}")
+
+        temp = Path(f"{path}.{os.getpid()}.tmp")
+        temp.write_text("\n".join(lines) + "\n")
+        os.replace(temp, path)
+
+    def _record(self, name: str, start: float, end: float, args: Dict[str, Any]) -> None:
+        """Store a finished span"""
+        track = self._track_key()
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += end - start
+            tid = self._tracks.get(track)
+            if tid is None:
+                # Every asyncio task is a track; forget old ones along with their spans
+                if len(self._tracks) >= self.events.maxlen:
+                    self._tracks.clear()
+                tid = self._tracks[track] = self._next_tid
+                self._next_tid += 1
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append({
+                "name": name,
+                "cat": "igsaver",
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {key: str(value) for key, value in args.items()},
+            })
+
+    @staticmethod
+    def _track_key() -> int:
+        """Identify the thread or asyncio task a span ran on"""
+        try:
+            task: Optional[asyncio.Task] = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return id(task) if task is not None else threading.get_ident()
+
+
+# Shared by all downloaders; enabled by --trace / --metrics-file
+tracer = Tracer()
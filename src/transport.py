@@ -0,0 +1,517 @@
+"""Transports used by the asyncio download engine"""
+
+import asyncio
+import json
+import logging
+import ssl
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .exceptions import DownloadError, ProfileError, RateLimitError
+from .constants import ERR_PROFILE_NOT_FOUND, ERR_PRIVATE_PROFILE
+from .manifest import HighlightState
+from .media_file import CHUNK_SIZE, parse_content_range
+
+
+@dataclass
+class ProfileInfo:
+    """Profile metadata needed to list highlights and stories"""
+    username: str
+    userid: int
+    is_private: bool = False
+
+
+@dataclass
+class HighlightInfo:
+    """Highlight reel listing entry"""
+    highlight_id: int
+    title: str
+    state: HighlightState = field(default_factory=HighlightState)
+
+    @classmethod
+    def from_node(cls, node: Dict[str, Any]) -> "HighlightInfo":
+        """
+        Build listing entry from a highlight node
+
+        Args:
+            node: Highlight node as returned by Instagram (or to_node())
+
+        Returns:
+            HighlightInfo instance
+        """
+        return cls(int(node['id']), node['title'], HighlightState.from_node(node))
+
+    def to_node(self) -> Dict[str, Any]:
+        """
+        Express listing entry as a highlight node (for the metadata cache)
+
+        Returns:
+            Node readable by from_node()
+        """
+        node: Dict[str, Any] = {'id': str(self.highlight_id), 'title': self.title}
+        if self.state.latest_media is not None:
+            node['latest_reel_media'] = self.state.latest_media
+        if self.state.item_count is not None:
+            node['media_count'] = self.state.item_count
+        if self.state.cover_id is not None:
+            node['cover_media'] = {'id': self.state.cover_id}
+        return node
+
+
+@dataclass
+class MediaInfo:
+    """Story item metadata, independent of the transport"""
+    media_id: str
+    date_utc: datetime
+    is_video: bool
+    url: str
+    video_url: Optional[str] = None
+    node: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_node(cls, node: Dict[str, Any]) -> "MediaInfo":
+        """
+        Build media info from a GraphQL story item node
+
+        Args:
+            node: Story item node as returned by Instagram
+
+        Returns:
+            MediaInfo instance
+        """
+        video_url = node.get('video_url')
+        if not video_url and node.get('video_resources'):
+            video_url = node['video_resources'][-1]['src']
+
+        return cls(
+            media_id=str(node['id']),
+            date_utc=datetime.utcfromtimestamp(node['taken_at_timestamp']),
+            is_video=bool(node.get('is_video')),
+            url=node['display_url'],
+            video_url=video_url,
+            node=node,
+        )
+
+
+@dataclass
+class MediaResponse:
+    """Streaming media body, possibly starting inside the file"""
+    content_type: Optional[str]
+    chunks: AsyncIterator[bytes]
+    start: int = 0
+    total_length: Optional[int] = None
+
+
+class Transport(ABC):
+    """Source of metadata and media for the asyncio engine"""
+
+    @abstractmethod
+    async def get_profile(self, username: str) -> ProfileInfo:
+        """
+        Look up a profile
+
+        Raises:
+            ProfileError: If profile does not exist or is not accessible
+        """
+
+    @abstractmethod
+    async def list_highlights(self, profile: ProfileInfo) -> List[HighlightInfo]:
+        """List highlight reels of a profile"""
+
+    @abstractmethod
+    async def list_highlight_items(self, highlight: HighlightInfo) -> List[MediaInfo]:
+        """List items of a highlight reel"""
+
+    async def list_highlight_items_many(self, highlights: List[HighlightInfo]) -> Dict[int, List[MediaInfo]]:
+        """
+        List items of several highlight reels
+
+        Asks for each highlight separately; transports whose API takes
+        several reel ids per request override this.
+
+        Args:
+            highlights: Highlight listing entries
+
+        Returns:
+            Items keyed by highlight id (highlights missing from the
+            response are left out)
+        """
+        items = await asyncio.gather(*(self.list_highlight_items(highlight) for highlight in highlights))
+        return {highlight.highlight_id: reel for highlight, reel in zip(highlights, items)}
+
+    @abstractmethod
+    async def list_story_items(self, profile: ProfileInfo) -> List[MediaInfo]:
+        """List items of the active story of a profile"""
+
+    async def list_stories(self, profiles: List[ProfileInfo]) -> Dict[int, List[MediaInfo]]:
+        """
+        List items of the active stories of several profiles
+
+        Asks for each profile separately; transports whose API takes
+        several user ids per request override this.
+
+        Args:
+            profiles: Profiles (at most STORIES_BATCH_SIZE)
+
+        Returns:
+            Story items keyed by user id (profiles without an active story
+            may be left out)
+        """
+        items = await asyncio.gather(*(self.list_story_items(profile) for profile in profiles))
+        return {profile.userid: profile_items for profile, profile_items in zip(profiles, items)}
+
+    @abstractmethod
+    async def open_media(self, url: str, offset: int = 0) -> MediaResponse:
+        """
+        Start a media transfer
+
+        Args:
+            url: Media URL
+            offset: Request the body from this byte on (resume); servers
+                may ignore it and send the whole file (start == 0)
+
+        Raises:
+            DownloadError: If media cannot be fetched
+        """
+
+    async def probe_media(self, url: str) -> Optional[int]:
+        """
+        Get the size of a media file without transferring its body
+
+        Args:
+            url: Media URL
+
+        Returns:
+            Size in bytes, or None if unknown
+        """
+        return None
+
+    async def close(self) -> None:
+        """Release transport resources"""
+
+
+class InstaloaderTransport(Transport):
+    """Transport bridging the blocking Instaloader context onto the event loop"""
+
+    def __init__(self, loader: Any) -> None:
+        """
+        Initialize transport
+
+        Args:
+            loader: Authenticated Instaloader instance
+        """
+        self.loader = loader
+
+    async def get_profile(self, username: str) -> ProfileInfo:
+        import instaloader
+
+        try:
+            profile = await asyncio.to_thread(
+                instaloader.Profile.from_username, self.loader.context, username
+            )
+        except instaloader.exceptions.ProfileNotExistsException:
+            raise ProfileError(f"{username} - {ERR_PROFILE_NOT_FOUND}")
+        except instaloader.exceptions.PrivateProfileNotFollowedException:
+            raise ProfileError(f"{username} {ERR_PRIVATE_PROFILE}")
+
+        return ProfileInfo(profile.username, profile.userid, profile.is_private)
+
+    async def list_highlights(self, profile: ProfileInfo) -> List[HighlightInfo]:
+        highlights = await asyncio.to_thread(lambda: list(self.loader.get_highlights(profile.userid)))
+        return [HighlightInfo.from_node(h._node) for h in highlights]
+
+    async def list_highlight_items(self, highlight: HighlightInfo) -> List[MediaInfo]:
+        import instaloader
+
+        def fetch() -> List[MediaInfo]:
+            reel = instaloader.Highlight(
+                self.loader.context, {'id': highlight.highlight_id, 'title': highlight.title}
+            )
+            reel._fetch_items()
+            return [MediaInfo.from_node(node) for node in reel._items or []]
+
+        return await asyncio.to_thread(fetch)
+
+    async def list_highlight_items_many(self, highlights: List[HighlightInfo]) -> Dict[int, List[MediaInfo]]:
+        from .reels import fetch_highlight_items
+
+        def fetch() -> Dict[int, List[MediaInfo]]:
+            reels = fetch_highlight_items(self.loader.context, [highlight.highlight_id for highlight in highlights])
+            return {
+                highlight_id: [MediaInfo.from_node(node) for node in nodes]
+                for highlight_id, nodes in reels.items()
+            }
+
+        return await asyncio.to_thread(fetch)
+
+    async def list_story_items(self, profile: ProfileInfo) -> List[MediaInfo]:
+        def fetch() -> List[MediaInfo]:
+            items: List[MediaInfo] = []
+            for story in self.loader.get_stories([profile.userid]):
+                items.extend(MediaInfo.from_node(node) for node in reversed(story._node['items']))
+            return items
+
+        return await asyncio.to_thread(fetch)
+
+    async def list_stories(self, profiles: List[ProfileInfo]) -> Dict[int, List[MediaInfo]]:
+        def fetch() -> Dict[int, List[MediaInfo]]:
+            reels: Dict[int, List[MediaInfo]] = {}
+            # One reels media query for all given user ids
+            for story in self.loader.get_stories([profile.userid for profile in profiles]):
+                reels.setdefault(story.owner_id, []).extend(
+                    MediaInfo.from_node(node) for node in reversed(story._node['items'])
+                )
+            return reels
+
+        return await asyncio.to_thread(fetch)
+
+    async def open_media(self, url: str, offset: int = 0) -> MediaResponse:
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+
+        def fetch() -> Any:
+            session = self.loader.context.get_anonymous_session()
+            return session.get(url, stream=True, headers=headers)
+
+        try:
+            resp = await asyncio.to_thread(fetch)
+        except Exception as e:
+            raise DownloadError(f"Could not fetch media: {e}")
+
+        if resp.status_code == 429:
+            resp.close()
+            raise RateLimitError(f"Could not fetch media: HTTP 429")
+        if resp.status_code not in (200, 206):
+            resp.close()
+            raise DownloadError(f"Could not fetch media: HTTP {resp.status_code}")
+
+        start, total = parse_content_range(
+            resp.status_code, resp.headers.get('Content-Range'), resp.headers.get('Content-Length')
+        )
+        return MediaResponse(
+            content_type=resp.headers.get('Content-Type'),
+            chunks=self._iter_body(resp),
+            start=start,
+            total_length=total,
+        )
+
+    async def probe_media(self, url: str) -> Optional[int]:
+        from .size_filter import probe_with_session
+
+        def probe() -> Optional[int]:
+            session = self.loader.context.get_anonymous_session()
+            try:
+                return probe_with_session(session, url)
+            finally:
+                session.close()
+
+        return await asyncio.to_thread(probe)
+
+    async def _iter_body(self, resp: Any) -> AsyncIterator[bytes]:
+        """Read a requests response body without blocking the loop"""
+        try:
+            while True:
+                chunk = await asyncio.to_thread(resp.raw.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            resp.close()
+
+
+class HttpTransport(Transport):
+    """
+    Native asyncio transport talking to a JSON HTTP API
+
+    Used against local stand-ins for Instagram (tests, benchmarks). The API
+    serves GET /api/profiles/<username>, /api/profiles/<userid>/highlights,
+    /api/profiles/<userid>/stories, /api/stories?userids=<id>,<id>,...,
+    /api/highlights/<id>/items and /api/highlight_items?ids=<id>,<id>,...;
+    item nodes use the GraphQL story item fields.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        """
+        Initialize transport
+
+        Args:
+            base_url: Base URL of the API, e.g. http://127.0.0.1:8080
+            timeout: Timeout in seconds per network operation
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.request_count = 0
+        self.logger = logging.getLogger(__name__)
+
+    async def get_profile(self, username: str) -> ProfileInfo:
+        status, data = await self._get_json(f"/api/profiles/{quote(username)}")
+        if status == 404:
+            raise ProfileError(f"{username} - {ERR_PROFILE_NOT_FOUND}")
+        if status == 403:
+            raise ProfileError(f"{username} {ERR_PRIVATE_PROFILE}")
+        self._check_status(status, f"profile {username}")
+        return ProfileInfo(data['username'], int(data['userid']), bool(data.get('is_private')))
+
+    async def list_highlights(self, profile: ProfileInfo) -> List[HighlightInfo]:
+        status, data = await self._get_json(f"/api/profiles/{profile.userid}/highlights")
+        self._check_status(status, f"highlights of {profile.username}")
+        return [HighlightInfo.from_node(h) for h in data['highlights']]
+
+    async def list_highlight_items(self, highlight: HighlightInfo) -> List[MediaInfo]:
+        status, data = await self._get_json(f"/api/highlights/{highlight.highlight_id}/items")
+        self._check_status(status, f"items of highlight {highlight.title}")
+        return [MediaInfo.from_node(node) for node in data['items']]
+
+    async def list_highlight_items_many(self, highlights: List[HighlightInfo]) -> Dict[int, List[MediaInfo]]:
+        ids = ','.join(str(highlight.highlight_id) for highlight in highlights)
+        status, data = await self._get_json(f"/api/highlight_items?ids={ids}")
+        self._check_status(status, f"items of {len(highlights)} highlights")
+        return {int(reel_id): [MediaInfo.from_node(node) for node in items] for reel_id, items in data['reels'].items()}
+
+    async def list_story_items(self, profile: ProfileInfo) -> List[MediaInfo]:
+        status, data = await self._get_json(f"/api/profiles/{profile.userid}/stories")
+        self._check_status(status, f"stories of {profile.username}")
+        return [MediaInfo.from_node(node) for node in data['items']]
+
+    async def list_stories(self, profiles: List[ProfileInfo]) -> Dict[int, List[MediaInfo]]:
+        userids = ','.join(str(profile.userid) for profile in profiles)
+        status, data = await self._get_json(f"/api/stories?userids={userids}")
+        self._check_status(status, f"stories of {len(profiles)} profiles")
+        return {int(userid): [MediaInfo.from_node(node) for node in items] for userid, items in data['reels'].items()}
+
+    async def open_media(self, url: str, offset: int = 0) -> MediaResponse:
+        if url.startswith('/'):
+            url = self.base_url + url
+        status, headers, chunks = await self._request(url, {'Range': f'bytes={offset}-'} if offset else None)
+        if status not in (200, 206):
+            await chunks.aclose()
+            self._check_status(status, "media")
+
+        start, total = parse_content_range(status, headers.get('content-range'), headers.get('content-length'))
+        return MediaResponse(
+            content_type=headers.get('content-type'),
+            chunks=chunks,
+            start=start,
+            total_length=total,
+        )
+
+    async def probe_media(self, url: str) -> Optional[int]:
+        if url.startswith('/'):
+            url = self.base_url + url
+        status, headers, chunks = await self._request(url, {'Range': 'bytes=0-0'})
+        await chunks.aclose()
+        if status not in (200, 206):
+            return None
+        return parse_content_range(status, headers.get('content-range'), headers.get('content-length'))[1]
+
+    async def _get_json(self, path: str) -> Tuple[int, Any]:
+        """
+        GET a JSON document from the API
+
+        Args:
+            path: Path below base_url
+
+        Returns:
+            (status, decoded body or None)
+        """
+        status, _, chunks = await self._request(self.base_url + path)
+        body = b"".join([chunk async for chunk in chunks])
+        if status != 200:
+            return status, None
+        return status, json.loads(body)
+
+    def _check_status(self, status: int, what: str) -> None:
+        """Raise DownloadError for unexpected API status codes"""
+        if status == 429:
+            raise RateLimitError(f"Could not fetch {what}: HTTP 429")
+        if status != 200:
+            raise DownloadError(f"Could not fetch {what}: HTTP {status}")
+
+    async def _request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], AsyncIterator[bytes]]:
+        """
+        Send a GET request (HTTP/1.1, one connection per request)
+
+        Args:
+            url: Absolute URL
+            headers: Extra request headers
+
+        Returns:
+            (status, lowercased response headers, body chunk iterator)
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        self.request_count += 1
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                parts.hostname, port, ssl=ssl.create_default_context() if secure else None
+            ),
+            self.timeout
+        )
+
+        lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            writer.close()
+            raise DownloadError(f"Malformed HTTP response from {parts.netloc}")
+
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        return status, response_headers, self._iter_body(reader, writer, response_headers)
+
+    async def _iter_body(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        headers: Dict[str, str]
+    ) -> AsyncIterator[bytes]:
+        """Yield response body chunks and close the connection afterwards"""
+        try:
+            if headers.get('transfer-encoding', '').lower() == 'chunked':
+                while True:
+                    size_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                    size = int(size_line.split(b';')[0], 16)
+                    if size == 0:
+                        break
+                    yield await asyncio.wait_for(reader.readexactly(size), self.timeout)
+                    await reader.readline()
+            elif 'content-length' in headers:
+                remaining = int(headers['content-length'])
+                while remaining > 0:
+                    chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, remaining)), self.timeout)
+                    if not chunk:
+                        raise DownloadError("Connection closed before end of body")
+                    remaining -= len(chunk)
+                    yield chunk
+            else:
+                while True:
+                    chunk = await asyncio.wait_for(reader.read(CHUNK_SIZE), self.timeout)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            writer.close()
@@ -0,0 +1,334 @@
+"""Long-running capture of active stories with adaptive per-profile polling"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .constants import (
+    WATCH_BACKOFF,
+    WATCH_CADENCE_WEIGHT,
+    WATCH_STATE_FILENAME,
+    STORY_LIFETIME_SECONDS,
+)
+from .exceptions import IGSaverException
+from .summary import BackupStats
+from .ui import UI
+
+
+@dataclass
+class WatchEntry:
+    """Polling schedule and posting history of one watched profile"""
+    username: str
+    userid: Optional[int] = None
+    latest_seen: int = 0
+    cadence: Optional[float] = None
+    interval: float = 0.0
+    next_check: float = 0.0
+    followed: Optional[bool] = None
+    checks: int = 0
+    captures: int = 0
+
+
+class WatchState:
+    """
+    SQLite store of watch schedules, stored in the backup root
+
+    Every entry is committed as soon as its check is done, so a daemon
+    that is killed resumes with the schedule and the last captured story
+    of every profile.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            username    TEXT PRIMARY KEY,
+            userid      INTEGER,
+            latest_seen INTEGER NOT NULL,
+            cadence     REAL,
+            interval    REAL NOT NULL,
+            next_check  REAL NOT NULL,
+            followed    INTEGER,
+            checks      INTEGER NOT NULL,
+            captures    INTEGER NOT NULL
+        )
+    """
+
+    def __init__(self, backup_dir: Path) -> None:
+        """
+        Open (or create) the watch state for a backup root
+
+        Args:
+            backup_dir: Backup root directory
+        """
+        self.path = backup_dir / WATCH_STATE_FILENAME
+        self._lock = threading.Lock()
+
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(self.SCHEMA)
+
+    def load(self, usernames: List[str]) -> List[WatchEntry]:
+        """
+        Get entries of the watched profiles, new ones due immediately
+
+        Args:
+            usernames: Watched usernames
+
+        Returns:
+            One entry per username, in the given order
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM profiles").fetchall()
+        stored = {row[0]: row for row in rows}
+
+        entries = []
+        for username in usernames:
+            row = stored.get(username)
+            if row is None:
+                entries.append(WatchEntry(username))
+                continue
+            entries.append(WatchEntry(
+                username=row[0],
+                userid=row[1],
+                latest_seen=row[2],
+                cadence=row[3],
+                interval=row[4],
+                next_check=row[5],
+                followed=None if row[6] is None else bool(row[6]),
+                checks=row[7],
+                captures=row[8],
+            ))
+        return entries
+
+    def save(self, entry: WatchEntry) -> None:
+        """
+        Store an entry (committed immediately)
+
+        Args:
+            entry: Entry after a check
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.username,
+                    entry.userid,
+                    entry.latest_seen,
+                    entry.cadence,
+                    entry.interval,
+                    entry.next_check,
+                    None if entry.followed is None else int(entry.followed),
+                    entry.checks,
+                    entry.captures,
+                )
+            )
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class StoryWatcher:
+    """
+    Poll watched profiles for new stories and capture them
+
+    A check only asks for the timestamp of each profile's latest story
+    item: one reels tray request covers every followed profile, profiles
+    not in the tray are asked for directly (50 per request). Stories are
+    downloaded only when that timestamp moved.
+
+    Every profile is polled at its own interval: after a new story, half
+    the profile's average time between stories; after a quiet check, the
+    previous interval times WATCH_BACKOFF. Intervals stay between the
+    configured bounds, and below a story's lifetime so no story expires
+    unseen. Checks are deferred while the hourly request budget is spent.
+    """
+
+    def __init__(
+        self,
+        state: WatchState,
+        resolve_userid: Callable[[str], int],
+        reels_tray: Callable[[], Dict[int, int]],
+        latest_reels: Callable[[List[int]], Dict[int, int]],
+        capture: Callable[[str], BackupStats],
+        requests_made: Callable[[], int],
+        min_interval: float = 600,
+        max_interval: float = 6 * 3600,
+        max_requests_per_hour: int = 0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        """
+        Initialize watcher
+
+        Args:
+            state: Persistent watch state
+            resolve_userid: Returns the user id of a username
+            reels_tray: Returns latest story timestamps of followed profiles
+                with an active story, keyed by user id
+            latest_reels: Returns latest story timestamps of the given user
+                ids that have an active story
+            capture: Downloads the active stories of a username
+            requests_made: Returns the number of requests issued so far
+            min_interval: Shortest polling interval in seconds
+            max_interval: Longest polling interval in seconds
+            max_requests_per_hour: Request budget (0 for no limit)
+            clock: Time source (seconds since the epoch)
+            sleep: Sleep function
+        """
+        self.state = state
+        self.resolve_userid = resolve_userid
+        self.reels_tray = reels_tray
+        self.latest_reels = latest_reels
+        self.capture = capture
+        self.requests_made = requests_made
+        self.max_interval = min(max_interval, STORY_LIFETIME_SECONDS / 2)
+        self.min_interval = min(min_interval, self.max_interval)
+        self.max_requests_per_hour = max_requests_per_hour
+        self.clock = clock
+        self.sleep = sleep
+        self.logger = logging.getLogger(__name__)
+        self._spent: Deque[Tuple[float, int]] = deque()
+
+    def run(self, usernames: List[str], once: bool = False) -> BackupStats:
+        """
+        Watch profiles until interrupted
+
+        Args:
+            usernames: Profiles to watch
+            once: If True, check every profile once and return
+
+        Returns:
+            Statistics of all captures
+        """
+        entries = self.state.load(usernames)
+        stats = BackupStats()
+
+        while True:
+            now = self.clock()
+            due = entries if once else [entry for entry in entries if entry.next_check <= now]
+            if due:
+                wait = self._budget_wait(now)
+                if wait > 0:
+                    self.logger.info(f"Request budget spent, deferring checks for {wait:.0f}s")
+                    self.sleep(wait)
+                    continue
+                before = self.requests_made()
+                stats = BackupStats.combine([stats, self.poll(due)])
+                self._spent.append((self.clock(), self.requests_made() - before))
+
+            if once:
+                stats.finish()
+                return stats
+
+            next_check = min(entry.next_check for entry in entries)
+            self.sleep(max(1.0, next_check - self.clock()))
+
+    def poll(self, due: List[WatchEntry]) -> BackupStats:
+        """
+        Check due profiles and capture those with new stories
+
+        Args:
+            due: Entries to check
+
+        Returns:
+            Statistics of the captures
+        """
+        captured: List[BackupStats] = []
+        latest = self._check(due)
+        now = self.clock()
+
+        for entry in due:
+            entry.checks += 1
+            timestamp = latest.get(entry.userid)
+            posted = timestamp is not None and timestamp > entry.latest_seen
+
+            if posted:
+                try:
+                    stats = self.capture(entry.username)
+                except IGSaverException as e:
+                    self.logger.error(f"Capturing stories of {entry.username} failed: {e}")
+                    stats = None
+                captured.append(stats or BackupStats())
+
+                if stats is not None and stats.items_failed == 0:
+                    if entry.latest_seen:
+                        gap = float(timestamp - entry.latest_seen)
+                        entry.cadence = gap if entry.cadence is None else (
+                            WATCH_CADENCE_WEIGHT * gap + (1 - WATCH_CADENCE_WEIGHT) * entry.cadence
+                        )
+                    entry.latest_seen = timestamp
+                    entry.captures += 1
+                    UI.print_success(f"{entry.username}: {stats.items_downloaded} new story items")
+                    interval = entry.cadence / 2 if entry.cadence else self.min_interval
+                else:
+                    # Retry soon, the story may still be partially missing
+                    interval = self.min_interval
+            else:
+                interval = (entry.interval or self.min_interval) * WATCH_BACKOFF
+
+            entry.interval = min(self.max_interval, max(self.min_interval, interval))
+            entry.next_check = now + entry.interval
+            self.state.save(entry)
+            self.logger.info(
+                f"Checked {entry.username}: {'new story' if posted else 'nothing new'}, "
+                f"next check in {entry.interval / 60:.0f} min"
+            )
+
+        return BackupStats.combine(captured)
+
+    def _check(self, due: List[WatchEntry]) -> Dict[int, int]:
+        """
+        Get latest story timestamps of due profiles
+
+        Args:
+            due: Entries to check (user ids are resolved and stored)
+
+        Returns:
+            Latest story timestamp per user id (profiles with an active story)
+        """
+        for entry in due:
+            if entry.userid is None:
+                entry.userid = self.resolve_userid(entry.username)
+
+        latest: Dict[int, int] = {}
+        if any(entry.followed is not False for entry in due):
+            latest.update(self.reels_tray())
+            for entry in due:
+                if entry.userid in latest:
+                    entry.followed = True
+
+        # Absence from the tray only means "no story" for followed profiles
+        direct = [entry.userid for entry in due if not entry.followed and entry.userid not in latest]
+        if direct:
+            found = self.latest_reels(direct)
+            latest.update(found)
+            for entry in due:
+                if entry.userid in found:
+                    entry.followed = False
+        return latest
+
+    def _budget_wait(self, now: float) -> float:
+        """
+        Seconds until the hourly request budget allows another check
+
+        Args:
+            now: Current time
+
+        Returns:
+            0 if a check may run now
+        """
+        while self._spent and self._spent[0][0] <= now - 3600:
+            self._spent.popleft()
+        if not self.max_requests_per_hour:
+            return 0.0
+        if sum(count for _, count in self._spent) < self.max_requests_per_hour:
+            return 0.0
+        return self._spent[0][0] + 3600 - now